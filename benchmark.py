@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for JARVIS pipeline stages.
+Run this to measure the cost of individual components without a microphone.
+"""
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add modules to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+SAMPLE_RATE = 16000
+
+
+def _synthetic_utterance(speech: float = 1.5, silence: float = 0.8) -> np.ndarray:
+    """Build an int16 test utterance: noisy speech-like tone followed by room noise."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int((speech + silence) * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = 0.003 * rng.standard_normal(len(t))
+    voiced = t < speech
+    audio[voiced] += 0.2 * np.sin(2 * np.pi * 180 * t[voiced]) * (1 + 0.8 * np.sin(2 * np.pi * 4 * t[voiced]))
+    return (audio * 32767).astype(np.int16)
+
+
+def _measure(run, repeats: int = 5) -> tuple:
+    """Return (peak bytes above baseline, seconds) per call, after one warm-up call."""
+    run()  # Let reusable buffers reach their steady-state size
+    started = time.perf_counter()
+    for _ in range(repeats):
+        run()
+    elapsed = (time.perf_counter() - started) / repeats  # Timed without tracemalloc's overhead
+    
+    peaks = []
+    tracemalloc.start()
+    for _ in range(repeats):
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        run()
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return max(peaks), elapsed
+
+
+def bench_audio_alloc():
+    """Bytes allocated per utterance on the capture -> model input path."""
+    print("\n" + "=" * 60)
+    print("Benchmark: audio path allocations per utterance")
+    print("=" * 60)
+    
+    from modules.audio_buffer import AudioRingBuffer, to_float32
+    from modules.vad import FrameVAD, RMSEndpointer, VADEndpointer
+    
+    source = _synthetic_utterance()
+    source_f32 = source.astype(np.float32) / 32768.0
+    block = int(0.02 * SAMPLE_RATE)
+    max_frames = 15 * SAMPLE_RATE
+    
+    # Both arms feed the same endpointer 20ms blocks and run the speech gate
+    # over the utterance; only the buffer handling differs
+    def before(endpointer, gate):
+        # Original path: full-length float32 sd.rec buffer, flatten copy of
+        # every block handed to the endpointer, trim + flatten before the model
+        def run():
+            recording = np.zeros((max_frames, 1), dtype=np.float32)
+            endpointer.reset()
+            frames = 0
+            while frames < len(source_f32):
+                n = min(block, len(source_f32) - frames)
+                recording[frames:frames + n, 0] = source_f32[frames:frames + n]
+                frames += n
+                endpointer.process(recording[frames - n:frames].flatten())
+            audio = recording[:frames].flatten()
+            gate.reset()
+            gate.process(audio)
+            return audio
+        return run
+    
+    def after(endpointer, gate):
+        # New path: int16 ring written by the callback, endpointer fed block
+        # views, one copy into the utterance buffer and one float32 conversion
+        ring = AudioRingBuffer(30 * SAMPLE_RATE)
+        block_buf = np.zeros(block, dtype=np.int16)
+        utterance = np.zeros(max_frames, dtype=np.int16)
+        model_input = np.zeros(max_frames, dtype=np.float32)
+        
+        def run():
+            endpointer.reset()
+            start = ring.write_pos
+            for i in range(0, len(source), block):
+                ring.write(source[i:i + block])
+                endpointer.process(ring.read(ring.write_pos - block, ring.write_pos, out=block_buf))
+            audio = ring.read(start, ring.write_pos, out=utterance)
+            gate.reset()
+            gate.process(audio)
+            return to_float32(audio, out=model_input)
+        return run
+    
+    endpointers = {
+        "rms": lambda: RMSEndpointer(sample_rate=SAMPLE_RATE),
+        "vad": lambda: VADEndpointer(sample_rate=SAMPLE_RATE),
+    }
+    
+    # Wake word frames: flatten + astype copy vs int16 channel view
+    frame_length = 512
+    frames_2d = source[:len(source) // frame_length * frame_length].reshape(-1, frame_length, 1)
+    
+    def wake_before():
+        for frame in frames_2d:
+            frame.flatten().astype(np.int16)
+    
+    def wake_after():
+        for frame in frames_2d:
+            frame[:, 0]
+    
+    seconds = len(source) / SAMPLE_RATE
+    for kind, make_endpointer in endpointers.items():
+        for name, arm in [("before", before), ("after", after)]:
+            peak, elapsed = _measure(arm(make_endpointer(), FrameVAD(sample_rate=SAMPLE_RATE)))
+            print(
+                f"STT {name:6s} ({kind}): {peak / 1024:9.1f} KiB peak allocated, "
+                f"{elapsed * 1000:6.2f} ms per {seconds:.1f}s utterance"
+            )
+    print("Within an endpointer the arms take about the same time; the VAD endpointer costs")
+    print("more than the RMS one because it scores every 20ms frame.")
+    for name, run in [("before", wake_before), ("after", wake_after)]:
+        peak, elapsed = _measure(run)
+        print(f"Wake {name:5s}: {peak / 1024:9.1f} KiB peak allocated, {elapsed * 1000:6.2f} ms per {seconds:.1f}s of frames")
+    print("")
+
+
+def _syllables(spec: list, stretch: float = 1.0, noise: float = 0.01, seed: int = 0) -> np.ndarray:
+    """Build an int16 word-like fixture: a sequence of two-formant syllables in room noise."""
+    rng = np.random.default_rng(seed)
+    parts = [np.zeros(int(0.3 * SAMPLE_RATE))]
+    for f1, f2, duration in spec:
+        n = int(duration * stretch * SAMPLE_RATE)
+        t = np.arange(n) / SAMPLE_RATE
+        f1 *= 1 + 0.05 * rng.standard_normal()
+        f2 *= 1 + 0.05 * rng.standard_normal()
+        parts.append(np.hanning(n) * (
+            0.2 * np.sin(2 * np.pi * f1 * t) + 0.1 * np.sin(2 * np.pi * f2 * t) + 0.05 * np.sin(2 * np.pi * 2.5 * f2 * t)
+        ))
+    parts.append(np.zeros(int(0.3 * SAMPLE_RATE)))
+    audio = np.concatenate(parts)
+    audio += noise * rng.standard_normal(len(audio))
+    return (audio * 32767).astype(np.int16)
+
+
+def bench_keyword_spotter():
+    """
+    CPU cost of the offline wake word engine, and its detection rate and
+    false accepts per hour across a range of thresholds.
+    
+    Usage: benchmark.py keyword_spotter [TEMPLATES.npz POSITIVES_DIR NEGATIVES_DIR]
+    With no arguments, synthetic syllable fixtures stand in for recordings.
+    The directories hold 16 kHz mono WAV files: positives each contain the
+    keyword once, negatives are ordinary speech and room noise.
+    """
+    print("\n" + "=" * 60)
+    print("Benchmark: local keyword spotter")
+    print("=" * 60)
+    
+    from modules.keyword_spotter import LocalKeywordSpotter, _read_wav
+    
+    if len(sys.argv) >= 5:
+        spotter = LocalKeywordSpotter.from_file(sys.argv[2])
+        positives = [_read_wav(str(p))[0] for p in sorted(Path(sys.argv[3]).glob("*.wav"))]
+        negatives = [_read_wav(str(p))[0] for p in sorted(Path(sys.argv[4]).glob("*.wav"))]
+        print(f"Fixtures: {len(positives)} positive, {len(negatives)} negative recordings")
+    else:
+        keyword = [(300, 2200, 0.18), (700, 1200, 0.22), (400, 1900, 0.25)]
+        others = [
+            [(500, 1500, 0.2), (300, 900, 0.2)],
+            [(700, 1200, 0.22), (300, 2200, 0.18), (600, 1000, 0.3)],
+            [(250, 2500, 0.3), (650, 1100, 0.25), (350, 2100, 0.2), (500, 800, 0.2)],
+        ]
+        templates = [_syllables(keyword, stretch, noise=0.003, seed=i) for i, stretch in enumerate((0.95, 1.0, 1.05))]
+        spotter = LocalKeywordSpotter(templates)
+        positives = [_syllables(keyword, stretch, seed=10 + i) for i, stretch in enumerate((0.85, 1.0, 1.15, 1.25))]
+        rng = np.random.default_rng(1)
+        negatives = [_syllables(other, stretch, seed=20 + i) for i, (other, stretch) in enumerate(
+            (other, stretch) for other in others for stretch in (0.9, 1.1)
+        )] * 10
+        negatives.append((0.01 * rng.standard_normal(60 * SAMPLE_RATE) * 32767).astype(np.int16))
+        print("Fixtures: synthetic (pass templates and WAV directories to use recordings)")
+    
+    frame = spotter.frame_length
+    
+    def detections(audio: np.ndarray) -> int:
+        hits = 0
+        for i in range(0, len(audio) - frame + 1, frame):
+            if spotter.process(audio[i:i + frame]) >= 0:
+                hits += 1
+        return hits
+    
+    def detection_rate() -> int:
+        detected = 0
+        for audio in positives:
+            spotter.reset()
+            detected += detections(audio) > 0
+        return detected
+    
+    negative_audio = np.concatenate(negatives) if negatives else np.zeros(0, dtype=np.int16)
+    hours = len(negative_audio) / SAMPLE_RATE / 3600
+    default = spotter.threshold
+    print(f"Negative audio:  {hours * 60:.1f} min")
+    print(f"{'Threshold':<12}{'Detected':<12}{'False accepts':<16}{'Per hour':<10}")
+    for threshold in sorted({default, *np.round(np.arange(0.19, 0.28, 0.01), 2)}):
+        spotter.threshold = threshold
+        detected = detection_rate()
+        spotter.reset()
+        if threshold == default:
+            started = time.process_time()
+        false_accepts = detections(negative_audio)
+        if threshold == default:
+            cpu = time.process_time() - started
+        marker = "  <- default" if threshold == default else ""
+        print(
+            f"{threshold:<12.2f}{f'{detected}/{len(positives)}':<12}{false_accepts:<16}"
+            f"{false_accepts / max(hours, 1e-9):<10.1f}{marker}"
+        )
+    spotter.threshold = default
+    
+    print(f"CPU:             {cpu / max(hours * 3600, 1e-9) * 1000:.2f} ms per second of audio")
+    print("")
+
+
+def bench_tool_prompt():
+    """
+    Prompt tokens and time to first token: JSON prompt vs native tool calling.
+    
+    Usage: benchmark.py tool_prompt [MODEL]
+    Needs a running Ollama server. The two setups alternate on every
+    utterance, so neither reuses the other's cached prompt and each request
+    evaluates its whole prompt, as the first request of a conversation does.
+    """
+    print("\n" + "=" * 60)
+    print("Benchmark: JSON prompt vs native tool calling")
+    print("=" * 60)
+    
+    import ollama
+    import yaml
+    from modules.tools import ToolExecutor
+    
+    root = Path(__file__).parent
+    with open(root / "config.yaml", 'r') as f:
+        model = sys.argv[2] if len(sys.argv) > 2 else yaml.safe_load(f)['ollama_model']
+    prompts = {
+        "json": (root / "prompts" / "system_prompt.txt").read_text(),
+        "tools": (root / "prompts" / "system_prompt_tools.txt").read_text(),
+    }
+    tools = ToolExecutor()
+    client = ollama.Client()
+    utterances = [
+        "What time is it?",
+        "Open Spotify",
+        "Play some relaxing music",
+        "Search the web for the weather in London",
+        "Refresh the page",
+        "How are you today?",
+        "Find my tax documents",
+        "Tell me a joke",
+    ]
+    
+    results = {mode: {"prompt_tokens": [], "ttft": [], "total": []} for mode in prompts}
+    print(f"Model: {model}")
+    print(f"{'Utterance':<44}{'JSON tool':<16}{'Native tool':<16}")
+    for text in utterances:
+        chosen = {}
+        for mode, system_prompt in prompts.items():
+            messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": text}]
+            if mode == "json":
+                output = {"format": tools.response_schema()}
+            else:
+                output = {"tools": tools.tools_for(text) or None}
+            
+            started = time.perf_counter()
+            first = None
+            content = ""
+            call = None
+            for chunk in client.chat(model=model, messages=messages, stream=True, options={"temperature": 0}, **output):
+                message = chunk['message']
+                if first is None and (message.get('content') or message.get('tool_calls')):
+                    first = time.perf_counter() - started
+                content += message.get('content') or ""
+                if message.get('tool_calls'):
+                    call = message['tool_calls'][0]['function']['name']
+                if chunk.get('done'):
+                    results[mode]["prompt_tokens"].append(chunk.get('prompt_eval_count') or 0)
+            results[mode]["ttft"].append(first or 0.0)
+            results[mode]["total"].append(time.perf_counter() - started)
+            
+            if mode == "json":
+                try:
+                    chosen[mode] = json.loads(content).get("tool", "none")
+                except (json.JSONDecodeError, AttributeError):
+                    chosen[mode] = "(bad JSON)"
+            else:
+                chosen[mode] = call or "none"
+        print(f"{text:<44}{chosen['json']:<16}{chosen['tools']:<16}")
+    
+    print("")
+    for mode, label in (("json", "JSON prompt"), ("tools", "Native tools")):
+        r = results[mode]
+        print(
+            f"{label:<14} prompt {sum(r['prompt_tokens']) / len(utterances):6.0f} tokens   "
+            f"first token {sum(r['ttft']) / len(utterances) * 1000:6.0f} ms   "
+            f"complete {sum(r['total']) / len(utterances) * 1000:6.0f} ms"
+        )
+    print("")
+
+
+def main():
+    """Run benchmarks."""
+    benchmarks = [
+        ("Audio Alloc", bench_audio_alloc),
+        ("Keyword Spotter", bench_keyword_spotter),
+        ("Tool Prompt", bench_tool_prompt),
+    ]
+    
+    if len(sys.argv) > 1:
+        # Run specific benchmark
+        name_filter = sys.argv[1].lower()
+        for name, bench_func in benchmarks:
+            if name_filter in name.lower().replace(" ", "_"):
+                bench_func()
+                return
+        print(f"Unknown benchmark: {sys.argv[1]}")
+        print(f"Available benchmarks: {', '.join([name for name, _ in benchmarks])}")
+    else:
+        for name, bench_func in benchmarks:
+            try:
+                bench_func()
+            except Exception as e:
+                print(f"\n✗ {name} failed: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,24 +3,43 @@
 JARVIS - Just A Rather Very Intelligent System
 A voice-activated AI assistant for Mac.
 """
+import asyncio
 import os
+import queue
+import re
 import sys
 import yaml
 import time
 import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # Add modules to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from modules.wake_word import WakeWordDetector
+from modules.keyword_spotter import LocalKeywordSpotter
 from modules.speech_to_text import SpeechToText
-from modules.llm_brain import LLMBrain
+from modules.vad import VADEndpointer
+from modules.session_recorder import ReplaySource, SessionRecorder
+from modules.audio_bus import AudioBus, LevelMeter
+from modules.barge_in import BargeInMonitor
+from modules.echo_gate import EchoGate
+from modules.llm_brain import ERROR_REPLY, LLMBrain
+from modules.llm_response import LLMResponse
+from modules.intent_router import IntentRouter
+from modules.response_cache import ResponseCache
+from modules.json_stream import StreamingJSONParser
 from modules.text_to_speech import TextToSpeech
 from modules.tools import ToolExecutor
 from modules.gui import JarvisGUI
 
 
+# End of a sentence that can be spoken before the rest of the response exists
+_SENTENCE_END = re.compile(r'[.!?]["\')\]]*(?=\s)')
+
+
 class Jarvis:
     """Main Jarvis assistant orchestrator."""
     
@@ -38,9 +57,10 @@ class Jarvis:
         # Load configuration
         self.config = self._load_config(config_path)
         
-        # Get Picovoice API key
+        # Get Picovoice API key (not needed for the local wake word engine)
+        self.wake_engine = self.config.get('wake_word_engine', 'porcupine')
         self.picovoice_key = os.environ.get("PICOVOICE_API_KEY", "")
-        if not self.picovoice_key:
+        if not self.picovoice_key and self.wake_engine == 'porcupine':
             print("\n⚠️  Warning: PICOVOICE_API_KEY not found in environment variables.")
             print("Wake word detection will not work without it.")
             print("\nTo get a free API key:")
@@ -48,10 +68,14 @@ class Jarvis:
             print("2. Sign up for a free account")
             print("3. Copy your access key")
             print("4. Export it: export PICOVOICE_API_KEY='your-key-here'")
+            print("\nOr use the offline engine: set wake_word_engine: \"local\" in config.yaml")
             print("\nFor now, you can test without wake word by calling process_command() directly.\n")
         
-        # Load system prompt
-        prompt_path = Path(__file__).parent / "prompts" / "system_prompt.txt"
+        # Load system prompt (native tool calling passes the tools separately,
+        # so its prompt leaves out the tool catalogue)
+        self.tool_calling = self.config.get('ollama', {}).get('tool_calling', False)
+        prompt_name = "system_prompt_tools.txt" if self.tool_calling else "system_prompt.txt"
+        prompt_path = Path(__file__).parent / "prompts" / prompt_name
         with open(prompt_path, 'r') as f:
             system_prompt = f.read()
         
@@ -62,23 +86,52 @@ class Jarvis:
             voice=self.config['voice'],
             rate=self.config.get('speech_rate', 200)
         )
+        self.tts.on_speech_start = self._on_speech_start
         print("✓ Text-to-Speech ready")
         
-        self.stt = SpeechToText(
-            model_size=self.config['whisper_model']
-        )
-        print("✓ Speech-to-Text ready")
+        # Echo suppression: capture ignores audio recorded while we speak
+        self.echo_config = self.config.get('echo_gate', {})
         
-        self.brain = LLMBrain(
-            model=self.config['ollama_model'],
-            system_prompt=system_prompt,
-            max_history=self.config['conversation']['max_history']
-        )
-        print("✓ LLM Brain ready")
+        # Debug capture: record raw microphone audio, or replay a recording
+        self.recorders: Dict[str, SessionRecorder] = {}
+        
+        # Shared microphone: one stream feeds wake word detection and STT
+        self.audio_bus: Optional[AudioBus] = None
+        self.level_meter: Optional[LevelMeter] = None
+        if self.config['audio'].get('shared_bus', False):
+            audio_backend, recorder = self._create_audio_io("mic")
+            self.audio_bus = AudioBus(sample_rate=16000, audio_backend=audio_backend, recorder=recorder)
+            self.level_meter = LevelMeter(self.audio_bus)
+            self.audio_bus.start()
         
+        # Tools run on their own thread, so a streamed reply can start its tool
+        # call while the model is still generating
         self.tools = ToolExecutor()
+        self._tool_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis-tools")
         print("✓ Tool Executor ready")
         
+        # LLM requests run on their own event loop, so a stalled Ollama call
+        # can time out or be cancelled (barge-in, GUI close) while it waits
+        self._llm_loop = asyncio.new_event_loop()
+        threading.Thread(target=self._llm_loop.run_forever, name="jarvis-llm", daemon=True).start()
+        
+        # Whisper and Ollama are slow to load - bring them up in the background
+        # so the wake word listener starts immediately. Each is warmed up with
+        # one throwaway inference, and callers block only on the one they use.
+        self._loader = ThreadPoolExecutor(max_workers=2, thread_name_prefix="jarvis-init")
+        self._stt_future: Future = self._loader.submit(self._load_stt)
+        self._brain_future: Future = self._loader.submit(self._load_brain, system_prompt)
+        
+        # Common commands are answered locally; the rest goes to the LLM
+        self.router: Optional[IntentRouter] = None
+        router_config = self.config.get('intent_router', {})
+        if router_config.get('enabled', False):
+            self.router = IntentRouter(
+                threshold=router_config.get('threshold', 0.8),
+                margin=router_config.get('margin', 0.1)
+            )
+            print("✓ Intent router ready")
+        
         # GUI
         gui_config = self.config['gui']
         self.gui = JarvisGUI(
@@ -94,25 +147,203 @@ class Jarvis:
         
         # Wake word detector (optional)
         self.wake_detector = None
-        if self.picovoice_key:
+        if self.picovoice_key or self.wake_engine == 'local':
             try:
+                audio_backend, recorder = self._create_audio_io("wake")
                 self.wake_detector = WakeWordDetector(
                     access_key=self.picovoice_key,
                     keyword=self.config['wake_word'],
-                    sensitivity=0.5
+                    sensitivity=0.5,
+                    audio_backend=audio_backend,
+                    recorder=recorder,
+                    bus=self.audio_bus,
+                    engine=self._create_local_wake_engine() if self.wake_engine == 'local' else None
                 )
                 print("✓ Wake Word Detector ready")
             except Exception as e:
                 print(f"✗ Wake Word Detector failed: {e}")
         
+        # Barge-in: speaking over Jarvis stops playback and generation
+        self.barge_in: Optional[BargeInMonitor] = None
+        barge_in_config = self.config.get('barge_in', {})
+        if barge_in_config.get('enabled', False):
+            audio_backend, recorder = self._create_audio_io("barge_in")
+            self.barge_in = BargeInMonitor(
+                sample_rate=16000,
+                min_speech=barge_in_config.get('min_speech', 0.25),
+                energy_ratio=barge_in_config.get('energy_ratio', 4.0),
+                audio_backend=audio_backend,
+                recorder=recorder,
+                bus=self.audio_bus,
+                echo_gate=self._create_echo_gate(
+                    double_talk_ratio=self.echo_config.get('double_talk_ratio', 2.5)
+                )
+            )
+            print("✓ Barge-in monitor ready")
+        
         # State
         self.is_active = False
+        self._activation = threading.Event()
+        self._cancelled = threading.Event()  # Set when the GUI closes mid-response
+        self._wake_time: Optional[float] = None
         self.gui_thread = None
         self.timeout_timer = None
         
-        print("\n✓ All systems operational!")
+        # Latency metrics (seconds)
+        self.metrics: Dict[str, List[float]] = {
+            "wake_to_first_audio": [],
+            "barge_in_latency": [],
+            "llm_latency": [],  # Full generation time of each LLM reply
+        }
+        
+        print("\n✓ Core systems operational! (Whisper and Ollama warming up in background)")
         print("=" * 60)
     
+    @property
+    def stt(self) -> SpeechToText:
+        """Speech-to-text (waits for background loading on first use)."""
+        return self._stt_future.result()
+    
+    @property
+    def brain(self) -> LLMBrain:
+        """LLM brain (waits for background loading on first use)."""
+        return self._brain_future.result()
+    
+    @staticmethod
+    def _loaded(future: Future) -> bool:
+        """True if a background-loaded component is ready (never blocks or raises)."""
+        return future.done() and not future.cancelled() and future.exception() is None
+    
+    def _load_stt(self) -> SpeechToText:
+        """Load and warm up the Whisper model (runs in the loader pool)."""
+        try:
+            gate_config = self.config['audio'].get('speech_gate', {})
+            cascade_config = self.config.get('whisper_cascade', {})
+            audio_backend, recorder = self._create_audio_io("stt")
+            stt = SpeechToText(
+                model_size=self.config['whisper_model'],
+                endpointer=self._create_endpointer(),
+                speech_gate=gate_config.get('enabled', True),
+                gate_min_speech=gate_config.get('min_speech', 0.2),
+                gate_min_ratio=gate_config.get('min_ratio', 0.02),
+                cascade_model_size=cascade_config.get('fast_model') if cascade_config.get('enabled') else None,
+                cascade_min_logprob=cascade_config.get('min_avg_logprob', -0.5),
+                cascade_max_no_speech=cascade_config.get('max_no_speech_prob', 0.4),
+                speculative_silence=self.config['audio'].get('speculative_silence'),
+                audio_backend=audio_backend,
+                recorder=recorder,
+                bus=self.audio_bus,
+                echo_gate=self._create_echo_gate()
+            )
+            if self.config.get('startup', {}).get('warmup', True):
+                stt.warmup()
+            print("✓ Speech-to-Text ready")
+            return stt
+        except Exception as e:
+            print(f"✗ Speech-to-Text failed: {e}")
+            raise
+    
+    def _load_brain(self, system_prompt: str) -> LLMBrain:
+        """Connect to Ollama and warm up the model (runs in the loader pool)."""
+        try:
+            ollama_config = self.config.get('ollama', {})
+            brain = LLMBrain(
+                model=self.config['ollama_model'],
+                system_prompt=system_prompt,
+                max_history=self.config['conversation']['max_history'],
+                evict_turns=self.config['conversation'].get('evict_turns'),
+                history_tokens=self.config['conversation'].get('history_tokens'),
+                summary_idle=self.config['conversation'].get('summary_idle', 2.0),
+                host=ollama_config.get('host') or None,
+                keep_alive=ollama_config.get('keep_alive', '30m'),
+                timeout=ollama_config.get('timeout', 120),
+                deadline=ollama_config.get('deadline') or None,
+                fallback_model=ollama_config.get('fallback_model') or None,
+                response_cache=self._create_response_cache(),
+                tool_selector=self._select_tools if self.tool_calling else None,
+                response_schema=self.tools.response_schema()
+            )
+            if self.config.get('startup', {}).get('warmup', True):
+                brain.warmup()
+            print("✓ LLM Brain ready")
+            return brain
+        except Exception as e:
+            print(f"✗ LLM Brain failed: {e}")
+            raise
+    
+    def _select_tools(self, user_text: str) -> List[Dict]:
+        """Function schemas of the tools an utterance may need (native tool calling)."""
+        max_tools = self.config.get('ollama', {}).get('max_tools', 3)
+        return self.tools.tools_for(user_text, max_tools)
+    
+    def _create_response_cache(self) -> Optional[ResponseCache]:
+        """Persistent cache of the LLM's tool calls, if enabled."""
+        cache_config = self.config.get('response_cache', {})
+        if not cache_config.get('enabled', False):
+            return None
+        ttl_hours = cache_config.get('ttl_hours', 168)
+        cache = ResponseCache(
+            path=cache_config.get('path') or None,
+            max_entries=cache_config.get('max_entries', 256),
+            ttl=ttl_hours * 3600 if ttl_hours else None,
+            similarity=cache_config.get('similarity', 0.95)
+        )
+        print(f"✓ Response cache ready ({len(cache)} saved entries)")
+        return cache
+    
+    def _create_echo_gate(self, double_talk_ratio: Optional[float] = None) -> Optional[EchoGate]:
+        """Build an echo gate over the TTS playback spans (None if disabled)."""
+        if not self.echo_config.get('enabled', False):
+            return None
+        return EchoGate(self.tts, tail=self.echo_config.get('tail', 0.3), double_talk_ratio=double_talk_ratio)
+    
+    def _create_local_wake_engine(self) -> LocalKeywordSpotter:
+        """Load the offline keyword spotter from the enrolled templates."""
+        local_config = self.config.get('local_wake_word', {})
+        templates = local_config.get('templates', 'models/jarvis_templates.npz')
+        if not Path(templates).exists():
+            raise FileNotFoundError(
+                f"No wake word templates at {templates}. "
+                f"Record some with: python -m modules.keyword_spotter enroll {templates}"
+            )
+        return LocalKeywordSpotter.from_file(templates, threshold=local_config.get('threshold', 0.23))
+    
+    def _create_audio_io(self, name: str) -> Tuple[Optional[ReplaySource], Optional[SessionRecorder]]:
+        """
+        Build the audio backend and recorder for one capture component.
+        
+        Args:
+            name: Component name ("stt", "wake", "barge_in" or "mic" for the shared bus),
+                used as the recording file name
+        
+        Returns:
+            (ReplaySource or None for the microphone, SessionRecorder or None)
+        """
+        debug_config = self.config.get('debug', {})
+        
+        # With a shared bus the bus owns capture; components only add markers
+        if name != "mic" and self.audio_bus is not None:
+            return None, self.recorders.get("mic")
+        
+        replay_dir = debug_config.get('replay')
+        if replay_dir:
+            path = Path(replay_dir) / f"{name}.rec"
+            if path.exists():
+                print(f"▶️  Replaying {path} for {name}")
+                return ReplaySource.from_recording(str(path), speed=debug_config.get('replay_speed', 1.0)), None
+            print(f"⚠️  No recording at {path}, using the microphone for {name}")
+        
+        if not debug_config.get('record_sessions', False):
+            return None, None
+        recordings_dir = Path(debug_config.get('recordings_dir', 'recordings'))
+        recordings_dir.mkdir(parents=True, exist_ok=True)
+        recorder = SessionRecorder(
+            str(recordings_dir / f"{name}.rec"),
+            max_bytes=int(debug_config.get('max_recording_mb', 100) * 1024 * 1024)
+        )
+        self.recorders[name] = recorder
+        return None, recorder
+    
     def _load_config(self, config_path: str) -> dict:
         """Load configuration from YAML file."""
         try:
@@ -123,6 +354,22 @@ class Jarvis:
             print("Using default configuration.")
             return self._default_config()
     
+    def _create_endpointer(self) -> Optional[VADEndpointer]:
+        """Build the configured end-of-utterance detector (None = fixed RMS threshold)."""
+        audio_config = self.config['audio']
+        if audio_config.get('endpointer', 'rms') != 'vad':
+            return None
+        
+        vad_config = audio_config.get('vad', {})
+        return VADEndpointer(
+            sample_rate=audio_config.get('sample_rate', 16000),
+            frame_ms=vad_config.get('frame_ms', 20),
+            silence_duration=vad_config.get('silence_duration', 0.5),
+            min_speech=vad_config.get('min_speech', 0.15),
+            min_duration=audio_config.get('min_duration', 0.0),
+            energy_ratio=vad_config.get('energy_ratio', 3.0)
+        )
+    
     def _default_config(self) -> dict:
         """Return default configuration."""
         return {
@@ -170,14 +417,16 @@ class Jarvis:
         try:
             # Keep main thread alive and available for GUI
             while True:
-                time.sleep(0.1)
+                # Woken immediately by the wake word instead of polling
+                self._activation.wait(timeout=0.5)
+                self._activation.clear()
                 # If GUI needs to be shown, show it on main thread
                 if self.is_active and not self.gui.is_visible:
                     self.gui.set_close_callback(self.on_gui_close)
                     conversation_thread = threading.Thread(target=self.conversation_loop, daemon=True)
                     conversation_thread.start()
                     self.gui.show()  # Blocks until GUI closed
-                    
+        
         except KeyboardInterrupt:
             print("\n\nShutting down JARVIS...")
             self.shutdown()
@@ -187,25 +436,70 @@ class Jarvis:
         if self.is_active:
             return  # Already active
         
+        # Activate first - the acknowledgment sound blocks for its full length
+        self._wake_time = time.perf_counter()
+        self.is_active = True
+        self._activation.set()  # Main thread loop will pick this up and show GUI
+        
         print("\n>>> Wake word detected! <<<")
         
-        # Play immediate acknowledgment sound
-        self.tts.play_sound_effect("ready")
+        # Reload the model if it was evicted while idle, overlapping the
+        # chime and the command (still loading at startup: already warming up)
+        if self._loaded(self._brain_future):
+            self.brain.prewarm()
         
-        self.is_active = True
-        # Main thread loop will pick this up and show GUI
+        # In one-shot mode the chime only plays if the user pauses (see conversation_loop)
+        if not self.config['conversation'].get('one_shot', False):
+            self.tts.play_sound_effect("ready")
     
     
-    def conversation_loop(self) -> None:
-        """Main conversation loop."""
-        # Wait for GUI to be ready
-        print("Conversation loop started, waiting for GUI...")
-        while not self.gui.is_visible and self.is_active:
-            time.sleep(0.1)
+    def _strip_wake_word(self, text: str) -> str:
+        """Remove a leading wake word ("Hey Jarvis, ...") from a transcript."""
+        keyword = re.escape(self.config['wake_word'])
+        pattern = rf"^\W*(?:(?:hey|hi|ok|okay)\W+)?{keyword}\b\W*"
+        return re.sub(pattern, "", text, flags=re.IGNORECASE).strip()
+    
+    def _listen_after_wake_word(self) -> str:
+        """
+        Transcribe the wake word pre-roll plus anything still being said.
         
-        print("GUI visible, starting conversation...")
+        The detector's lookback audio (from the keyword onward) becomes the
+        start of the first utterance, so a command spoken in the same breath
+        as the wake word needs no second capture.
         
-        # Play activation sound and greeting
+        Returns:
+            The command without the wake word, or "" if there was none
+        """
+        preroll = self.wake_detector.take_post_wake_audio() if self.wake_detector else None
+        if preroll is None or len(preroll) == 0:
+            return ""
+        
+        audio_config = self.config['audio']
+        text = self.stt.listen(
+            duration=audio_config['duration'],
+            silence_threshold=audio_config['silence_threshold'],
+            silence_duration=audio_config['silence_duration'],
+            min_duration=0.0,  # The pre-roll already covers the keyword
+            preroll=preroll,
+            onset_timeout=self.config['conversation'].get('onset_timeout'),
+            keyword_seconds=self.wake_detector.keyword_seconds
+        )
+        command = self._strip_wake_word(text)
+        if command:
+            print(f"📝 Command after wake word: '{command}'")
+        return command
+    
+    def _on_speech_start(self, text: str) -> None:
+        """Record wake word -> first spoken response latency (called by TTS)."""
+        if self._wake_time is None:
+            return
+        latency = time.perf_counter() - self._wake_time
+        self._wake_time = None
+        self.metrics["wake_to_first_audio"].append(latency)
+        print(f"⏱  Wake word → first response audio: {latency:.2f}s")
+    
+    def _greet(self) -> None:
+        """Activation chime and spoken greeting."""
         self.tts.play_sound_effect("activate")
         time.sleep(0.3)
         
@@ -224,20 +518,60 @@ class Jarvis:
         self.gui.add_text(greeting, "JARVIS: ")
         self.tts.speak(greeting, blocking=True)
         time.sleep(0.5)
+    
+    def conversation_loop(self) -> None:
+        """Main conversation loop."""
+        print("Conversation loop started...")
+        
+        audio_config = self.config['audio']
+        if audio_config.get('persistent_stream', False):
+            self.stt.start_stream(max_duration=audio_config['duration'])
+        if self.barge_in:
+            self.barge_in.start()
+        
+        # Whatever followed the wake word ("Jarvis, pause the music") is the
+        # first command - captured while the GUI is still coming up
+        pending_command = self._listen_after_wake_word()
+        
+        # Wait for GUI to be ready
+        while not self.gui.is_visible and self.is_active:
+            time.sleep(0.05)
+        
+        print("GUI visible, starting conversation...")
+        
+        # One-shot: answer straight away; greet only if the user paused after the wake word
+        if not (pending_command and self.config['conversation'].get('one_shot', False)):
+            self._greet()
         
         # Set to listening mode
         self.gui.set_status("LISTENING")
         
         while self.is_active and self.gui.is_visible:
             try:
+                # Words that interrupted the last response start this utterance
+                preroll = self.barge_in.take_audio() if self.barge_in else None
+                
                 # Continuously listen for user input
-                audio_config = self.config['audio']
-                user_text = self.stt.listen(
-                    duration=audio_config['duration'],
-                    silence_threshold=audio_config['silence_threshold'],
-                    silence_duration=audio_config['silence_duration'],
-                    min_duration=audio_config.get('min_duration', 1.0)
-                )
+                if pending_command:
+                    user_text, pending_command = pending_command, ""
+                elif audio_config.get('streaming_transcription', False):
+                    user_text = self.stt.listen_streaming(
+                        duration=audio_config['duration'],
+                        silence_threshold=audio_config['silence_threshold'],
+                        silence_duration=audio_config['silence_duration'],
+                        min_duration=audio_config.get('min_duration', 1.0),
+                        on_partial=self._on_partial_transcript,
+                        partial_interval=audio_config.get('partial_interval', 0.5),
+                        preroll=preroll
+                    )
+                else:
+                    user_text = self.stt.listen(
+                        duration=audio_config['duration'],
+                        silence_threshold=audio_config['silence_threshold'],
+                        silence_duration=audio_config['silence_duration'],
+                        min_duration=audio_config.get('min_duration', 1.0),
+                        preroll=preroll
+                    )
                 
                 # Skip if no speech detected
                 if not user_text or len(user_text.strip()) < 2:
@@ -295,7 +629,7 @@ class Jarvis:
                 
                 # Always return to listening mode
                 self.gui.set_status("LISTENING")
-                
+            
             except Exception as e:
                 print(f"❌ Error in conversation loop: {e}")
                 import traceback
@@ -305,6 +639,10 @@ class Jarvis:
                 # Always return to listening - don't break the loop!
                 self.gui.set_status("LISTENING")
     
+    def _on_partial_transcript(self, text: str) -> None:
+        """Show partial transcription (called from the STT decoder thread)."""
+        print(f"… {text}")
+    
     def process_command(self, user_text: str) -> None:
         """
         Process a user command.
@@ -312,58 +650,106 @@ class Jarvis:
         Args:
             user_text: User's text input
         """
-        # Get LLM response
-        self.gui.set_status("THINKING")
-        llm_response = self.brain.process(user_text)
+        self._cancelled.clear()
+        # From here until the answer has been spoken, speaking interrupts
+        if self.barge_in:
+            self.barge_in.arm(self._on_barge_in)
+        try:
+            routed = self.router.route(user_text) if self.router else None
+            if routed is not None:
+                self._respond(user_text, routed)
+            elif self.config['conversation'].get('stream_responses', False):
+                self._respond_streaming(user_text)
+            else:
+                self._respond(user_text)
+        finally:
+            if self.barge_in:
+                self.barge_in.disarm()
+    
+    def _interrupted(self) -> bool:
+        """True if the user barged in on the current response or closed the GUI."""
+        if self._cancelled.is_set():
+            return True
+        return self.barge_in is not None and self.barge_in.triggered
+    
+    def _on_barge_in(self, onset_time: float) -> None:
+        """
+        Stop everything the current response is doing (called by the barge-in monitor).
+        
+        Args:
+            onset_time: perf_counter() time the user started speaking
+        """
+        self.tts.stop()
+        latency = time.perf_counter() - onset_time
+        self.gui.abort_typing()
+        if self._loaded(self._brain_future):
+            self.brain.cancel()
+        
+        self.metrics["barge_in_latency"].append(latency)
+        print(f"⏱  Speech onset → playback stopped: {latency * 1000:.0f} ms")
+        self.gui.set_status("LISTENING")
+    
+    def _respond(self, user_text: str, reply: Optional[LLMResponse] = None) -> None:
+        """
+        Generate, run and speak the response to one command.
+        
+        Args:
+            user_text: User's text input
+            reply: Response already chosen by the intent router (skips the LLM)
+        """
+        if reply is None:
+            # Get LLM response
+            self.gui.set_status("THINKING")
+            started = time.perf_counter()
+            reply = self._llm_reply(user_text)
+            if reply is None or self._interrupted():
+                return  # Generation was cancelled; the new speech is the next command
+            if not self.brain.last_cached:
+                self.metrics["llm_latency"].append(time.perf_counter() - started)
+            label = "LLM Response"
+        else:
+            if self._loaded(self._brain_future):
+                self.brain.remember(user_text, reply)
+            label = "Routed locally"
         
         print(f"\n{'='*60}")
-        print(f"LLM Response: {llm_response}")
+        print(f"{label}: {reply.to_json()}")
         print(f"{'='*60}\n")
         
-        # Execute tools
-        success, result = self.tools.execute(llm_response)
+        # Execute tools (unless the GUI was closed while the reply was chosen)
+        if self._cancelled.is_set():
+            return
+        success, result = self.tools.execute(reply)
         print(f"Tool execution success: {success}")
         print(f"Tool result: {result}")
         
         # Speak response
         self.gui.set_status("SPEAKING")
-        
-        # Extract clean response text from LLM JSON
-        response_text = "Task completed, sir."
-        try:
-            import json
-            llm_data = json.loads(llm_response)
-            response_text = llm_data.get('response', 'Task completed, sir.')
-            print(f"Extracted response: {response_text}")
-        except Exception as e:
-            print(f"JSON parse error: {e}")
-            # If LLM didn't return JSON, use the result
-            if result and not result.startswith('Unknown'):
-                response_text = result
-        
-        # Clean up any remaining JSON artifacts
-        if response_text.startswith('{'):
-            response_text = "Task completed, sir."
-        
-        response_text = response_text.strip()
+        response_text = reply.response.strip() or "Task completed, sir."
         
         # Get first line for speaking, full text for display
         speak_text = response_text.split('\n')[0] if '\n' in response_text else response_text
         
         # Add tool execution result details if any
-        if result and not result.startswith('{') and result != response_text:
+        if result and result != response_text:
             details_text = result
         else:
             details_text = ""
         
+        if self._interrupted():
+            return
+        
         # Start speaking immediately (non-blocking)
         speech_thread = self.tts.speak_async(speak_text)
         
         # Type text while speaking
-        self.gui.type_text(speak_text, "JARVIS: ")
+        if not self._interrupted():
+            self.gui.type_text(speak_text, "JARVIS: ")
         
-        # Wait for speech to complete
+        # Wait for speech to complete (barge-in stops it early)
         speech_thread.join()
+        if self._interrupted():
+            return
         
         # Show additional details if any (like search results, error messages)
         if details_text:
@@ -371,6 +757,172 @@ class Jarvis:
         
         # Don't set status here - let the conversation loop manage it
     
+    def _llm_reply(self, user_text: str) -> Optional[LLMResponse]:
+        """
+        Ask the LLM for a reply on the LLM event loop, waiting for it.
+        
+        Returns:
+            The reply, or None if the request was cancelled
+        """
+        future = asyncio.run_coroutine_threadsafe(self.brain.aprocess(user_text), self._llm_loop)
+        try:
+            return future.result()
+        except CancelledError:
+            return None
+    
+    def _llm_tokens(self, user_text: str) -> Iterator[str]:
+        """
+        Stream the LLM's reply from the LLM event loop into this thread.
+        
+        Ends early if the request is cancelled; stopping iteration cancels it.
+        """
+        tokens: "queue.Queue[Optional[str]]" = queue.Queue()
+        
+        async def pump() -> None:
+            try:
+                async for token in self.brain.aprocess_stream(user_text):
+                    tokens.put(token)
+            finally:
+                tokens.put(None)
+        
+        future = asyncio.run_coroutine_threadsafe(pump(), self._llm_loop)
+        try:
+            while True:
+                token = tokens.get()
+                if token is None:
+                    break
+                yield token
+        finally:
+            future.cancel()
+    
+    def _queue_speech(self, text: str, spoken: int, speech: "queue.Queue[Optional[str]]", final: bool) -> int:
+        """
+        Hand the newly completed sentences of a growing response to the speaker.
+        
+        Only the first line is spoken (the rest is shown), as in _respond().
+        
+        Args:
+            text: Response text so far
+            spoken: Characters of `text` already queued
+            speech: Queue read by _speak_queued()
+            final: The text is complete - queue whatever is left
+        
+        Returns:
+            Characters of `text` queued after this call
+        """
+        line_end = text.find('\n')
+        limit = len(text) if line_end < 0 else line_end
+        if final or line_end >= 0:
+            cut = limit
+        else:
+            ends = [m.end() for m in _SENTENCE_END.finditer(text, spoken, limit)]
+            if not ends:
+                return spoken
+            cut = ends[-1]
+        
+        sentence = text[spoken:cut].strip()
+        if sentence:
+            self.gui.set_status("SPEAKING")
+            speech.put(sentence)
+        return max(cut, spoken)
+    
+    def _speak_queued(self, speech: "queue.Queue[Optional[str]]") -> None:
+        """Speak queued sentences back to back until None arrives (speaker thread)."""
+        while True:
+            sentence = speech.get()
+            if sentence is None:
+                return
+            if not self._interrupted():
+                self.tts.speak(sentence, blocking=True)
+    
+    def _respond_streaming(self, user_text: str) -> None:
+        """
+        Like _respond(), but act on the response while it is being generated.
+        
+        The tool is dispatched as soon as its parameters are known, and each
+        sentence of "response" is spoken as soon as it is complete, so the
+        first words play while the model is still writing the rest.
+        """
+        self.gui.set_status("THINKING")
+        parser = StreamingJSONParser()
+        speech: "queue.Queue[Optional[str]]" = queue.Queue()
+        speaker = threading.Thread(target=self._speak_queued, args=(speech,), daemon=True)
+        speaker.start()
+        tool_future: Optional[Future] = None
+        spoken = 0
+        started = time.perf_counter()
+        
+        try:
+            for token in self._llm_tokens(user_text):
+                if self._interrupted():
+                    return
+                parser.feed(token)
+                
+                # The prompt's format puts parameters before "response", so
+                # the tool call is complete once "response" begins
+                if (
+                    tool_future is None
+                    and parser.fields.get('tool', 'none') != 'none'
+                    and (parser.current_key == 'response' or parser.done)
+                ):
+                    call = self.brain.tool_call(parser.fields)
+                    if call is not None:  # An invalid call is apologised for at the end instead
+                        tool_future = self._tool_runner.submit(self.tools.execute, call)
+                
+                response = parser.get('response')
+                if response:
+                    spoken = self._queue_speech(response, spoken, speech, final=False)
+            
+            if self._interrupted():
+                return
+            if not self.brain.last_cached:
+                self.metrics["llm_latency"].append(time.perf_counter() - started)
+            
+            print(f"\n{'='*60}")
+            print(f"LLM Response: {parser.text}")
+            print(f"{'='*60}\n")
+            
+            # The parser already holds the decoded fields, so they are only
+            # checked; a stream that ended early (an Ollama error) or a reply
+            # that fails the check is apologised for instead
+            reply = self.brain.parse_reply(parser.text, parser.fields if parser.done else None)
+            if reply.response == ERROR_REPLY:
+                spoken = 0
+            
+            # Tool result (runs now if the stream never reached the point of dispatch)
+            if self._cancelled.is_set():
+                return
+            if tool_future is not None:
+                success, result = tool_future.result()
+            else:
+                success, result = self.tools.execute(reply)
+            print(f"Tool execution success: {success}")
+            print(f"Tool result: {result}")
+            
+            response_text = reply.response
+            if response_text.strip():
+                self._queue_speech(response_text, spoken, speech, final=True)
+                response_text = response_text.strip()
+            else:
+                response_text = "Task completed, sir."
+                self._queue_speech(response_text, 0, speech, final=True)
+            
+            speak_text = response_text.split('\n')[0]
+            
+            # Type text while the rest is spoken
+            if not self._interrupted():
+                self.gui.type_text(speak_text, "JARVIS: ")
+        finally:
+            speech.put(None)
+            speaker.join()
+        
+        if self._interrupted():
+            return
+        
+        # Show additional details if any (like search results, error messages)
+        if result and result != response_text:
+            self.gui.add_text(result, "")
+    
     def _start_timeout(self) -> None:
         """Start inactivity timeout."""
         self._cancel_timeout()
@@ -395,18 +947,118 @@ class Jarvis:
     def on_gui_close(self) -> None:
         """Handle GUI close event."""
         self.is_active = False
+        self._cancelled.set()  # Checked before anything else is run or spoken
         self._cancel_timeout()
-        self.brain.reset_conversation()
+        # A component still loading (or that failed to load) has nothing to stop or report
+        if self._loaded(self._stt_future):
+            self.stt.stop_stream()
+        if self._loaded(self._brain_future):
+            self.brain.cancel()  # Nobody is left to hear a reply still being generated
+            
+            llm_stats = self.brain.get_stats()
+            if llm_stats['requests']:
+                print(
+                    f"LLM: {llm_stats['prompt_eval_count']} prompt tokens evaluated over {llm_stats['requests']} requests "
+                    f"({llm_stats['prompt_eval_seconds']:.1f}s), ~{llm_stats['cache_hit_rate']:.0%} of prompts served from cache, "
+                    f"{llm_stats['evictions']} history evictions, {llm_stats['compactions']} summaries"
+                )
+            if llm_stats['deadline_misses'] or llm_stats['stalls']:
+                print(
+                    f"LLM deadline: {llm_stats['deadline_misses']} missed, {llm_stats['fallbacks']} answered by the fallback model, "
+                    f"{llm_stats['stalls']} replies cut short by a stall"
+                )
+            cache_stats = llm_stats.get('response_cache')
+            if cache_stats:
+                print(
+                    f"Response cache: {cache_stats['hits']} exact + {cache_stats['similar_hits']} similar hits, "
+                    f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%}), "
+                    f"{cache_stats['entries']} entries, {cache_stats['evicted']} evicted, {cache_stats['expired']} expired"
+                )
+            self.brain.reset_conversation()
+        if self.router:
+            router_stats = self.router.get_stats()
+            routed = router_stats['routed']
+            llm_latencies = self.metrics["llm_latency"]
+            if routed and llm_latencies:
+                # Each routed command would otherwise have cost an average LLM reply
+                average_llm = sum(llm_latencies) / len(llm_latencies)
+                saved = f", ~{routed * average_llm - router_stats['seconds']:.1f}s of LLM time saved"
+            else:
+                saved = ""
+            print(
+                f"Intent router: {routed:.0f}/{routed + router_stats['to_llm']:.0f} commands handled locally "
+                f"({router_stats['hit_rate']:.0%}, {router_stats['average_seconds'] * 1000:.2f} ms each){saved}"
+            )
+        
+        if self._loaded(self._stt_future):
+            stats = self.stt.get_stats()
+            print(
+                f"STT: {stats['decoded']} decoded, {stats['skipped_no_speech']} skipped (no speech), "
+                f"{stats['hallucinations_dropped']} hallucinations dropped"
+            )
+            if stats['speculative_hits'] or stats['speculative_discarded']:
+                print(
+                    f"STT speculation: {stats['speculative_hits']} reused, "
+                    f"{stats['speculative_discarded']} discarded"
+                )
+            if 'escalation_rate' in stats:
+                print(f"STT cascade: {stats['escalation_rate']:.0%} of utterances escalated to the main model")
+            if 'echo_gated_seconds' in stats:
+                print(f"Echo gate: {stats['echo_gated_seconds']:.1f}s of our own speech kept out of STT")
+        latencies = self.metrics["wake_to_first_audio"]
+        if latencies:
+            print(
+                f"Wake word → first response audio: last {latencies[-1]:.2f}s, "
+                f"average {sum(latencies) / len(latencies):.2f}s over {len(latencies)} activations"
+            )
+        if self.barge_in:
+            self.barge_in.stop()
+            interruptions = self.metrics["barge_in_latency"]
+            if interruptions:
+                print(
+                    f"Barge-in: {len(interruptions)} interruptions, speech onset → playback stopped "
+                    f"average {sum(interruptions) / len(interruptions) * 1000:.0f} ms"
+                )
+            if self.barge_in.echo_gate:
+                gate_stats = self.barge_in.echo_gate.get_stats()
+                print(
+                    f"Barge-in echo gate: {gate_stats['gated_blocks']} echo frames ignored, "
+                    f"{gate_stats['double_talk_blocks']} passed as talking over playback"
+                )
+        if self.audio_bus:
+            bus_stats = self.audio_bus.get_stats()
+            dropped = ", ".join(f"{name} {s['dropped']}" for name, s in bus_stats['subscribers'].items())
+            print(
+                f"Audio bus: {bus_stats['overflows']} device overflows, dropped frames: {dropped}; "
+                f"recent input peak {self.level_meter.peak_db:.0f} dBFS"
+            )
         print("Session ended. Listening for wake word...\n")
     
     def shutdown(self) -> None:
         """Shutdown Jarvis."""
         self.is_active = False
+        self._cancelled.set()
         self._cancel_timeout()
+        self._loader.shutdown(wait=False)
+        self._tool_runner.shutdown(wait=False)
+        if self._loaded(self._brain_future):
+            self.brain.cancel()
+        self._llm_loop.call_soon_threadsafe(self._llm_loop.stop)
+        if self._loaded(self._stt_future):
+            self.stt.stop_stream()
         
         if self.wake_detector:
             self.wake_detector.stop()
         
+        if self.barge_in:
+            self.barge_in.stop()
+        
+        if self.audio_bus:
+            self.audio_bus.stop()
+        
+        for recorder in self.recorders.values():
+            recorder.close()
+        
         if self.gui.is_visible:
             self.gui.hide()
         
@@ -0,0 +1,121 @@
+"""
+Audio Buffer Module
+Preallocated int16 audio storage shared between the audio callback and its readers.
+
+Audio stays int16 from capture until the model boundary; readers get views
+or copies into buffers they own, and to_float32() is the single conversion
+into the float range the VAD and Whisper expect.
+"""
+import threading
+import numpy as np
+from typing import Optional
+
+INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def to_float32(samples: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    Convert audio to float32 in [-1, 1] without allocating.
+    
+    Args:
+        samples: 1-D int16 or float audio
+        out: float32 destination with room for len(samples) values
+    
+    Returns:
+        View of `out` holding the converted samples
+    """
+    out = out[:len(samples)]
+    out[:] = samples  # Casting copy, no intermediate buffers
+    if samples.dtype == np.int16:
+        out *= INT16_SCALE
+    return out
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size circular buffer of mono samples.
+    
+    The audio callback calls write() with each block; readers address samples
+    by absolute position (total samples written since creation), so a reader
+    can remember where an utterance started and copy it out later without
+    the writer ever reallocating.
+    """
+    
+    def __init__(self, capacity: int, dtype: str = 'int16'):
+        """
+        Initialize ring buffer.
+        
+        Args:
+            capacity: Number of samples kept before the oldest are overwritten
+            dtype: Sample type of the stored audio
+        """
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=dtype)
+        self.write_pos = 0  # Absolute position of the next sample to be written
+        self._cond = threading.Condition()
+    
+    def write(self, samples: np.ndarray) -> None:
+        """
+        Append samples (called from the audio callback).
+        
+        Args:
+            samples: 1-D block of samples
+        """
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            skipped = n - self.capacity
+            n = self.capacity
+        else:
+            skipped = 0
+        
+        start = (self.write_pos + skipped) % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        if first < n:
+            self.buffer[:n - first] = samples[first:]
+        
+        with self._cond:
+            self.write_pos += skipped + n
+            self._cond.notify_all()
+    
+    def wait_for(self, position: int, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the writer has passed the given absolute position.
+        
+        Args:
+            position: Absolute sample position to wait for
+            timeout: Maximum seconds to wait
+        
+        Returns:
+            True if the position is available, False on timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self.write_pos >= position, timeout)
+    
+    def oldest_position(self) -> int:
+        """Absolute position of the oldest sample still held in the buffer."""
+        return max(0, self.write_pos - self.capacity)
+    
+    def read(self, start: int, end: int, out: np.ndarray) -> np.ndarray:
+        """
+        Copy samples [start, end) into a caller-owned array.
+        
+        Args:
+            start: Absolute start position (clamped to the oldest retained sample)
+            end: Absolute end position (exclusive)
+            out: Destination array with room for end - start samples
+        
+        Returns:
+            View of `out` holding the copied samples
+        """
+        start = max(start, self.oldest_position())
+        end = min(end, self.write_pos)
+        n = max(0, end - start)
+        
+        offset = start % self.capacity
+        first = min(n, self.capacity - offset)
+        out[:first] = self.buffer[offset:offset + first]
+        if first < n:
+            out[first:n] = self.buffer[:n - first]
+        return out[:n]
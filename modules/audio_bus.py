@@ -0,0 +1,361 @@
+"""
+Audio Bus Module
+One microphone stream shared by every component that listens.
+
+The bus owns the only input stream and fans each captured block out to its
+subscribers (wake word, speech-to-text, level meters). Every subscriber gets
+audio at its own sample rate and frame size, through its own bounded queue,
+so a slow consumer drops its own oldest frames instead of stalling the
+device or the other subscribers.
+"""
+import collections
+import threading
+import numpy as np
+import sounddevice as sd
+from types import ModuleType
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
+
+from .audio_buffer import to_float32
+from .session_recorder import ReplaySource, SessionRecorder
+
+
+class _LinearResampler:
+    """Streaming linear-interpolation resampler (state carried across blocks)."""
+    
+    def __init__(self, source_rate: int, target_rate: int):
+        self.step = source_rate / target_rate
+        self._phase = 1.0  # Next output position, in units of input samples after `_last`
+        self._last = 0.0
+        self._extended = np.zeros(0, dtype='float32')
+    
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Resample one block.
+        
+        Args:
+            samples: 1-D int16 block at the source rate
+        
+        Returns:
+            int16 block at the target rate (length varies by one between calls)
+        """
+        n = len(samples)
+        if n + 1 > len(self._extended):
+            self._extended = np.zeros(n + 1, dtype='float32')
+        extended = self._extended[:n + 1]
+        extended[0] = self._last
+        extended[1:] = samples
+        
+        count = int((n - self._phase) // self.step) + 1 if self._phase <= n else 0
+        positions = self._phase + self.step * np.arange(count)
+        out = np.interp(positions, np.arange(n + 1), extended).astype(np.int16)
+        
+        self._phase += self.step * count - n
+        self._last = extended[n]
+        return out
+
+
+class Subscription:
+    """
+    One consumer's view of the bus.
+    
+    In pull mode the consumer calls read(); in callback mode a delivery
+    thread calls `callback(frame)` for each frame. Either way frames pass
+    through a queue of at most `max_queue` frames; when it is full the
+    oldest frame is dropped and counted in `dropped`.
+    
+    start()/stop()/close() mirror sounddevice.InputStream, so a subscription
+    can stand in where a component used to keep its own stream.
+    """
+    
+    def __init__(
+        self,
+        bus: "AudioBus",
+        name: str,
+        sample_rate: int,
+        frame_length: Optional[int] = None,
+        callback: Optional[Callable[[np.ndarray], None]] = None,
+        max_queue: int = 50
+    ):
+        """
+        Initialize subscription (use AudioBus.subscribe()).
+        
+        Args:
+            bus: Bus delivering the audio
+            name: Subscriber name (for stats)
+            sample_rate: Rate the subscriber wants; resampled if it differs from the bus
+            frame_length: Samples per delivered frame; None passes bus blocks through
+            callback: Called with each int16 frame (callback mode); None for pull mode
+            max_queue: Frames held before the oldest is dropped
+        """
+        self.bus = bus
+        self.name = name
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.callback = callback
+        self.max_queue = max_queue
+        self.delivered = 0
+        self.dropped = 0
+        self.active = False
+        
+        self._resampler = _LinearResampler(bus.sample_rate, sample_rate) if sample_rate != bus.sample_rate else None
+        self._pending = np.zeros(frame_length or 0, dtype='int16')
+        self._pending_len = 0
+        self._queue: Deque[np.ndarray] = collections.deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _feed(self, block: np.ndarray) -> None:
+        """Resample and reframe one bus block (called from the audio callback)."""
+        if self._resampler:
+            block = self._resampler.process(block)
+        
+        if not self.frame_length:
+            self._enqueue(block.copy())
+            return
+        
+        pos = 0
+        while pos < len(block):
+            n = min(self.frame_length - self._pending_len, len(block) - pos)
+            self._pending[self._pending_len:self._pending_len + n] = block[pos:pos + n]
+            self._pending_len += n
+            pos += n
+            if self._pending_len == self.frame_length:
+                self._enqueue(self._pending.copy())
+                self._pending_len = 0
+    
+    def _enqueue(self, frame: np.ndarray) -> None:
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(frame)
+            self._cond.notify()
+    
+    def read(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        Take the next frame (pull mode).
+        
+        Args:
+            timeout: Maximum seconds to wait
+        
+        Returns:
+            1-D int16 frame, or None on timeout or after stop()
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._queue or not self.active, timeout):
+                return None
+            if not self._queue:
+                return None
+            self.delivered += 1
+            return self._queue.popleft()
+    
+    def _deliver(self) -> None:
+        """Delivery thread for callback mode."""
+        while self.active:
+            frame = self.read(timeout=0.5)
+            if frame is None:
+                continue
+            try:
+                self.callback(frame)
+            except Exception as e:
+                print(f"Error in audio subscriber '{self.name}': {e}")
+    
+    def start(self) -> None:
+        """Begin receiving audio."""
+        if self.active:
+            return
+        self.active = True
+        if self.callback:
+            self._thread = threading.Thread(target=self._deliver, name=f"audio-{self.name}", daemon=True)
+            self._thread.start()
+        self.bus._attach(self)
+    
+    def stop(self) -> None:
+        """Stop receiving audio and discard queued frames."""
+        self.bus._detach(self)
+        with self._cond:
+            self.active = False
+            self._queue.clear()
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+        self._pending_len = 0
+    
+    def close(self) -> None:
+        self.stop()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Delivery and overflow counters."""
+        return {"delivered": self.delivered, "dropped": self.dropped, "queued": len(self._queue)}
+
+
+class AudioBus:
+    """Single capture stream fanned out to subscribers."""
+    
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        block_ms: int = 20,
+        device: Optional[Union[int, str]] = None,
+        audio_backend: Optional[Union[ModuleType, ReplaySource]] = None,
+        recorder: Optional[SessionRecorder] = None
+    ):
+        """
+        Initialize audio bus.
+        
+        Args:
+            sample_rate: Capture sample rate
+            block_ms: Capture block length in milliseconds
+            device: Input device (None = system default)
+            audio_backend: Provider of InputStream; defaults to sounddevice
+                (pass a ReplaySource to run from a recording)
+            recorder: Optional SessionRecorder that receives all captured audio
+        """
+        self.sample_rate = sample_rate
+        self.block_size = int(sample_rate * block_ms / 1000)
+        self.device = device
+        self.audio = audio_backend or sd
+        self.recorder = recorder
+        self.stream: Optional[sd.InputStream] = None
+        self.overflows = 0  # Device-level overflows (before any subscriber)
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+    
+    @property
+    def running(self) -> bool:
+        return self.stream is not None
+    
+    def start(self) -> None:
+        """Open the input stream."""
+        if self.stream is not None:
+            return
+        self.stream = self.audio.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype='int16',
+            blocksize=self.block_size,
+            device=self.device,
+            callback=self._callback
+        )
+        self.stream.start()
+        print(f"Audio bus opened ({self.sample_rate} Hz, {self.block_size}-sample blocks).")
+    
+    def stop(self) -> None:
+        """Close the input stream (subscriptions stay attached for a later start())."""
+        if self.stream is None:
+            return
+        try:
+            self.stream.stop()
+            self.stream.close()
+        except Exception as e:
+            print(f"Error closing audio bus: {e}")
+        finally:
+            self.stream = None
+        print("Audio bus closed.")
+    
+    def subscribe(
+        self,
+        name: str,
+        sample_rate: Optional[int] = None,
+        frame_length: Optional[int] = None,
+        callback: Optional[Callable[[np.ndarray], None]] = None,
+        max_queue: int = 50,
+        start: bool = True
+    ) -> Subscription:
+        """
+        Add a consumer.
+        
+        Args:
+            name: Subscriber name (for stats)
+            sample_rate: Rate to deliver at (None = bus rate)
+            frame_length: Samples per frame (None = bus block size)
+            callback: Called with each frame on a delivery thread; None for pull mode
+            max_queue: Frames buffered before the oldest is dropped
+            start: Start receiving immediately
+        
+        Returns:
+            The subscription (stop() it to unsubscribe)
+        """
+        subscription = Subscription(
+            self,
+            name,
+            sample_rate or self.sample_rate,
+            frame_length=frame_length,
+            callback=callback,
+            max_queue=max_queue
+        )
+        if start:
+            subscription.start()
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.stop()
+    
+    def _attach(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription not in self._subscribers:
+                # Copy-on-write so the audio callback never iterates a list being modified
+                self._subscribers = self._subscribers + [subscription]
+    
+    def _detach(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+    
+    def _callback(self, indata, frames, time_info, status) -> None:
+        """Audio callback: hand the block to the recorder and every subscriber."""
+        if status.input_overflow:
+            self.overflows += 1
+        block = indata[:, 0]
+        if self.recorder:
+            self.recorder.write(block)
+        for subscription in self._subscribers:
+            subscription._feed(block)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Device overflows plus per-subscriber delivery and drop counts."""
+        return {
+            "overflows": self.overflows,
+            "subscribers": {s.name: s.get_stats() for s in self._subscribers},
+        }
+
+
+class LevelMeter:
+    """Input level (RMS and peak, dBFS) of the bus, updated per block."""
+    
+    def __init__(self, bus: AudioBus, name: str = "level_meter", decay: float = 0.9):
+        """
+        Initialize level meter.
+        
+        Args:
+            bus: Bus to meter
+            name: Subscriber name
+            decay: Per-block decay of the held peak (0-1)
+        """
+        self.decay = decay
+        self.rms = 0.0
+        self.peak = 0.0
+        self._scratch = np.zeros(bus.block_size, dtype='float32')
+        self.subscription = bus.subscribe(name, callback=self._update, max_queue=10)
+    
+    def _update(self, frame: np.ndarray) -> None:
+        if len(frame) > len(self._scratch):
+            self._scratch = np.zeros(len(frame), dtype='float32')
+        samples = to_float32(frame, out=self._scratch)
+        self.rms = float(np.sqrt(np.dot(samples, samples) / max(len(samples), 1)))
+        self.peak = max(float(np.abs(samples).max(initial=0.0)), self.peak * self.decay)
+    
+    @staticmethod
+    def _to_db(value: float) -> float:
+        return 20 * np.log10(max(value, 1e-6))
+    
+    @property
+    def rms_db(self) -> float:
+        return self._to_db(self.rms)
+    
+    @property
+    def peak_db(self) -> float:
+        return self._to_db(self.peak)
+    
+    def close(self) -> None:
+        self.subscription.stop()
@@ -0,0 +1,195 @@
+"""
+Barge-In Module
+Detects the user starting to speak while Jarvis is thinking or talking.
+
+The monitor listens continuously during a conversation (so its noise floor
+stays current) but only reacts while armed. When confirmed speech starts it
+disarms itself, notes when the speech began, and calls back so playback and
+generation can be stopped. The audio from just before the onset onwards is
+kept for take_audio(), so the interrupting words become the start of the
+next utterance instead of being lost.
+"""
+import threading
+import time
+import numpy as np
+import sounddevice as sd
+from types import ModuleType
+from typing import Callable, Iterator, Optional, Union
+
+from .audio_buffer import AudioRingBuffer
+from .audio_bus import AudioBus
+from .echo_gate import EchoGate
+from .session_recorder import ReplaySource, SessionRecorder
+from .vad import FrameVAD
+
+
+class BargeInMonitor:
+    """Speech-onset detector for interrupting playback."""
+    
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        min_speech: float = 0.25,
+        energy_ratio: float = 4.0,
+        preroll_seconds: float = 0.3,
+        lookback_seconds: float = 10.0,
+        audio_backend: Optional[Union[ModuleType, ReplaySource]] = None,
+        recorder: Optional[SessionRecorder] = None,
+        bus: Optional[AudioBus] = None,
+        echo_gate: Optional[EchoGate] = None
+    ):
+        """
+        Initialize barge-in monitor.
+        
+        Args:
+            sample_rate: Audio sample rate
+            frame_ms: VAD frame length in milliseconds
+            min_speech: Seconds of consecutive voiced frames that count as an interruption
+            energy_ratio: Frame RMS must exceed noise floor * ratio to be voiced
+                (higher than the STT endpointer, so coughs and clicks don't interrupt)
+            preroll_seconds: Audio kept from before the detected onset
+            lookback_seconds: Seconds of recent audio kept for take_audio()
+            audio_backend: Provider of InputStream; defaults to sounddevice
+                (pass a ReplaySource to run from a recording)
+            recorder: Optional SessionRecorder (with a bus, used only for markers)
+            bus: Shared AudioBus to take frames from instead of opening the device
+            echo_gate: Ignores frames of our own speech output (give it a
+                double_talk_ratio so the user can still talk over playback)
+        """
+        self.sample_rate = sample_rate
+        self.vad = FrameVAD(sample_rate=sample_rate, frame_ms=frame_ms, energy_ratio=energy_ratio)
+        self.onset_frames = max(1, round(min_speech / self.vad.frame_duration))
+        self.preroll = int(preroll_seconds * sample_rate)
+        self.lookback = AudioRingBuffer(int(lookback_seconds * sample_rate))
+        self.audio = audio_backend or sd
+        self.recorder = recorder
+        self.bus = bus
+        self.echo_gate = echo_gate
+        
+        self.is_listening = False
+        self.listen_thread: Optional[threading.Thread] = None
+        self.callback: Optional[Callable[[float], None]] = None
+        self.armed = False
+        self.triggered = False
+        self.onset_time: Optional[float] = None  # perf_counter() of the speech onset
+        self._voiced_run = 0
+        self._onset_position: Optional[int] = None
+    
+    def start(self) -> None:
+        """Start listening (the monitor stays idle until armed)."""
+        if self.is_listening:
+            return
+        self.is_listening = True
+        self.listen_thread = threading.Thread(target=self._listen_loop, name="barge-in", daemon=True)
+        self.listen_thread.start()
+    
+    def stop(self) -> None:
+        """Stop listening."""
+        self.disarm()
+        self.is_listening = False
+        if self.listen_thread:
+            self.listen_thread.join(timeout=2)
+        self.listen_thread = None
+    
+    def arm(self, callback: Callable[[float], None]) -> None:
+        """
+        React to the next speech onset.
+        
+        Args:
+            callback: Called once (on its own thread) with the perf_counter()
+                time the interrupting speech started
+        """
+        self.callback = callback
+        self.triggered = False
+        self.onset_time = None
+        self._onset_position = None
+        self._voiced_run = 0
+        self.armed = True
+    
+    def disarm(self) -> None:
+        """Stop reacting to speech (pending take_audio() audio is kept)."""
+        self.armed = False
+    
+    def take_audio(self) -> Optional[np.ndarray]:
+        """
+        Hand over the audio since the last interruption.
+        
+        Returns everything from `preroll_seconds` before the onset up to now,
+        for use as the start of the next utterance. Each interruption can be
+        taken once.
+        
+        Returns:
+            int16 audio, or None if no interruption is pending
+        """
+        if self._onset_position is None:
+            return None
+        end = self.lookback.write_pos
+        start = max(self._onset_position, self.lookback.oldest_position())
+        self._onset_position = None
+        return self.lookback.read(start, end, out=np.empty(end - start, dtype=np.int16))
+    
+    def _frames(self) -> Iterator[np.ndarray]:
+        """Yield int16 frames from a bus subscription or a private input stream."""
+        frame_length = self.vad.frame_length
+        if self.bus is not None:
+            subscription = self.bus.subscribe("barge_in", sample_rate=self.sample_rate, frame_length=frame_length)
+            try:
+                while self.is_listening:
+                    frame = subscription.read(timeout=0.5)
+                    if frame is not None:
+                        yield frame
+            finally:
+                subscription.stop()
+            return
+        
+        with self.audio.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype='int16',
+            blocksize=frame_length
+        ) as stream:
+            while self.is_listening:
+                audio_frame, _ = stream.read(frame_length)
+                pcm = audio_frame[:, 0]
+                if self.recorder:
+                    self.recorder.write(pcm)
+                yield pcm
+    
+    def _listen_loop(self) -> None:
+        """Track the noise floor and watch for speech onset (runs in background thread)."""
+        try:
+            for pcm in self._frames():
+                self.lookback.write(pcm)
+                if self.echo_gate and not self.echo_gate.check(pcm):
+                    # Our own voice: neither speech nor background noise
+                    self._voiced_run = 0
+                    continue
+                voiced = self.vad.process(pcm)
+                if not self.armed:
+                    continue
+                
+                for is_voiced in voiced:
+                    self._voiced_run = self._voiced_run + 1 if is_voiced else 0
+                if self._voiced_run >= self.onset_frames:
+                    self._trigger()
+        except Exception as e:
+            print(f"Error in barge-in monitor: {e}")
+    
+    def _trigger(self) -> None:
+        """Confirmed speech while armed: remember where it began and call back."""
+        self.armed = False
+        self.triggered = True
+        
+        # The onset was `run` frames ago; date it back from the confirmation
+        run = self._voiced_run * self.vad.frame_length
+        self.onset_time = time.perf_counter() - run / self.sample_rate
+        onset = self.lookback.write_pos - run
+        self._onset_position = max(self.lookback.oldest_position(), onset - self.preroll)
+        if self.recorder:
+            end = self.recorder.position
+            self.recorder.mark(max(0, end - run), end, "barge_in")
+        
+        print("✋ Barge-in: user started speaking")
+        if self.callback:
+            threading.Thread(target=self.callback, args=(self.onset_time,), daemon=True).start()
@@ -0,0 +1,119 @@
+"""
+Echo Gate Module
+Keeps Jarvis's own voice out of the capture path.
+
+TextToSpeech records when each utterance (and sound effect) played. The
+gate compares the capture time of every audio block against those spans,
+extended by a short tail for output latency and room echo, and replaces
+blocks that fall inside them with silence before the VAD sees them. Self-
+speech therefore never starts an utterance or reaches Whisper.
+
+Optionally the gate lets through blocks that are much louder than the echo
+it has learned to expect (double talk), so the user can still be heard
+talking over playback.
+"""
+import time
+import numpy as np
+from typing import Dict, Optional
+
+from .audio_buffer import to_float32
+from .text_to_speech import TextToSpeech
+
+
+class EchoGate:
+    """Time-span gate driven by TextToSpeech playback timestamps."""
+    
+    def __init__(
+        self,
+        tts: TextToSpeech,
+        sample_rate: int = 16000,
+        tail: float = 0.3,
+        double_talk_ratio: Optional[float] = None,
+        learn_seconds: float = 1.0
+    ):
+        """
+        Initialize echo gate.
+        
+        Args:
+            tts: TextToSpeech whose playback_spans mark our own audio
+            sample_rate: Sample rate of the blocks passed to process()
+            tail: Seconds after playback ends that are still treated as echo
+            double_talk_ratio: Pass blocks whose RMS exceeds the learned echo
+                level by this factor; None gates every block during playback
+            learn_seconds: Seconds of echo heard before double talk is allowed
+        """
+        self.tts = tts
+        self.sample_rate = sample_rate
+        self.tail = tail
+        self.double_talk_ratio = double_talk_ratio
+        self.echo_level = 0.0  # Slow average RMS of captured echo
+        self._echo_seen = 0.0
+        self._learn_seconds = learn_seconds
+        self._silence = np.zeros(0, dtype='int16')
+        self._scratch = np.zeros(0, dtype='float32')
+        self.stats: Dict[str, float] = {
+            "gated_blocks": 0,
+            "gated_seconds": 0.0,
+            "double_talk_blocks": 0,
+        }
+    
+    def _rms(self, block: np.ndarray) -> float:
+        if len(block) > len(self._scratch):
+            self._scratch = np.zeros(len(block), dtype='float32')
+        samples = to_float32(block, out=self._scratch)
+        return float(np.sqrt(np.dot(samples, samples) / max(len(samples), 1)))
+    
+    def check(self, block: np.ndarray, end_time: Optional[float] = None) -> bool:
+        """
+        Decide whether a block may pass.
+        
+        Args:
+            block: 1-D int16 audio block
+            end_time: perf_counter() time the block's last sample was captured
+                (defaults to now)
+        
+        Returns:
+            True to keep the block, False if it is echo
+        """
+        end_time = time.perf_counter() if end_time is None else end_time
+        duration = len(block) / self.sample_rate
+        if not self.tts.playing_during(end_time - duration, end_time, self.tail):
+            return True
+        
+        if self.double_talk_ratio is not None:
+            rms = self._rms(block)
+            learned = self._echo_seen >= self._learn_seconds
+            self._echo_seen += duration
+            # Plain mean while learning, then a ~2s moving average: a few
+            # blocks of the user talking over playback barely move it
+            weight = min(1.0, duration / 2.0) if learned else duration / self._echo_seen
+            self.echo_level += weight * (rms - self.echo_level)
+            if learned and rms > self.echo_level * self.double_talk_ratio:
+                self.stats["double_talk_blocks"] += 1
+                return True
+        
+        self.stats["gated_blocks"] += 1
+        self.stats["gated_seconds"] += duration
+        return False
+    
+    def process(self, block: np.ndarray, end_time: Optional[float] = None) -> np.ndarray:
+        """
+        Gate one block.
+        
+        Args:
+            block: 1-D int16 audio block
+            end_time: perf_counter() time the block's last sample was captured
+                (defaults to now)
+        
+        Returns:
+            The block itself, or silence of the same length if it is echo
+        """
+        if self.check(block, end_time):
+            return block
+        if len(block) > len(self._silence):
+            self._silence = np.zeros(len(block), dtype='int16')
+        return self._silence[:len(block)]
+    
+    def get_stats(self) -> Dict[str, float]:
+        """Counts of blocks dropped as echo and passed as double talk."""
+        return dict(self.stats)
@@ -48,7 +48,8 @@ class JarvisGUI:
         self.is_visible = False
         self.typing_speed = 0.03  # Seconds per character
         self.on_close_callback: Optional[Callable] = None
-        
+        self._typing_aborted = False
+    
     def show(self) -> None:
         """Show the GUI window."""
         if self.is_visible:
@@ -255,6 +256,7 @@ class JarvisGUI:
         """
         if not self.text_widget:
             return
+        self._typing_aborted = False
         
         # Add prefix
         if prefix:
@@ -264,7 +266,7 @@ class JarvisGUI:
         
         # Type each character
         for char in text:
-            if not self.is_visible:
+            if not self.is_visible or self._typing_aborted:
                 break
             self.text_widget.insert(tk.END, char)
             self.text_widget.see(tk.END)
@@ -276,6 +278,10 @@ class JarvisGUI:
         self.text_widget.see(tk.END)
         self.root.update()
     
+    def abort_typing(self) -> None:
+        """Stop a type_text() animation in progress (safe from any thread)."""
+        self._typing_aborted = True
+    
     def set_close_callback(self, callback: Callable) -> None:
         """Set callback function when window closes."""
         self.on_close_callback = callback
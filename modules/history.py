@@ -0,0 +1,254 @@
+"""
+Conversation History Module
+Message history laid out so the prompt prefix stays identical across turns.
+
+Ollama reuses its KV cache for the longest prefix a request shares with the
+previous one. Sliding the history window by one turn each request changes
+the prefix right after the system prompt, so the whole history has to be
+re-evaluated every time. Here the oldest turns are evicted in blocks
+instead: between evictions each request only appends to the previous one,
+and only the new messages are evaluated.
+
+History is also held under a token budget. Turns that push it over are
+handed out (take_for_compaction) to be summarised off the request path;
+the summary then replaces them in one step (apply_summary), again as a
+single block change to the prefix.
+"""
+import json
+import math
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class ConversationHistory:
+    """Turn history with block eviction and prompt-evaluation statistics."""
+    
+    def __init__(
+        self,
+        max_turns: int = 10,
+        evict_turns: Optional[int] = None,
+        token_budget: Optional[int] = None
+    ):
+        """
+        Initialize history.
+        
+        Args:
+            max_turns: Most user/assistant turns kept
+            evict_turns: Oldest turns dropped at once when max_turns is
+                exceeded (default: half of max_turns)
+            token_budget: Tokens the history (summary included) should stay
+                under; older turns beyond it are summarised. None disables.
+        """
+        self.max_turns = max(1, max_turns)
+        self.evict_turns = min(self.max_turns, max(1, evict_turns or self.max_turns // 2))
+        self.token_budget = token_budget
+        self.messages: List[Dict[str, Any]] = []
+        self.tokens: List[int] = []  # Token count of each message
+        self.summary = ""  # Running summary of compacted turns
+        self.summary_tokens = 0
+        self.evictions = 0
+        self.compactions = 0
+        self._lock = threading.Lock()  # Summaries are applied from a background thread
+        
+        # Per-request prompt evaluation reported by Ollama
+        self.prompt_stats: List[Dict[str, float]] = []
+        self._chars_per_token: Optional[float] = None
+    
+    def __len__(self) -> int:
+        return len(self.messages)
+    
+    @property
+    def total_tokens(self) -> int:
+        """Tokens of the history as sent (summary plus messages)."""
+        return self.summary_tokens + sum(self.tokens)
+    
+    def estimate_tokens(self, text: str) -> int:
+        """Token count of a text, from the characters-per-token ratio measured so far."""
+        return math.ceil(len(text) / (self._chars_per_token or 4.0))
+    
+    def add(
+        self,
+        role: str,
+        content: str,
+        tokens: Optional[int] = None,
+        tool_calls: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Append a message, evicting the oldest turns in a block when full.
+        
+        Args:
+            role: "user" or "assistant"
+            content: Message text exactly as sent or generated
+            tokens: Exact token count if known (e.g. eval_count); estimated otherwise
+            tool_calls: Native tool calls made by the assistant in this message
+        """
+        message: Dict[str, Any] = {"role": role, "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        if tokens is None:
+            tokens = self.estimate_tokens(content + (json.dumps(tool_calls) if tool_calls else ""))
+        with self._lock:
+            self.messages.append(message)
+            self.tokens.append(tokens)
+            if len(self.messages) > self.max_turns * 2:
+                # Drop whole turns so the history still starts with a user message
+                self._drop(self.evict_turns * 2)
+                self.evictions += 1
+    
+    def _drop(self, count: int) -> None:
+        self.messages = self.messages[count:]
+        self.tokens = self.tokens[count:]
+    
+    def pop(self) -> Optional[Dict[str, Any]]:
+        """Remove and return the newest message (e.g. an abandoned request)."""
+        with self._lock:
+            if not self.messages:
+                return None
+            self.tokens.pop()
+            return self.messages.pop()
+    
+    def clear(self) -> None:
+        with self._lock:
+            self.messages = []
+            self.tokens = []
+            self.summary = ""
+            self.summary_tokens = 0
+    
+    def over_budget(self) -> bool:
+        return self.token_budget is not None and self.total_tokens > self.token_budget
+    
+    def take_for_compaction(self) -> List[Dict[str, Any]]:
+        """
+        Pick the oldest turns to summarise.
+        
+        Enough whole turns are taken to bring the history down to half the
+        budget (so compaction, and the prefix change it causes, is rare);
+        the newest turn is always kept verbatim.
+        
+        Returns:
+            The messages to summarise (still in the history until
+            apply_summary()), or [] if the history is within budget
+        """
+        with self._lock:
+            if not self.over_budget():
+                return []
+            target = self.token_budget // 2
+            excess = self.total_tokens - target
+            count = 0
+            while count + 2 < len(self.messages) and excess > 0:
+                excess -= self.tokens[count] + self.tokens[count + 1]
+                count += 2
+            return list(self.messages[:count])
+    
+    def apply_summary(self, summary: str, compacted: List[Dict[str, Any]]) -> bool:
+        """
+        Replace summarised turns with the new running summary.
+        
+        Args:
+            summary: Summary covering the previous summary and `compacted`
+            compacted: Messages from take_for_compaction()
+        
+        Returns:
+            False if the history changed underneath (the summary is discarded)
+        """
+        with self._lock:
+            count = len(compacted)
+            if any(a is not b for a, b in zip(self.messages[:count], compacted)) or len(self.messages) < count:
+                return False
+            self._drop(count)
+            self.summary = summary
+            self.summary_tokens = self.estimate_tokens(summary)
+            self.compactions += 1
+            return True
+    
+    def enforce_limit(self, limit: int) -> int:
+        """
+        Drop the oldest turns outright while the history exceeds `limit`.
+        
+        The fallback when summarisation cannot keep up.
+        
+        Returns:
+            Number of messages dropped
+        """
+        with self._lock:
+            count = 0
+            total = self.total_tokens
+            while total > limit and count + 2 < len(self.messages):
+                total -= self.tokens[count] + self.tokens[count + 1]
+                count += 2
+            if count:
+                self._drop(count)
+                self.evictions += 1
+            return count
+    
+    def build(self, system_prompt: str = "") -> List[Dict[str, Any]]:
+        """
+        Messages for the next request: system prompt, summary, then history.
+        
+        Args:
+            system_prompt: System prompt (unchanged between calls, so the
+                prefix is byte-identical)
+        
+        Returns:
+            New list referencing the stored message dicts
+        """
+        messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        with self._lock:
+            if self.summary:
+                messages.append({"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"})
+            messages.extend(self.messages)
+        return messages
+    
+    def record(self, response: Any, messages: List[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+        """
+        Store Ollama's prompt evaluation counters for one request.
+        
+        The share of the prompt served from cache is estimated from the
+        prompt's length: the densest evaluation seen so far (tokens per
+        character) approximates a fully uncached prompt.
+        
+        Args:
+            response: Final chat response or stream chunk (has prompt_eval_count)
+            messages: Messages that were sent
+        
+        Returns:
+            The recorded stats, or None if the response carried no counters
+        """
+        evaluated = response.get('prompt_eval_count')
+        if evaluated is None:
+            return None
+        duration = (response.get('prompt_eval_duration') or 0) / 1e9
+        prompt_chars = sum(
+            len(m["content"]) + (len(json.dumps(m["tool_calls"])) if "tool_calls" in m else 0)
+            for m in messages
+        )
+        
+        if evaluated:
+            ratio = prompt_chars / evaluated
+            self._chars_per_token = ratio if self._chars_per_token is None else min(self._chars_per_token, ratio)
+        estimated_tokens = prompt_chars / self._chars_per_token if self._chars_per_token else evaluated
+        cached = max(0.0, 1.0 - evaluated / estimated_tokens) if estimated_tokens else 0.0
+        
+        stats = {
+            "prompt_eval_count": evaluated,
+            "prompt_eval_seconds": duration,
+            "prompt_chars": prompt_chars,
+            "cache_hit_rate": cached,
+        }
+        self.prompt_stats.append(stats)
+        return stats
+    
+    def get_stats(self) -> Dict[str, float]:
+        """Totals over all recorded requests."""
+        stats = self.prompt_stats
+        if not stats:
+            return {"requests": 0, "evictions": self.evictions, "compactions": self.compactions}
+        return {
+            "requests": len(stats),
+            "evictions": self.evictions,
+            "compactions": self.compactions,
+            "history_tokens": self.total_tokens,
+            "prompt_eval_count": sum(s["prompt_eval_count"] for s in stats),
+            "prompt_eval_seconds": sum(s["prompt_eval_seconds"] for s in stats),
+            "cache_hit_rate": sum(s["cache_hit_rate"] for s in stats) / len(stats),
+        }
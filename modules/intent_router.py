@@ -0,0 +1,333 @@
+"""
+Intent Router Module
+Answers common commands locally, before the LLM.
+
+Two stages, both cheap enough to run on every utterance:
+1. Compiled pattern rules for commands with parameters ("open Spotify",
+   "search the web for ...") and exact phrasings.
+2. A similarity index over example utterances: every example is a hashed
+   character-trigram vector, all stored as one matrix, so scoring a query
+   against every example is a single matrix-vector product. It catches
+   rephrasings of parameter-free commands ("got the time?"), but only
+   when every content word also appears in that intent's examples: "what
+   time is it in Tokyo" is close in spelling to "what time is it" and
+   still needs the LLM.
+
+A route is returned only when it is unambiguous; conversational input,
+anything resembling the "conversation" examples, and low-confidence
+matches go to the LLM. Routes are LLMResponses, like the LLM's replies.
+"""
+import re
+import time
+import zlib
+import numpy as np
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Pattern, Set, Tuple
+
+from .llm_response import LLMResponse
+
+Intent = Dict[str, Any]
+
+# Words said before a command that don't change it
+_FILLER = re.compile(r"^(?:(?:hey|ok|okay|jarvis|please|can you|could you|would you|will you)\s+)+")
+_TRAILING = re.compile(r"\s+(?:please|for me|now|jarvis)$")
+
+# Words that never change which command was meant
+_FUNCTION_WORDS = frozenset("""
+a an the this that these those it it's its is are am was be do does did
+i i'm me my you your what what's whats how how's is there any some much
+to of for at on in up so just tell show give get got have has had
+""".split())
+
+
+def normalize_utterance(text: str) -> str:
+    """Lowercase, drop punctuation and polite filler ("Jarvis, could you ... please")."""
+    text = re.sub(r"[^\w\s'.]", " ", text.lower())
+    text = re.sub(r"\s+", " ", text).strip(" .")
+    text = _FILLER.sub("", text)
+    return _TRAILING.sub("", text).strip()
+
+
+def trigram_vector(text: str, dimensions: int = 4096) -> np.ndarray:
+    """
+    Embed a text as L2-normalised hashed character-trigram counts.
+    
+    Cosine similarity of two vectors (their dot product) measures how much
+    spelling the texts share, which tolerates reordered or extra words.
+    
+    Args:
+        text: Normalised text
+        dimensions: Size of the hashed trigram space
+    
+    Returns:
+        float32 vector of length `dimensions`
+    """
+    padded = f"  {text} "
+    vector = np.zeros(dimensions, dtype='float32')
+    indices = [zlib.crc32(padded[i:i + 3].encode()) % dimensions for i in range(len(padded) - 2)]
+    np.add.at(vector, indices, 1.0)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def content_words(text: str) -> Set[str]:
+    """Words of a normalised utterance other than function words."""
+    return set(re.findall(r"[a-z0-9']+", text)) - _FUNCTION_WORDS
+
+
+def _intent(tool: str, response: str, **parameters: Any) -> Intent:
+    return {"tool": tool, **parameters, "response": response}
+
+
+TIME = _intent("get_info", "Checking the time, sir.", info_type="time")
+DATE = _intent("get_info", "Checking the date, sir.", info_type="date")
+BATTERY = _intent("get_info", "Checking the battery, sir.", info_type="battery")
+DISK = _intent("get_info", "Checking disk space, sir.", info_type="disk_space")
+LIST_APPS = _intent("list_apps", "Retrieving your installed applications, sir.")
+
+
+def _media(action: str, response: str) -> Intent:
+    return _intent("control_app", response, app_name="Music", action=action)
+
+
+def _browser(action: str, response: str) -> Intent:
+    return _intent("browser_control", response, action=action, browser="Safari")
+
+
+PAUSE = _media("pause", "Pausing, sir.")
+RESUME = _media("play", "Resuming, sir.")
+NEXT = _media("next", "Skipping ahead, sir.")
+PREVIOUS = _media("previous", "Going back a track, sir.")
+VOLUME_UP = _media("volume_up", "Turning it up, sir.")
+VOLUME_DOWN = _media("volume_down", "Turning it down, sir.")
+NEW_TAB = _browser("new_tab", "Opening a new tab, sir.")
+CLOSE_TAB = _browser("close_tab", "Closing the tab, sir.")
+REFRESH = _browser("refresh", "Refreshing the page, sir.")
+CONVERSATION = None  # Examples that must go to the LLM
+
+# Example utterances for the similarity index
+DEFAULT_EXAMPLES: List[Tuple[str, Optional[Intent]]] = [
+    ("what time is it", TIME),
+    ("what's the time", TIME),
+    ("tell me the time", TIME),
+    ("got the time", TIME),
+    ("current time", TIME),
+    ("what is today's date", DATE),
+    ("what's the date today", DATE),
+    ("what day is it today", DATE),
+    ("today's date", DATE),
+    ("how much battery do i have", BATTERY),
+    ("battery level", BATTERY),
+    ("what's my battery at", BATTERY),
+    ("how much charge is left", BATTERY),
+    ("how much disk space do i have", DISK),
+    ("how much storage is left", DISK),
+    ("free disk space", DISK),
+    ("list my applications", LIST_APPS),
+    ("what apps do i have installed", LIST_APPS),
+    ("show installed apps", LIST_APPS),
+    ("pause the music", PAUSE),
+    ("stop the music", PAUSE),
+    ("pause playback", PAUSE),
+    ("resume the music", RESUME),
+    ("resume playback", RESUME),
+    ("next song", NEXT),
+    ("skip this song", NEXT),
+    ("skip track", NEXT),
+    ("previous song", PREVIOUS),
+    ("go back a song", PREVIOUS),
+    ("turn the volume up", VOLUME_UP),
+    ("make it louder", VOLUME_UP),
+    ("turn the volume down", VOLUME_DOWN),
+    ("make it quieter", VOLUME_DOWN),
+    ("open a new tab", NEW_TAB),
+    ("close this tab", CLOSE_TAB),
+    ("refresh the page", REFRESH),
+    ("reload this page", REFRESH),
+    # Near misses that need the LLM
+    ("what time should i leave", CONVERSATION),
+    ("what time is it in tokyo", CONVERSATION),
+    ("what's the time in london", CONVERSATION),
+    ("how much time do i have", CONVERSATION),
+    ("what time does the store open", CONVERSATION),
+    ("what day is christmas", CONVERSATION),
+    ("how long will my battery last", CONVERSATION),
+    ("what song is this", CONVERSATION),
+    ("play some music", CONVERSATION),
+    ("how are you", CONVERSATION),
+    ("tell me a joke", CONVERSATION),
+    ("what do you think", CONVERSATION),
+    ("thank you", CONVERSATION),
+]
+
+Rule = Tuple[Pattern, Callable[[re.Match], Optional[Intent]]]
+
+
+def _fixed(intent: Intent) -> Callable[[re.Match], Intent]:
+    return lambda match: intent
+
+
+def _default_rules(app_exists: Callable[[str], Optional[str]]) -> List[Rule]:
+    """Pattern rules, matched against the whole normalised utterance."""
+    
+    def open_app(match: re.Match) -> Optional[Intent]:
+        # Only apps that are actually installed - "open the pod bay doors" goes to the LLM
+        name = app_exists(match.group("app"))
+        return _intent("open_app", f"Opening {name}, sir.", app_name=name) if name else None
+    
+    def query(tool: str, response: str) -> Callable[[re.Match], Intent]:
+        return lambda match: _intent(tool, response.format(q=match.group("q")), query=match.group("q"))
+    
+    rules = [
+        (r"what(?:'s| is) the (?:current )?time|what time is it|(?:the )?current time", _fixed(TIME)),
+        (r"what(?:'s| is) (?:the date|today's date)(?: today)?|what day is (?:it|today)|(?:the )?date", _fixed(DATE)),
+        (r"(?:what(?:'s| is) (?:my|the) )?battery(?: level| status)?", _fixed(BATTERY)),
+        (r"(?:how much )?(?:free )?disk space(?: left)?", _fixed(DISK)),
+        (r"(?:list|show)(?: me)?(?: all)?(?: my| the)?(?: installed)? (?:apps|applications)", _fixed(LIST_APPS)),
+        (r"pause|pause (?:the )?(?:music|song|playback)|stop (?:the )?music", _fixed(PAUSE)),
+        (r"resume|unpause|resume (?:the )?(?:music|playback)", _fixed(RESUME)),
+        (r"(?:next|skip)(?: song| track)?|skip (?:this|the) (?:song|track)", _fixed(NEXT)),
+        (r"previous(?: song| track)?|(?:go )?back a (?:song|track)", _fixed(PREVIOUS)),
+        (r"(?:turn (?:the )?)?volume up|(?:turn it up|louder)", _fixed(VOLUME_UP)),
+        (r"(?:turn (?:the )?)?volume down|(?:turn it down|quieter)", _fixed(VOLUME_DOWN)),
+        (r"(?:open )?(?:a )?new tab", _fixed(NEW_TAB)),
+        (r"close (?:this |the )?tab", _fixed(CLOSE_TAB)),
+        (r"(?:refresh|reload)(?: (?:this|the) page)?", _fixed(REFRESH)),
+        (r"(?:open|launch|start) (?P<app>[a-z0-9][a-z0-9 .]*?)(?: app)?", open_app),
+        (r"(?:play (?P<q>.+) on youtube|youtube (?P<q2>.+))",
+         lambda m: _intent("play_youtube", f"Opening YouTube with {m.group('q') or m.group('q2')}, sir.",
+                           query=m.group("q") or m.group("q2"))),
+        (r"(?:search (?:the web|google|online) for|google|look up) (?P<q>.+)",
+         query("web_search", "Searching the web for {q}, sir.")),
+    ]
+    return [(re.compile(rf"(?:{pattern})"), build) for pattern, build in rules]
+
+
+def installed_app(name: str, folders: Tuple[str, ...] = ("/Applications", "/System/Applications")) -> Optional[str]:
+    """
+    Find an installed app by spoken name.
+    
+    Args:
+        name: App name as spoken (any case; "chrome" finds Google Chrome)
+        folders: Where to look for .app bundles
+    
+    Returns:
+        The app's real name, or None if it is not installed
+    """
+    wanted = name.lower().strip()
+    for folder in folders:
+        try:
+            apps = [p.stem for p in Path(folder).glob("*.app")]
+        except OSError:
+            continue
+        for app in apps:
+            if app.lower() == wanted or app.lower() == f"google {wanted}":
+                return app
+    return None
+
+
+class IntentRouter:
+    """Rule + similarity router in front of the LLM."""
+    
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        margin: float = 0.1,
+        examples: Optional[List[Tuple[str, Optional[Intent]]]] = None,
+        app_exists: Callable[[str], Optional[str]] = installed_app,
+        dimensions: int = 4096
+    ):
+        """
+        Initialize router.
+        
+        Args:
+            threshold: Cosine similarity an example match needs to be used
+            margin: How far the best intent must lead the best different
+                intent (or conversation example)
+            examples: (utterance, intent) pairs for the similarity index; an
+                intent of None marks input that must go to the LLM
+            app_exists: Maps a spoken app name to the installed app's name or None
+            dimensions: Size of the hashed trigram space
+        """
+        self.threshold = threshold
+        self.margin = margin
+        self.dimensions = dimensions
+        self.rules = _default_rules(app_exists)
+        
+        examples = DEFAULT_EXAMPLES if examples is None else examples
+        self.example_intents = [intent for _, intent in examples]
+        self.example_matrix = np.stack([trigram_vector(normalize_utterance(text), dimensions) for text, _ in examples])
+        
+        # Content words each intent's examples use (keyed by intent identity)
+        self.intent_words: Dict[int, Set[str]] = {}
+        for text, intent in examples:
+            if intent is not None:
+                self.intent_words.setdefault(id(intent), set()).update(content_words(normalize_utterance(text)))
+        
+        self.stats: Dict[str, float] = {"routed": 0, "rule_hits": 0, "similarity_hits": 0, "to_llm": 0, "seconds": 0.0}
+    
+    def _match_rules(self, text: str) -> Optional[Intent]:
+        for pattern, build in self.rules:
+            match = pattern.fullmatch(text)
+            if match:
+                intent = build(match)
+                if intent is not None:
+                    return intent
+        return None
+    
+    def _match_examples(self, text: str) -> Tuple[Optional[Intent], float]:
+        """
+        Best intent by example similarity, if it clears threshold and margin.
+        
+        Declined when the text has a content word none of the intent's
+        examples use ("in tokyo"): the extra words may change the request.
+        """
+        scores = self.example_matrix @ trigram_vector(text, self.dimensions)
+        best = int(np.argmax(scores))
+        intent = self.example_intents[best]
+        if intent is None or scores[best] < self.threshold:
+            return None, float(scores[best])
+        
+        # Strongest competitor: any example that maps to something else
+        others = [score for score, other in zip(scores, self.example_intents) if other is not intent]
+        if others and scores[best] - max(others) < self.margin:
+            return None, float(scores[best])
+        if content_words(text) - self.intent_words[id(intent)]:
+            return None, float(scores[best])
+        return intent, float(scores[best])
+    
+    def route(self, text: str) -> Optional[LLMResponse]:
+        """
+        Route an utterance.
+        
+        Args:
+            text: Transcribed user input
+        
+        Returns:
+            The reply the LLM would have given when confident, or None to
+            ask the LLM
+        """
+        started = time.perf_counter()
+        normalized = normalize_utterance(text)
+        intent = self._match_rules(normalized) if normalized else None
+        if intent is not None:
+            self.stats["rule_hits"] += 1
+        elif normalized:
+            intent, _ = self._match_examples(normalized)
+            if intent is not None:
+                self.stats["similarity_hits"] += 1
+        
+        self.stats["seconds"] += time.perf_counter() - started
+        if intent is None:
+            self.stats["to_llm"] += 1
+            return None
+        self.stats["routed"] += 1
+        return LLMResponse.from_fields(intent)
+    
+    def get_stats(self) -> Dict[str, float]:
+        """Routing counts, hit rate and average routing time."""
+        stats: Dict[str, float] = dict(self.stats)
+        total = stats["routed"] + stats["to_llm"]
+        stats["hit_rate"] = stats["routed"] / total if total else 0.0
+        stats["average_seconds"] = stats["seconds"] / total if total else 0.0
+        return stats
@@ -0,0 +1,216 @@
+"""
+JSON Stream Module
+Incremental parsing of the JSON object the LLM streams back.
+
+The parser is fed text chunks as tokens arrive and tracks the top-level
+object's fields as they are written. String fields ("tool", "response")
+are decoded as they grow, so their partial value is available before the
+closing quote; other values (numbers, nested objects) are parsed when
+they complete. Nothing is re-scanned: each character is looked at once.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Parser states
+_BEFORE, _KEY_WAIT, _KEY, _COLON, _VALUE_WAIT, _STRING, _RAW, _VALUE_END, _DONE = range(9)
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+FieldUpdate = Tuple[str, Any, bool]  # (key, value so far, complete)
+
+
+class StreamingJSONParser:
+    """
+    Push parser for one streamed JSON object.
+    
+    Example:
+        parser = StreamingJSONParser()
+        for token in brain.process_stream(text):
+            for key, value, complete in parser.feed(token):
+                ...
+    """
+    
+    def __init__(self):
+        """Initialize parser."""
+        self.fields: Dict[str, Any] = {}  # Completed top-level fields
+        self.current_key: Optional[str] = None  # Field being written, if any
+        self.text = ""  # Everything fed so far
+        self.error: Optional[str] = None
+        
+        self._state = _BEFORE
+        self._chars: List[str] = []  # Key or string value decoded so far
+        self._escape: Optional[str] = None  # Pending escape sequence after the backslash
+        self._high_surrogate: Optional[int] = None
+        self._raw: List[str] = []  # Raw text of a non-string value
+        self._raw_depth = 0
+        self._raw_in_string = False
+        self._raw_escape = False
+    
+    @property
+    def done(self) -> bool:
+        """True once the top-level object has closed."""
+        return self._state == _DONE
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Current value of a field.
+        
+        Args:
+            key: Top-level field name
+            default: Returned if the field has not started
+        
+        Returns:
+            The completed value, the partial string while a string field is
+            still being written, or `default`
+        """
+        if key in self.fields:
+            return self.fields[key]
+        if key == self.current_key and self._state == _STRING:
+            return "".join(self._chars)
+        return default
+    
+    def feed(self, chunk: str) -> List[FieldUpdate]:
+        """
+        Consume the next piece of streamed text.
+        
+        Args:
+            chunk: Text exactly as generated (may split tokens, escapes or keys)
+        
+        Returns:
+            (key, value, complete) for every field that completed or, for
+            string fields, grew in this chunk
+        """
+        self.text += chunk
+        updates: List[FieldUpdate] = []
+        grew = False
+        
+        for char in chunk:
+            state = self._state
+            if state == _STRING:
+                if self._string_char(char):
+                    grew = False
+                    self._complete("".join(self._chars), updates)
+                else:
+                    grew = True
+            elif state == _RAW:
+                self._raw_char(char, updates)
+            elif state == _BEFORE:
+                if char == '{':
+                    self._state = _KEY_WAIT
+            elif state == _KEY_WAIT:
+                if char == '"':
+                    self._chars = []
+                    self._state = _KEY
+                elif char == '}':
+                    self._state = _DONE
+            elif state == _KEY:
+                if self._string_char(char):
+                    self.current_key = "".join(self._chars)
+                    self._state = _COLON
+            elif state == _COLON:
+                if char == ':':
+                    self._state = _VALUE_WAIT
+            elif state == _VALUE_WAIT:
+                if char == '"':
+                    self._chars = []
+                    self._state = _STRING
+                elif not char.isspace():
+                    self._raw = [char]
+                    self._raw_depth = 1 if char in '{[' else 0
+                    self._raw_in_string = False
+                    self._raw_escape = False
+                    self._state = _RAW
+            elif state == _VALUE_END:
+                if char == ',':
+                    self._state = _KEY_WAIT
+                elif char == '}':
+                    self._state = _DONE
+            # _DONE: trailing text after the object is ignored
+        
+        if grew and self._state == _STRING:
+            updates.append((self.current_key, "".join(self._chars), False))
+        return updates
+    
+    def _string_char(self, char: str) -> bool:
+        """Decode one character inside a string; True when the string closes."""
+        if self._escape is not None:
+            self._escape += char
+            if self._escape[0] != 'u':
+                self._append(_ESCAPES.get(char, char))
+                self._escape = None
+            elif len(self._escape) == 5:
+                try:
+                    self._append_code_unit(int(self._escape[1:], 16))
+                except ValueError:
+                    self.error = f"Bad escape \\{self._escape}"
+                self._escape = None
+            return False
+        if char == '\\':
+            self._escape = ""
+            return False
+        if char == '"':
+            return True
+        self._append(char)
+        return False
+    
+    def _append(self, text: str) -> None:
+        if self._high_surrogate is not None:
+            self._chars.append('\ufffd')  # Unpaired high surrogate
+            self._high_surrogate = None
+        self._chars.append(text)
+    
+    def _append_code_unit(self, unit: int) -> None:
+        """Add a \\uXXXX code unit, joining UTF-16 surrogate pairs."""
+        if 0xD800 <= unit < 0xDC00:
+            self._high_surrogate = unit
+        elif 0xDC00 <= unit < 0xE000 and self._high_surrogate is not None:
+            self._chars.append(chr(0x10000 + ((self._high_surrogate - 0xD800) << 10) + (unit - 0xDC00)))
+            self._high_surrogate = None
+        else:
+            self._append(chr(unit))
+    
+    def _raw_char(self, char: str, updates: List[FieldUpdate]) -> None:
+        """Collect one character of a number, literal, object or array value."""
+        if self._raw_in_string:
+            self._raw.append(char)
+            if self._raw_escape:
+                self._raw_escape = False
+            elif char == '\\':
+                self._raw_escape = True
+            elif char == '"':
+                self._raw_in_string = False
+            return
+        
+        if self._raw_depth == 0 and (char in ',}' or char.isspace()):
+            # End of a scalar; the delimiter belongs to the enclosing object
+            self._complete_raw(updates)
+            if char == ',':
+                self._state = _KEY_WAIT
+            elif char == '}':
+                self._state = _DONE
+            return
+        
+        self._raw.append(char)
+        if char == '"':
+            self._raw_in_string = True
+        elif char in '{[':
+            self._raw_depth += 1
+        elif char in '}]':
+            self._raw_depth -= 1
+            if self._raw_depth == 0:
+                self._complete_raw(updates)
+    
+    def _complete_raw(self, updates: List[FieldUpdate]) -> None:
+        raw = "".join(self._raw)
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            self.error = f"Bad value for '{self.current_key}': {e}"
+            value = raw
+        self._complete(value, updates)
+    
+    def _complete(self, value: Any, updates: List[FieldUpdate]) -> None:
+        self.fields[self.current_key] = value
+        updates.append((self.current_key, value, True))
+        self.current_key = None
+        self._state = _VALUE_END
@@ -0,0 +1,417 @@
+"""
+Keyword Spotter Module
+Offline, key-free wake word engine: NumPy MFCC features matched against
+enrolled keyword templates with online subsequence DTW.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Optional, Sequence
+
+from .audio_buffer import to_float32
+from .vad import FrameVAD
+from .wake_word import WakeWordEngine
+
+
+def mel_filterbank(sample_rate: int, n_fft: int, n_mels: int, fmin: float = 20.0, fmax: Optional[float] = None) -> np.ndarray:
+    """
+    Triangular mel filters.
+    
+    Returns:
+        (n_mels, n_fft // 2 + 1) float32 matrix mapping power spectra to mel bands
+    """
+    fmax = fmax or sample_rate / 2
+    
+    def to_mel(hz):
+        return 2595.0 * np.log10(1.0 + np.asarray(hz) / 700.0)
+    
+    def to_hz(mel):
+        return 700.0 * (10 ** (np.asarray(mel) / 2595.0) - 1.0)
+    
+    edges = to_hz(np.linspace(to_mel(fmin), to_mel(fmax), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+class MFCCExtractor:
+    """
+    Batched MFCC front end.
+    
+    Every complete analysis frame in a block is windowed, transformed and
+    projected in one shot (one rfft call, two matrix products). Samples that
+    do not fill a whole hop are carried over to the next block, so streaming
+    and one-shot extraction give the same features.
+    """
+    
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: float = 25.0,
+        hop_ms: float = 10.0,
+        n_mels: int = 40,
+        n_mfcc: int = 13
+    ):
+        """
+        Initialize feature extractor.
+        
+        Args:
+            sample_rate: Audio sample rate
+            frame_ms: Analysis window length in milliseconds
+            hop_ms: Hop between frames in milliseconds
+            n_mels: Mel bands
+            n_mfcc: Cepstral coefficients kept (including c0)
+        """
+        self.sample_rate = sample_rate
+        self.win = int(sample_rate * frame_ms / 1000)
+        self.hop = int(sample_rate * hop_ms / 1000)
+        self.n_fft = 1 << (self.win - 1).bit_length()
+        self.window = np.hamming(self.win).astype(np.float32)
+        self.mel = mel_filterbank(sample_rate, self.n_fft, n_mels).T.copy()
+        
+        # DCT-II basis (orthonormal)
+        k = np.arange(n_mfcc)[:, None]
+        n = np.arange(n_mels)[None, :]
+        dct = np.sqrt(2.0 / n_mels) * np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels))
+        dct[0] /= np.sqrt(2.0)
+        self.dct = dct.T.astype(np.float32)
+        
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._pending = 0  # Samples carried over from the previous block
+        self.reset()
+    
+    def reset(self) -> None:
+        """Forget carried-over samples."""
+        self._pending = 0
+    
+    def process(self, samples: np.ndarray) -> tuple:
+        """
+        Extract features for every complete frame in a block.
+        
+        Args:
+            samples: 1-D int16 audio (or float audio in [-1, 1])
+        
+        Returns:
+            Tuple of (mfcc, rms): (n_frames, n_mfcc) features and (n_frames,) frame RMS
+        """
+        n = self._pending + len(samples)
+        if n > len(self._buffer):
+            grown = np.zeros(n, dtype=np.float32)
+            grown[:self._pending] = self._buffer[:self._pending]
+            self._buffer = grown
+        to_float32(samples, out=self._buffer[self._pending:n])
+        
+        n_frames = 0 if n < self.win else (n - self.win) // self.hop + 1
+        if n_frames == 0:
+            self._pending = n
+            return np.zeros((0, self.dct.shape[1]), dtype=np.float32), np.zeros(0, dtype=np.float32)
+        
+        frames = sliding_window_view(self._buffer[:n], self.win)[::self.hop][:n_frames]
+        rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / self.win)
+        spectrum = np.fft.rfft(frames * self.window, n=self.n_fft)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        mfcc = np.log(power.astype(np.float32) @ self.mel + 1e-6) @ self.dct
+        
+        # Keep the samples the next frame still needs
+        consumed = n_frames * self.hop
+        self._pending = n - consumed
+        self._buffer[:self._pending] = self._buffer[consumed:n]
+        return mfcc, rms.astype(np.float32)
+    
+    def extract(self, audio: np.ndarray) -> tuple:
+        """Features for a whole clip (resets the streaming state)."""
+        self.reset()
+        features = self.process(audio)
+        self.reset()
+        return features
+
+
+def _match_vectors(mfcc: np.ndarray, rms: np.ndarray, min_rms: float) -> np.ndarray:
+    """
+    Turn MFCCs into unit vectors for cosine matching.
+    
+    c0 (overall loudness) is dropped so the distance ignores gain; frames
+    quieter than `min_rms` become zero vectors, which match nothing.
+    """
+    vectors = mfcc[:, 1:].copy()
+    vectors -= vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.maximum(norms, 1e-6)
+    vectors[rms < min_rms] = 0.0
+    return vectors
+
+
+class LocalKeywordSpotter(WakeWordEngine):
+    """
+    Template-matching wake word engine.
+    
+    Each enrolled recording of the keyword becomes a template of MFCC unit
+    vectors. Incoming audio is scored against all templates at once with
+    online subsequence DTW: one matrix product gives the frame-to-template
+    cosine distances for a whole block, then the DTW recursion advances one
+    input frame at a time, vectorized over every template frame. A path may
+    start at any input frame and advances 0, 1 or 2 template frames per input
+    frame; the keyword fires when a path reaches the end of a template with
+    an average distance under `threshold`.
+    """
+    
+    def __init__(
+        self,
+        templates: Sequence[np.ndarray],
+        sample_rate: int = 16000,
+        threshold: float = 0.23,
+        block_ms: int = 80,
+        refractory: float = 1.0,
+        min_rms: float = 0.003
+    ):
+        """
+        Initialize spotter.
+        
+        Args:
+            templates: Keyword recordings (1-D int16 audio, trimmed to the keyword)
+            sample_rate: Audio sample rate
+            threshold: Average cosine distance (0-2) below which the keyword fires
+            block_ms: Audio handed to process() per call; longer blocks batch
+                more frames per matrix product at the cost of latency
+            refractory: Seconds after a detection during which no new one fires
+            min_rms: Frames quieter than this never match
+        """
+        if not templates:
+            raise ValueError("LocalKeywordSpotter needs at least one keyword template")
+        
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * block_ms / 1000)
+        self.threshold = threshold
+        self.min_rms = min_rms
+        self.features = MFCCExtractor(sample_rate=sample_rate)
+        self.refractory_frames = int(refractory * sample_rate / self.features.hop)
+        
+        # All templates side by side: one column block per template
+        vectors = [self._template_vectors(audio) for audio in templates]
+        self.templates = np.concatenate(vectors).T.copy()  # (n_dims, total_frames)
+        lengths = np.array([len(v) for v in vectors])
+        ends = np.cumsum(lengths) - 1
+        starts = ends - lengths + 1
+        self._ends = ends
+        self._max_length = 2 * lengths  # Longest accepted path per template (input frames)
+        
+        size = self.templates.shape[1]
+        self._is_start = np.zeros(size, dtype=bool)
+        self._is_start[starts] = True
+        self._no_skip = self._is_start.copy()
+        self._no_skip[starts[lengths > 1] + 1] = True  # A 2-step can't cross into the next template
+        
+        # DTW state: cumulative cost and path length per template frame
+        self._cost = np.zeros(size, dtype=np.float32)
+        self._length = np.zeros(size, dtype=np.float32)
+        self._candidates = np.zeros((3, size), dtype=np.float32)
+        self._candidate_lengths = np.zeros((3, size), dtype=np.float32)
+        self.reset()
+        
+        self.last_score = float("inf")
+        self.frames_processed = 0
+    
+    def _template_vectors(self, audio: np.ndarray) -> np.ndarray:
+        mfcc, rms = self.features.extract(audio)
+        vectors = _match_vectors(mfcc, rms, self.min_rms)
+        voiced = np.flatnonzero(rms >= self.min_rms)
+        if len(voiced) == 0:
+            raise ValueError("Keyword template contains no audio above the noise floor")
+        return vectors[voiced[0]:voiced[-1] + 1]
+    
+    @classmethod
+    def from_file(cls, path: str, sample_rate: int = 16000, **kwargs) -> "LocalKeywordSpotter":
+        """
+        Load templates saved by enroll() / `python -m modules.keyword_spotter enroll`.
+        
+        Templates recorded at another rate (e.g. enrolled from 44.1 kHz WAV
+        files) are resampled, so the spotter always listens at `sample_rate`,
+        the rate the wake word hand-off and speech-to-text expect.
+        """
+        data = np.load(path)
+        enrolled_rate = int(data["sample_rate"])
+        templates = [
+            resample(data[key], enrolled_rate, sample_rate)
+            for key in sorted(data.files) if key.startswith("template_")
+        ]
+        return cls(templates, sample_rate=sample_rate, **kwargs)
+    
+    def reset(self) -> None:
+        """Drop all partial matches."""
+        self._cost.fill(np.inf)
+        self._length.fill(0)
+        self._holdoff = 0
+        self.features.reset()
+    
+    def _step(self, distances: np.ndarray) -> float:
+        """
+        Advance the DTW by one input frame.
+        
+        Args:
+            distances: Cosine distance of the frame to every template frame
+        
+        Returns:
+            Best average distance over complete template matches
+        """
+        cost, length = self._cost, self._length
+        cand, cand_len = self._candidates, self._candidate_lengths
+        
+        # Predecessors: stay on j, come from j-1, come from j-2
+        cand[0] = cost
+        cand_len[0] = length
+        cand[1, 1:] = cost[:-1]
+        cand_len[1, 1:] = length[:-1]
+        cand[2, 2:] = cost[:-2]
+        cand_len[2, 2:] = length[:-2]
+        cand[1, self._is_start] = 0.0  # Subsequence DTW: a match may start anywhere
+        cand_len[1, self._is_start] = 0.0
+        cand[2, self._no_skip] = np.inf
+        
+        cand += distances
+        cand_len += 1
+        average = cand / cand_len
+        best = np.argmin(average, axis=0)
+        columns = np.arange(len(cost))
+        cost[:] = cand[best, columns]
+        length[:] = cand_len[best, columns]
+        
+        # Complete matches, ignoring paths stretched past twice the template length
+        end_lengths = length[self._ends]
+        scores = np.where(end_lengths <= self._max_length, cost[self._ends] / end_lengths, np.inf)
+        return float(scores.min())
+    
+    def process(self, pcm: np.ndarray) -> int:
+        """
+        Feed one block of audio.
+        
+        Args:
+            pcm: 1-D int16 audio (`frame_length` samples)
+        
+        Returns:
+            0 if the keyword ended in this block, -1 otherwise
+        """
+        mfcc, rms = self.features.process(pcm)
+        if len(mfcc) == 0:
+            return -1
+        vectors = _match_vectors(mfcc, rms, self.min_rms)
+        distances = 1.0 - vectors @ self.templates  # All frames x all template frames
+        
+        detected = -1
+        for row in distances:
+            self.frames_processed += 1
+            score = self._step(row)
+            if self._holdoff > 0:
+                self._holdoff -= 1
+                continue
+            self.last_score = min(self.last_score, score)
+            if score < self.threshold:
+                detected = 0
+                self._cost.fill(np.inf)
+                self._holdoff = self.refractory_frames
+        return detected
+    
+    def delete(self) -> None:
+        pass
+
+
+def resample(audio: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """
+    Band-limited resampling of int16 audio (FFT method).
+    
+    Content above the new Nyquist frequency is dropped rather than folded
+    back into the band the MFCCs look at.
+    """
+    if from_rate == to_rate or len(audio) == 0:
+        return audio
+    n = int(round(len(audio) * to_rate / from_rate))
+    spectrum = np.fft.rfft(audio.astype(np.float64))
+    resampled = np.fft.irfft(spectrum[:n // 2 + 1], n) * (n / len(audio))
+    return np.clip(np.round(resampled), -32768, 32767).astype(np.int16)
+
+
+def trim_to_speech(audio: np.ndarray, sample_rate: int = 16000, padding: float = 0.05) -> np.ndarray:
+    """Cut a recording down to its voiced span (plus a little padding)."""
+    vad = FrameVAD(sample_rate=sample_rate)
+    voiced = np.flatnonzero(vad.process(audio))
+    if len(voiced) == 0:
+        return audio
+    pad = int(padding * sample_rate)
+    start = max(0, voiced[0] * vad.frame_length - pad)
+    end = min(len(audio), (voiced[-1] + 1) * vad.frame_length + pad)
+    return audio[start:end]
+
+
+def enroll(recordings: List[np.ndarray], path: str, keyword: str, sample_rate: int = 16000) -> None:
+    """
+    Save keyword templates.
+    
+    Args:
+        recordings: int16 recordings of the keyword (silence is trimmed)
+        path: Output .npz path
+        keyword: Keyword name stored with the templates
+        sample_rate: Sample rate of the recordings
+    """
+    templates = {f"template_{i}": trim_to_speech(audio, sample_rate) for i, audio in enumerate(recordings)}
+    np.savez(path, keyword=keyword, sample_rate=sample_rate, **templates)
+
+
+def _read_wav(path: str) -> tuple:
+    """Read a mono 16-bit WAV file as (int16 audio, sample rate)."""
+    import wave
+    with wave.open(path, 'rb') as wav:
+        audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        if wav.getnchannels() > 1:
+            audio = audio[::wav.getnchannels()]
+        return audio, wav.getframerate()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sounddevice as sd
+    
+    parser = argparse.ArgumentParser(description="Enroll or test the local wake word spotter")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    enroll_parser = sub.add_parser("enroll", help="Record keyword templates")
+    enroll_parser.add_argument("output", help="Template file to write (.npz)")
+    enroll_parser.add_argument("--keyword", default="jarvis")
+    enroll_parser.add_argument("--count", type=int, default=3, help="Recordings to take from the microphone")
+    enroll_parser.add_argument("--seconds", type=float, default=1.5, help="Length of each recording")
+    enroll_parser.add_argument("--wav", nargs="*", help="Use these WAV files instead of the microphone")
+    
+    test_parser = sub.add_parser("test", help="Listen on the microphone and report detections")
+    test_parser.add_argument("templates", help="Template file (.npz)")
+    test_parser.add_argument("--threshold", type=float, default=0.23)
+    
+    args = parser.parse_args()
+    rate = 16000
+    
+    if args.command == "enroll":
+        if args.wav:
+            recordings = []
+            for wav_path in args.wav:
+                audio, rate = _read_wav(wav_path)
+                recordings.append(audio)
+        else:
+            recordings = []
+            for i in range(args.count):
+                input(f"[{i + 1}/{args.count}] Press Enter, then say '{args.keyword}'...")
+                audio = sd.rec(int(args.seconds * rate), samplerate=rate, channels=1, dtype='int16')
+                sd.wait()
+                recordings.append(audio[:, 0])
+        enroll(recordings, args.output, args.keyword, sample_rate=rate)
+        print(f"Saved {len(recordings)} templates to {args.output}")
+    
+    else:
+        spotter = LocalKeywordSpotter.from_file(args.templates, threshold=args.threshold)
+        print("Listening... (Ctrl+C to stop)")
+        try:
+            with sd.InputStream(samplerate=spotter.sample_rate, channels=1, dtype='int16', blocksize=spotter.frame_length) as stream:
+                while True:
+                    frame, _ = stream.read(spotter.frame_length)
+                    if spotter.process(frame[:, 0]) >= 0:
+                        print(f">>> Keyword detected (score {spotter.last_score:.3f})")
+                        spotter.last_score = float("inf")
+        except KeyboardInterrupt:
+            print("\nStopped.")
@@ -1,9 +1,79 @@
 """
 LLM Brain Module
 Uses Ollama for local language model inference with tool calling.
+
+Two ways of getting a tool call out of the model:
+- JSON mode: the system prompt describes every tool, and a JSON schema
+  passed as format= constrains the model to exactly one
+  {"tool": ..., ..., "response": ...} object (Ollama >= 0.5; older
+  servers get format="json").
+- Native tool calling: the tools that may be relevant to the utterance
+  are passed as function schemas (tools=), and the model either calls one
+  or answers in plain text. Replies are rewritten into the JSON-mode
+  object as they stream, so callers see the same format either way.
+
+process() parses the finished reply once into an LLMResponse, checked
+against the response schema.
+
+aprocess() / aprocess_stream() are the asyncio versions. They give every
+request a deadline, fall back to a smaller model when it passes, and can
+be cancelled from any thread while still waiting on Ollama.
 """
+import asyncio
+import json
+import threading
 import ollama
-from typing import List, Dict, Optional
+from typing import Any, AsyncIterator, Callable, Iterator, List, Dict, Optional, Tuple, Union
+
+from .history import ConversationHistory
+from .llm_response import LLMResponse
+from .response_cache import ResponseCache
+
+ERROR_REPLY = "I apologize, but I encountered an error processing your request."
+
+SUMMARY_REQUEST = (
+    "Summarise our conversation so far for your own memory, in at most five sentences of plain text "
+    "(no JSON). Keep facts about the user, their requests and the outcome of each action."
+)
+
+
+class _ToolReplyWriter:
+    """Rewrites a streamed native tool-calling reply as a JSON-mode object."""
+    
+    def __init__(self):
+        self.opened = False  # Streaming plain text as a "none" object
+        self.call: Optional[Any] = None  # First tool call (one action per request)
+    
+    def feed(self, message: Any) -> str:
+        """JSON text for one streamed message chunk."""
+        text = ""
+        content = message.get('content') or ""
+        if not self.opened:
+            content = content.lstrip()
+        if content:
+            text = ("" if self.opened else '{"tool": "none", "response": "') + json.dumps(content)[1:-1]
+            self.opened = True
+        for call in message.get('tool_calls') or []:
+            if self.call is None:
+                self.call = call['function']
+        return text
+    
+    def finish(self) -> str:
+        """
+        The rest of the object once the stream has ended.
+        
+        A tool call that follows streamed text repeats "tool"; the later key
+        wins in json.loads() and StreamingJSONParser alike.
+        """
+        fields: Dict[str, Any] = {}
+        if self.call is not None:
+            fields = {"tool": self.call['name'], **(self.call.get('arguments') or {})}
+        if not self.opened:
+            fields.setdefault("tool", "none")
+            fields.setdefault("response", "")
+            return json.dumps(fields)
+        fields.pop("response", None)  # What was said is already in the streamed text
+        return '"' + "".join(f", {json.dumps(k)}: {json.dumps(v)}" for k, v in fields.items()) + "}"
 
 
 class LLMBrain:
@@ -13,7 +83,18 @@ class LLMBrain:
         self,
         model: str = "llama3.2:3b",
         system_prompt: str = "",
-        max_history: int = 10
+        max_history: int = 10,
+        evict_turns: Optional[int] = None,
+        history_tokens: Optional[int] = None,
+        summary_idle: float = 2.0,
+        host: Optional[str] = None,
+        keep_alive: Union[str, float] = "30m",
+        timeout: Optional[float] = 120.0,
+        response_cache: Optional[ResponseCache] = None,
+        tool_selector: Optional[Callable[[str], List[Dict[str, Any]]]] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
+        fallback_model: Optional[str] = None
     ):
         """
         Initialize LLM brain.
@@ -21,92 +102,586 @@ class LLMBrain:
         Args:
             model: Ollama model name
             system_prompt: System prompt for the model
-            max_history: Maximum conversation history to maintain
+            max_history: Maximum conversation history to maintain (turns)
+            evict_turns: Turns dropped at once when the history is full
+                (default: half of max_history), so the prompt prefix the
+                server has cached stays valid between evictions
+            history_tokens: Token budget for the history; older turns beyond
+                it are summarised in the background. None disables.
+            summary_idle: Seconds without a request before summarising starts
+            host: Ollama server URL (None = OLLAMA_HOST or localhost)
+            keep_alive: How long Ollama keeps the model loaded after each
+                request ("30m", seconds, or -1 for forever)
+            timeout: Seconds before a request to Ollama is abandoned (None = never)
+            response_cache: Tool calls to reuse for repeated requests instead
+                of generating them again
+            tool_selector: Maps an utterance to the function schemas to offer
+                the model (e.g. ToolExecutor.tools_for); enables native tool
+                calling instead of JSON mode. The system prompt should then
+                not describe the tools itself.
+            response_schema: JSON schema for replies (e.g.
+                ToolExecutor.response_schema()), passed as format= in JSON
+                mode and checked against every reply; None accepts any JSON
+                object
+            deadline: Seconds the async API waits for the first token (and
+                between tokens) before giving up on a model (None = no limit)
+            fallback_model: Smaller model the async API retries with when
+                `model` misses the deadline
         """
         self.model = model
         self.system_prompt = system_prompt
         self.max_history = max_history
-        self.conversation_history: List[Dict[str, str]] = []
+        self.keep_alive = keep_alive
+        self.history = ConversationHistory(
+            max_turns=max_history,
+            evict_turns=evict_turns,
+            token_budget=history_tokens
+        )
+        self.summary_idle = summary_idle
+        self.response_cache = response_cache
+        self.tool_selector = tool_selector
+        self.response_schema = response_schema
+        self._schema_format = response_schema is not None  # False once the server refused it
+        self.deadline = deadline
+        self.fallback_model = fallback_model
+        self.deadline_stats: Dict[str, int] = {"deadline_misses": 0, "fallbacks": 0, "stalls": 0}
+        self.last_cached = False  # The last reply came from response_cache
+        self._cancel = threading.Event()
+        self._busy = threading.Event()  # Set while a request is in flight
+        self._prewarm_thread: Optional[threading.Thread] = None
+        self._compaction_timer: Optional[threading.Timer] = None
+        self._task: Optional[asyncio.Task] = None  # Async request in flight
+        self._task_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # One client for the session: its HTTP connection pool is reused
+        # across turns instead of reconnecting per request
+        self.client = ollama.Client(host=host, timeout=timeout)
+        self.async_client = ollama.AsyncClient(host=host, timeout=timeout)
         
         # Verify Ollama is running and model exists
         try:
-            ollama.list()
+            self.client.list()
             print(f"Ollama connected. Using model: {model}")
         except Exception as e:
             print(f"Warning: Could not connect to Ollama: {e}")
             print("Make sure Ollama is installed and running.")
     
-    def process(self, user_input: str) -> str:
+    def warmup(self) -> None:
+        """
+        Load the model into Ollama and evaluate the system prompt once.
+        
+        Generates a single token so the first real request neither waits for
+        the model to load nor re-evaluates the whole system prompt (or the
+        history so far, when re-warming mid-conversation).
+        """
+        try:
+            messages = self.history.build(self.system_prompt)
+            messages.append({"role": "user", "content": "Hello"})
+            self.client.chat(
+                model=self.model,
+                messages=messages,
+                options={"num_predict": 1},
+                keep_alive=self.keep_alive
+            )
+        except Exception as e:
+            print(f"Ollama warm-up failed: {e}")
+    
+    def prewarm(self) -> None:
+        """
+        Start warmup() in the background (e.g. on the wake word).
+        
+        If the model was evicted while idle it reloads while the user is
+        still speaking; if it is loaded this costs a single token.
+        """
+        if self._prewarm_thread and self._prewarm_thread.is_alive():
+            return
+        self._prewarm_thread = threading.Thread(target=self.warmup, name="ollama-prewarm", daemon=True)
+        self._prewarm_thread.start()
+    
+    def process(self, user_input: str) -> Optional[LLMResponse]:
         """
         Process user input and generate response.
         
         Args:
             user_input: User's text input
-            
+        
+        Returns:
+            The parsed reply, or None if cancel() was called meanwhile
+        """
+        response = "".join(self.process_stream(user_input))
+        return None if self._cancel.is_set() else self.parse_reply(response)
+    
+    def parse_reply(self, text: str, fields: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        """
+        Parse and check a complete reply from process_stream().
+        
+        The output format makes malformed replies rare; one (or a reply that
+        does not match the response schema) is answered with an apology
+        rather than guessed at.
+        
+        Args:
+            text: Reply text as streamed
+            fields: The reply's fields if already decoded (e.g.
+                StreamingJSONParser.fields), so it is not parsed again
+        
         Returns:
-            LLM response (JSON string)
+            The parsed reply
         """
         try:
-            # Add user message to history
-            self.conversation_history.append({
-                "role": "user",
-                "content": user_input
-            })
-            
-            # Trim history if too long
-            if len(self.conversation_history) > self.max_history * 2:
-                # Keep system prompt and recent messages
-                self.conversation_history = self.conversation_history[-(self.max_history * 2):]
-            
-            # Build messages
-            messages = []
+            if fields is not None:
+                return LLMResponse.from_fields(fields, self.response_schema)
+            return LLMResponse.from_json(text, self.response_schema)
+        except ValueError as e:
+            print(f"Malformed LLM reply ({e}): {text[:200]}")
+            return LLMResponse(response=ERROR_REPLY)
+    
+    def tool_call(self, fields: Dict[str, Any]) -> Optional[LLMResponse]:
+        """
+        The tool call in a partly streamed reply, once it is complete and valid.
+        
+        Args:
+            fields: Fields decoded so far, all parameters included
+        
+        Returns:
+            The call (with an empty "response"), or None if it does not
+            match the response schema
+        """
+        try:
+            return LLMResponse.from_fields({**fields, "response": ""}, self.response_schema)
+        except ValueError:
+            return None
+    
+    def process_stream(self, user_input: str) -> Iterator[str]:
+        """
+        Process user input, yielding the response as it is generated.
+        
+        Feed the tokens to a StreamingJSONParser to act on "tool" and the
+        growing "response" before generation ends. The full reply is added
+        to the history once the stream completes.
+        
+        Args:
+            user_input: User's text input
+        
+        Yields:
+            Response text pieces (JSON fragments) in order
+        """
+        yielded = False
+        pending = False  # User message added but not yet answered
+        try:
+            cached = self._begin(user_input)
+            pending = True
+            if cached is not None:
+                yielded = True
+                yield cached
+                self._add_reply(cached)
+                pending = False
+                return
             
-            # Add system prompt
-            if self.system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": self.system_prompt
-                })
+            # Streamed, so tokens reach the caller as they are generated and
+            # cancel() can stop generation between them
+            while True:
+                messages, writer, request = self._request(user_input, self.model)
+                stream = self.client.chat(**request)
+                
+                parts = []
+                generated = None
+                try:
+                    for chunk in stream:
+                        if self._cancel.is_set():
+                            # Closing the stream drops the connection, which stops Ollama generating
+                            stream.close()
+                            print("LLM generation cancelled.")
+                            return
+                        token, count = self._read_chunk(chunk, writer, messages)
+                        generated = count if count is not None else generated
+                        if token:
+                            parts.append(token)
+                            yielded = True
+                            yield token
+                except ollama.ResponseError as e:
+                    if yielded or not self._schema_rejected(e, request):
+                        raise
+                    continue  # Same request in plain JSON mode
+                break
+            if writer:
+                parts.append(writer.finish())
+                yielded = True
+                yield parts[-1]
             
-            # Add conversation history
-            messages.extend(self.conversation_history)
+            self._finish(user_input, "".join(parts), generated)
+            pending = False
+        
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            if not yielded:
+                # Return error as JSON
+                yield LLMResponse(response=ERROR_REPLY).to_json()
+        finally:
+            self._end(pending)
+    
+    async def aprocess(self, user_input: str, deadline: Optional[float] = None) -> LLMResponse:
+        """
+        Async process(): generate and parse the reply to user input.
+        
+        Args:
+            user_input: User's text input
+            deadline: Overrides the brain's deadline for this request
+        
+        Returns:
+            The parsed reply
+        
+        Raises:
+            asyncio.CancelledError: If cancel() was called (or the task was cancelled)
+        """
+        parts = [token async for token in self.aprocess_stream(user_input, deadline)]
+        return self.parse_reply("".join(parts))
+    
+    async def aprocess_stream(self, user_input: str, deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Async process_stream(), with a deadline and a fallback model.
+        
+        The deadline covers the wait for the first token (model load and
+        prompt evaluation included) and every gap between tokens. If it
+        passes before anything was yielded, the request is repeated on the
+        fallback model; a reply that stalls part-way is ended where it is.
+        cancel() interrupts the request even while it is waiting on Ollama.
+        
+        All async calls must come from the same event loop.
+        
+        Args:
+            user_input: User's text input
+            deadline: Seconds, overriding the brain's deadline (None = the brain's)
+        
+        Yields:
+            Response text pieces (JSON fragments) in order
+        
+        Raises:
+            asyncio.CancelledError: If cancel() was called (or the task was cancelled)
+        """
+        deadline = self.deadline if deadline is None else deadline
+        self._task = asyncio.current_task()
+        self._task_loop = asyncio.get_running_loop()
+        yielded = False
+        pending = False
+        try:
+            cached = self._begin(user_input)
+            pending = True
+            if cached is not None:
+                yielded = True
+                yield cached
+                self._add_reply(cached)
+                pending = False
+                return
             
-            # Get response from Ollama
-            response = ollama.chat(
+            models = [self.model]
+            if self.fallback_model and self.fallback_model != self.model:
+                models.append(self.fallback_model)
+            attempt = 0
+            while attempt < len(models):
+                model = models[attempt]
+                messages, writer, request = self._request(user_input, model)
+                stream = await self.async_client.chat(**request)
+                parts = []
+                generated = None
+                try:
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(stream.__anext__(), deadline)
+                        except StopAsyncIteration:
+                            break
+                        token, count = self._read_chunk(chunk, writer, messages)
+                        generated = count if count is not None else generated
+                        if token:
+                            parts.append(token)
+                            yielded = True
+                            yield token
+                except asyncio.TimeoutError:
+                    if yielded:
+                        self.deadline_stats["stalls"] += 1
+                        print(f"⏱  {model} stalled for {deadline:g}s mid-reply - ending it there")
+                        return
+                    self.deadline_stats["deadline_misses"] += 1
+                    if attempt + 1 < len(models):
+                        self.deadline_stats["fallbacks"] += 1
+                        print(f"⏱  {model} gave no reply within {deadline:g}s - falling back to {models[attempt + 1]}")
+                        attempt += 1
+                        continue
+                    print(f"⏱  {model} gave no reply within {deadline:g}s")
+                    yielded = True
+                    yield LLMResponse(response=ERROR_REPLY).to_json()
+                    return
+                except ollama.ResponseError as e:
+                    if yielded or not self._schema_rejected(e, request):
+                        raise
+                    continue  # Same model in plain JSON mode
+                finally:
+                    # Drops the connection if unfinished, which stops Ollama generating
+                    await stream.aclose()
+                
+                if writer:
+                    parts.append(writer.finish())
+                    yielded = True
+                    yield parts[-1]
+                self._finish(user_input, "".join(parts), generated)
+                pending = False
+                return
+        
+        except asyncio.CancelledError:
+            print("LLM generation cancelled.")
+            raise
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            if not yielded:
+                yield LLMResponse(response=ERROR_REPLY).to_json()
+        finally:
+            self._task = None
+            self._end(pending)
+    
+    def _begin(self, user_input: str) -> Optional[str]:
+        """
+        Start a request: pause background summaries and add the user message.
+        
+        Args:
+            user_input: User's text input
+        
+        Returns:
+            The cached reply to replay, if the response cache has one
+        """
+        self._cancel.clear()
+        self._busy.set()  # Also aborts a background summary in progress
+        if self._compaction_timer:
+            self._compaction_timer.cancel()
+        
+        # Summaries fell far behind (e.g. one huge tool result): drop the oldest turns now
+        budget = self.history.token_budget
+        if budget and self.history.enforce_limit(budget * 2):
+            print("History far over its token budget - oldest turns dropped without summarising.")
+        
+        # Add user message to history (full history is evicted in blocks)
+        self.history.add("user", user_input)
+        
+        cached = self.response_cache.get(user_input) if self.response_cache is not None else None
+        self.last_cached = cached is not None
+        return cached
+    
+    def _request(
+        self,
+        user_input: str,
+        model: str
+    ) -> Tuple[List[Dict[str, Any]], Optional[_ToolReplyWriter], Dict[str, Any]]:
+        """
+        Build the streamed chat request.
+        
+        Returns:
+            (messages sent, writer for native tool-call replies or None,
+            keyword arguments for chat())
+        """
+        # System prompt + history: identical prefix to the previous request
+        messages = self.history.build(self.system_prompt)
+        
+        if self.tool_selector is not None:
+            # Only the tools this utterance may need: fewer prompt tokens
+            # than describing all of them in the system prompt
+            writer: Optional[_ToolReplyWriter] = _ToolReplyWriter()
+            output = {"tools": self.tool_selector(user_input) or None}
+        else:
+            writer = None
+            # Constrain the reply
+            output = {"format": self.response_schema if self._schema_format else "json"}
+        
+        request = {
+            "model": model,
+            "messages": messages,
+            "options": {
+                "temperature": 0.3,  # Lower for more consistent JSON formatting
+                "top_p": 0.9,
+            },
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            **output,
+        }
+        return messages, writer, request
+    
+    def _schema_rejected(self, error: Exception, request: Dict[str, Any]) -> bool:
+        """
+        Fall back to plain JSON mode if the server refused the response schema.
+        
+        Ollama servers before 0.5 only accept format="json". The schema is
+        dropped for the rest of the session.
+        
+        Returns:
+            True if the request used a schema and should be retried without it
+        """
+        if not isinstance(request.get("format"), dict):
+            return False
+        print(f"⚠️  Ollama rejected the response schema ({error}) - using plain JSON mode (schemas need Ollama >= 0.5)")
+        self._schema_format = False  # Replies are still checked against it
+        return True
+    
+    def _read_chunk(
+        self,
+        chunk: Any,
+        writer: Optional[_ToolReplyWriter],
+        messages: List[Dict[str, Any]]
+    ) -> Tuple[str, Optional[int]]:
+        """
+        Text of one streamed chunk, recording the stats carried by the last one.
+        
+        Returns:
+            (text to pass on, generated token count if this is the final chunk)
+        """
+        generated = None
+        if chunk.get('done'):
+            self._record_prompt_stats(chunk, messages)
+            generated = chunk.get('eval_count')
+        token = writer.feed(chunk['message']) if writer else chunk['message']['content']
+        return token, generated
+    
+    def _finish(self, user_input: str, reply: str, generated: Optional[int]) -> None:
+        """Store a completed reply in the history, and in the response cache if it is valid."""
+        # Add assistant response to history, exactly as generated
+        self._add_reply(reply, tokens=generated)
+        if self.response_cache is not None:
+            try:
+                LLMResponse.from_json(reply, self.response_schema)
+            except ValueError:
+                return  # Never replay a reply that would be refused
+            self.response_cache.put(user_input, reply)
+    
+    def _end(self, pending: bool) -> None:
+        """Finish a request, whether it completed or not."""
+        if pending:
+            # Cancelled, failed, or the caller stopped reading: forget the unanswered turn
+            self.history.pop()
+        self._busy.clear()
+        self._schedule_compaction()
+    
+    def remember(self, user_input: str, response: LLMResponse) -> None:
+        """
+        Add a turn answered without the model (e.g. by the intent router).
+        
+        Keeps follow-up questions in context; appending leaves the cached
+        prefix intact.
+        
+        Args:
+            user_input: User's text input
+            response: The reply given
+        """
+        if self._busy.is_set():
+            return
+        if self._compaction_timer:
+            self._compaction_timer.cancel()
+        self.history.add("user", user_input)
+        self._add_reply(response.to_json())
+        self._schedule_compaction()
+    
+    def _add_reply(self, reply: str, tokens: Optional[int] = None) -> None:
+        """
+        Add the assistant's reply to the history as the model produced it.
+        
+        In JSON mode that is the JSON text itself; with native tool calling
+        it is a tool call message (or plain text for conversation).
+        
+        Args:
+            reply: Reply in the JSON-mode format
+            tokens: Exact token count if known
+        """
+        if self.tool_selector is None:
+            self.history.add("assistant", reply, tokens=tokens)
+            return
+        try:
+            data = json.loads(reply)
+            tool = data.pop("tool", "none")
+        except (json.JSONDecodeError, AttributeError):
+            self.history.add("assistant", reply, tokens=tokens)
+            return
+        if tool == "none":
+            self.history.add("assistant", str(data.get("response", "")), tokens=tokens)
+        else:
+            call = {"function": {"name": tool, "arguments": data}}
+            self.history.add("assistant", "", tokens=tokens, tool_calls=[call])
+    
+    def _schedule_compaction(self) -> None:
+        """Summarise old turns once no request has arrived for summary_idle seconds."""
+        if not self.history.over_budget():
+            return
+        self._compaction_timer = threading.Timer(self.summary_idle, self._compact)
+        self._compaction_timer.daemon = True
+        self._compaction_timer.start()
+    
+    def _compact(self) -> None:
+        """
+        Fold the oldest turns into the running summary (idle timer thread).
+        
+        The request reuses the conversation's own prefix, so the server's
+        cache covers everything but the instruction. It is abandoned as
+        soon as a real request starts and retried at the next idle period.
+        """
+        compacted = self.history.take_for_compaction()
+        if not compacted or self._busy.is_set():
+            return
+        
+        prefix = self.history.build(self.system_prompt)
+        keep = len(prefix) - len(self.history) + len(compacted)  # System messages + compacted turns
+        messages = prefix[:keep] + [{"role": "user", "content": SUMMARY_REQUEST}]
+        try:
+            stream = self.client.chat(
                 model=self.model,
                 messages=messages,
-                options={
-                    "temperature": 0.3,  # Lower for more consistent JSON formatting
-                    "top_p": 0.9,
-                },
-                format="json"  # Force JSON output mode
+                options={"temperature": 0.2, "num_predict": 200},
+                stream=True,
+                keep_alive=self.keep_alive
             )
-            
-            # Extract response text
-            assistant_message = response['message']['content']
-            
-            # Add assistant response to history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
-            
-            return assistant_message
-            
+            parts = []
+            for chunk in stream:
+                if self._busy.is_set():
+                    stream.close()
+                    return
+                parts.append(chunk['message']['content'])
         except Exception as e:
-            print(f"LLM Error: {e}")
-            # Return error as JSON
-            error_response = '{"tool": "none", "response": "I apologize, but I encountered an error processing your request."}'
-            return error_response
+            print(f"History summary failed: {e}")
+            return
+        
+        summary = "".join(parts).strip()
+        if summary and self.history.apply_summary(summary, compacted):
+            print(f"🗜  Summarised {len(compacted)} earlier messages ({self.history.total_tokens} history tokens)")
+    
+    def _record_prompt_stats(self, response: Any, messages: List[Dict[str, Any]]) -> None:
+        stats = self.history.record(response, messages)
+        if stats:
+            print(
+                f"🧠 Prompt: {stats['prompt_eval_count']} tokens evaluated in "
+                f"{stats['prompt_eval_seconds'] * 1000:.0f} ms (~{stats['cache_hit_rate']:.0%} cached)"
+            )
+    
+    @property
+    def conversation_history(self) -> List[Dict[str, Any]]:
+        """Messages in the history (oldest first)."""
+        return self.history.messages
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Prompt evaluation totals, estimated KV-cache hit rate, deadline and response cache counts."""
+        stats: Dict[str, Any] = self.history.get_stats()
+        stats.update(self.deadline_stats)
+        if self.response_cache is not None:
+            stats["response_cache"] = self.response_cache.get_stats()
+        return stats
+    
+    def cancel(self) -> None:
+        """Abandon the request in progress, sync or async (safe from any thread)."""
+        self._cancel.set()
+        task, loop = self._task, self._task_loop
+        if task is not None and loop is not None:
+            loop.call_soon_threadsafe(task.cancel)
     
     def reset_conversation(self) -> None:
         """Clear conversation history."""
-        self.conversation_history = []
+        self.history.clear()
         print("Conversation history cleared.")
     
     def get_history_length(self) -> int:
         """Get number of messages in history."""
-        return len(self.conversation_history)
+        return len(self.history)
     
     def set_system_prompt(self, prompt: str) -> None:
         """Update system prompt."""
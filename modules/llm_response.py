@@ -0,0 +1,144 @@
+"""
+LLM Response Module
+The parsed form of one reply from the model (or the intent router).
+
+The model writes a flat JSON object - {"tool": ..., <parameters>...,
+"response": ...} - constrained by the schema from
+ToolExecutor.response_schema(). It is parsed and checked once, into an
+LLMResponse, which is what ToolExecutor and the GUI work with. The check
+uses the same schema, because replies do not always come out of
+constrained decoding: older Ollama servers ignore it, native tool calls
+are rewritten into this shape, and cached replies are replayed.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+}
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = "reply") -> None:
+    """
+    Check a decoded value against a JSON schema.
+    
+    Supports the subset ToolExecutor.response_schema() uses: anyOf, type,
+    enum, properties, required and additionalProperties.
+    
+    Args:
+        value: Decoded JSON value
+        schema: Schema to check against
+        path: Where the value is, for error messages
+    
+    Raises:
+        ValueError: If the value does not match
+    """
+    if "anyOf" in schema:
+        _validate_any(value, schema["anyOf"], path)
+        return
+    
+    expected = schema.get("type")
+    if expected in _TYPES:
+        # bool is an int in Python, but not in JSON
+        wrong_bool = isinstance(value, bool) and expected in ("integer", "number")
+        if wrong_bool or not isinstance(value, _TYPES[expected]):
+            raise ValueError(f"{path} should be {expected}, got {type(value).__name__}")
+    if "enum" in schema and value not in schema["enum"]:
+        raise ValueError(f"{path} is {value!r}, expected one of {schema['enum']}")
+    
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in value:
+                raise ValueError(f"{path} is missing {key!r}")
+        for key, item in value.items():
+            if key in properties:
+                validate(item, properties[key], f"{path}.{key}")
+            elif schema.get("additionalProperties", True) is False:
+                raise ValueError(f"{path} has unexpected {key!r}")
+
+
+def _validate_any(value: Any, branches: List[Dict[str, Any]], path: str) -> None:
+    """anyOf: the value must match one branch (reported against the branch for its "tool")."""
+    errors = []
+    for branch in branches:
+        try:
+            validate(value, branch, path)
+            return
+        except ValueError as e:
+            errors.append((branch, e))
+    
+    # Tool branches fix "tool" to one name: report why the named tool's branch failed
+    tool = value.get("tool") if isinstance(value, dict) else None
+    for branch, error in errors:
+        if tool in branch.get("properties", {}).get("tool", {}).get("enum", ()):
+            raise error
+    if tool is not None:
+        raise ValueError(f"{path} names unknown tool {tool!r}")
+    raise ValueError(f"{path} matches none of the allowed shapes ({errors[0][1]})")
+
+
+@dataclass
+class LLMResponse:
+    """A tool call and what to say about it ("none" for plain conversation)."""
+    
+    tool: str = "none"
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    response: str = ""
+    
+    @classmethod
+    def from_fields(cls, fields: Dict[str, Any], schema: Optional[Dict[str, Any]] = None) -> "LLMResponse":
+        """
+        Build from the flat object's fields.
+        
+        Args:
+            fields: Decoded top-level fields, e.g. StreamingJSONParser.fields
+            schema: Reply schema to check the fields against (None = accept
+                anything; values are converted leniently)
+        
+        Returns:
+            The response; a missing "tool" means "none"
+        
+        Raises:
+            ValueError: If a schema was given and the fields do not match it
+        """
+        if schema is not None:
+            validate(fields, schema)
+        parameters = dict(fields)
+        tool = parameters.pop("tool", None) or "none"
+        response = parameters.pop("response", None) or ""
+        return cls(tool=str(tool), parameters=parameters, response=str(response))
+    
+    @classmethod
+    def from_json(cls, text: str, schema: Optional[Dict[str, Any]] = None) -> "LLMResponse":
+        """
+        Parse a reply written as one JSON object.
+        
+        Args:
+            text: The reply exactly as generated
+            schema: Reply schema to check it against, e.g.
+                ToolExecutor.response_schema() (None = any object)
+        
+        Returns:
+            The parsed response
+        
+        Raises:
+            ValueError: If the text is not a single JSON object of the expected shape
+        """
+        data = json.loads(text)  # json.JSONDecodeError is a ValueError
+        if not isinstance(data, dict):
+            raise ValueError(f"Reply is not a JSON object: {text[:100]}")
+        return cls.from_fields(data, schema)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """The flat object, parameters between "tool" and "response"."""
+        return {"tool": self.tool, **self.parameters, "response": self.response}
+    
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
@@ -0,0 +1,236 @@
+"""
+Response Cache Module
+Reuses the LLM's tool calls for requests it has already answered.
+
+Entries are keyed on the normalised utterance ("Open Spotify, please" and
+"open spotify" share one) and hold the JSON the model generated. A lookup
+that misses exactly can still hit a stored utterance whose trigram vector
+is nearly identical and whose content words and numbers are the same,
+which catches small transcription differences (a dropped "the") without
+replaying a call with other parameters ("...report for 2023" /
+"...report for 2024").
+
+Only tool calls are stored. Conversational replies depend on the history,
+and so do utterances that refer back to it ("open it again"). Tools whose
+answer is only correct at the time it was generated (get_info) are never
+stored, and every entry expires after a TTL. The least recently used entry
+is evicted beyond the size cap. The cache is saved to a JSON file after
+every change, so it survives restarts.
+"""
+import json
+import os
+import re
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .intent_router import content_words, normalize_utterance, trigram_vector
+
+# Words that make a request depend on the conversation so far
+_CONTEXTUAL = re.compile(r"\b(?:it|that|this|these|those|them|again|same|there|one|another|last|previous)\b")
+
+
+class ResponseCache:
+    """LRU + TTL cache of LLM tool calls keyed on the normalised utterance."""
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 256,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        similarity: Optional[float] = 0.95,
+        volatile_tools: Iterable[str] = ("get_info", "none"),
+        embed: Callable[[str], np.ndarray] = trigram_vector
+    ):
+        """
+        Initialize response cache.
+        
+        Args:
+            path: JSON file the cache is loaded from and saved to (None = memory only)
+            max_entries: Most entries kept; the least recently used is evicted first
+            ttl: Seconds an entry stays valid (None = until evicted)
+            similarity: Cosine similarity for a near match between utterances
+                (None = exact matches only)
+            volatile_tools: Tools whose replies are never stored
+            embed: Maps a normalised utterance to a unit-length vector
+        """
+        self.path = Path(path) if path else None
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.similarity = similarity
+        self.volatile_tools = set(volatile_tools)
+        self.embed = embed
+        
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # Oldest use first
+        self._lock = threading.Lock()
+        self._keys: List[str] = []  # Row order of _matrix
+        self._matrix: Optional[np.ndarray] = None  # Rebuilt lazily after changes
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "evicted": 0,
+            "expired": 0,
+        }
+        self.load()
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl is not None and now - entry["created"] > self.ttl
+    
+    def get(self, utterance: str) -> Optional[str]:
+        """
+        Look up a stored reply.
+        
+        Args:
+            utterance: User's text input
+        
+        Returns:
+            The stored JSON reply, or None on a miss
+        """
+        key = normalize_utterance(utterance)
+        if not key or _CONTEXTUAL.search(key):
+            return None
+        
+        with self._lock:
+            now = time.time()
+            match = key if key in self.entries else self._nearest(key)
+            if match is not None and self._expired(self.entries[match], now):
+                self._remove(match)
+                self.stats["expired"] += 1
+                match = None
+            if match is None:
+                self.stats["misses"] += 1
+                return None
+            
+            self.entries.move_to_end(match)
+            self.stats["hits" if match == key else "similar_hits"] += 1
+            return self.entries[match]["response"]
+    
+    def _nearest(self, key: str) -> Optional[str]:
+        """Stored utterance most similar to `key`, if above the similarity threshold with the same content words."""
+        if self.similarity is None or not self.entries:
+            return None
+        if self._matrix is None:
+            self._keys = list(self.entries)
+            self._matrix = np.stack([self.entries[k]["vector"] for k in self._keys])
+        scores = self._matrix @ self.embed(key)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None
+        # Spelling can be nearly identical while a parameter differs (a number, a name)
+        if content_words(self._keys[best]) != content_words(key):
+            return None
+        return self._keys[best]
+    
+    def put(self, utterance: str, response: str) -> bool:
+        """
+        Store the model's reply to an utterance, if it may be reused.
+        
+        Args:
+            utterance: User's text input
+            response: JSON reply exactly as generated
+        
+        Returns:
+            True if the reply was stored
+        """
+        key = normalize_utterance(utterance)
+        if not key or _CONTEXTUAL.search(key):
+            return False
+        try:
+            tool = json.loads(response).get("tool", "none")
+        except (json.JSONDecodeError, AttributeError):
+            return False
+        if tool in self.volatile_tools:
+            return False
+        
+        with self._lock:
+            self.entries[key] = {
+                "response": response,
+                "tool": tool,
+                "created": time.time(),
+                "vector": self.embed(key),
+            }
+            self.entries.move_to_end(key)
+            self._matrix = None
+            self.stats["stored"] += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evicted"] += 1
+            self._save()
+        return True
+    
+    def _remove(self, key: str) -> None:
+        del self.entries[key]
+        self._matrix = None
+        self._save()
+    
+    def invalidate(self, tool: Optional[str] = None) -> int:
+        """
+        Drop entries (e.g. after an app is installed or removed).
+        
+        Args:
+            tool: Only drop entries for this tool (None = everything)
+        
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            keys = [k for k, e in self.entries.items() if tool is None or e["tool"] == tool]
+            for key in keys:
+                del self.entries[key]
+            if keys:
+                self._matrix = None
+                self._save()
+            return len(keys)
+    
+    def load(self) -> None:
+        """Read entries saved by a previous session (expired ones are skipped)."""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not load response cache {self.path}: {e}")
+            return
+        
+        now = time.time()
+        for key, entry in saved.get("entries", []):
+            if not self._expired(entry, now) and entry.get("tool") not in self.volatile_tools:
+                # Vectors are not saved: they depend on `embed`
+                entry["vector"] = self.embed(key)
+                self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def _save(self) -> None:
+        """Write the cache atomically, oldest use first (caller holds the lock)."""
+        if not self.path:
+            return
+        entries = [
+            (key, {k: v for k, v in entry.items() if k != "vector"})
+            for key, entry in self.entries.items()
+        ]
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(temp, 'w') as f:
+                json.dump({"entries": entries}, f)
+            os.replace(temp, self.path)
+        except OSError as e:
+            print(f"Could not save response cache {self.path}: {e}")
+    
+    def get_stats(self) -> Dict[str, float]:
+        """Hit/miss counts, hit rate and current size."""
+        stats: Dict[str, float] = dict(self.stats)
+        lookups = stats["hits"] + stats["similar_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["similar_hits"]) / lookups if lookups else 0.0
+        stats["entries"] = len(self.entries)
+        return stats
@@ -0,0 +1,428 @@
+"""
+Session Recorder Module
+Persists captured microphone audio to a bounded memory-mapped ring file and
+replays it through the pipeline in place of sounddevice.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+import wave
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional
+
+# File layout: header | int16 PCM ring | utterance marker ring
+MAGIC = b"JARVREC1"
+HEADER = struct.Struct("<8sIQQIQ")  # magic, sample_rate, capacity, write_pos, max_markers, marker_count
+HEADER_SIZE = 64
+WRITE_POS_OFFSET = 20  # Byte offset of write_pos within HEADER
+MARKER = struct.Struct("<QQd8s")  # start, end, wall-clock time, tag
+
+
+class SessionRecorder:
+    """
+    Opt-in recorder for raw capture audio.
+    
+    PCM is appended to a fixed-size memory-mapped ring, so disk usage never
+    grows past `max_bytes`; the oldest audio is overwritten first. Utterance
+    and wake word boundaries are stored as absolute sample positions in a
+    small marker ring in the same file.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int = 16000,
+        max_bytes: int = 100 * 1024 * 1024,
+        max_markers: int = 4096
+    ):
+        """
+        Initialize recorder.
+        
+        Args:
+            path: Ring file to create (or continue, if it has the same layout)
+            sample_rate: Sample rate of the recorded audio
+            max_bytes: Total file size budget
+            max_markers: Boundary markers kept before the oldest are overwritten
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_markers = max_markers
+        self.capacity = (max_bytes - HEADER_SIZE - max_markers * MARKER.size) // 2
+        if self.capacity <= 0:
+            raise ValueError("max_bytes is too small for the recording header")
+        
+        size = HEADER_SIZE + self.capacity * 2 + max_markers * MARKER.size
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        
+        self.write_pos = 0
+        self.marker_count = 0
+        resume = os.path.exists(path) and os.path.getsize(path) == size
+        
+        self._file = open(path, "r+b" if resume else "w+b")
+        if not resume:
+            self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        
+        if resume:
+            magic, rate, capacity, write_pos, markers, count = HEADER.unpack_from(self._mm, 0)
+            if magic == MAGIC and rate == sample_rate and capacity == self.capacity and markers == max_markers:
+                self.write_pos, self.marker_count = write_pos, count
+        
+        # Zero-copy views onto the mapped file
+        self.pcm = np.frombuffer(self._mm, dtype=np.int16, count=self.capacity, offset=HEADER_SIZE)
+        self._marker_offset = HEADER_SIZE + self.capacity * 2
+        self._lock = threading.Lock()
+        self._write_header()
+        print(f"Recording session audio to {path} ({self.capacity / sample_rate / 60:.0f} min max)")
+    
+    @property
+    def position(self) -> int:
+        """Absolute position of the next sample to be written."""
+        return self.write_pos
+    
+    def _write_header(self) -> None:
+        HEADER.pack_into(
+            self._mm, 0, MAGIC, self.sample_rate, self.capacity,
+            self.write_pos, self.max_markers, self.marker_count
+        )
+    
+    def write(self, samples: np.ndarray) -> None:
+        """
+        Append int16 samples (safe to call from an audio callback).
+        
+        Args:
+            samples: 1-D int16 audio
+        """
+        if self._mm.closed:
+            return
+        with self._lock:
+            n = len(samples)
+            if n > self.capacity:
+                samples = samples[-self.capacity:]
+                self.write_pos += n - self.capacity
+                n = self.capacity
+            
+            start = self.write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self.pcm[start:start + first] = samples[:first]
+            if first < n:
+                self.pcm[:n - first] = samples[first:]
+            
+            self.write_pos += n
+            struct.pack_into("<Q", self._mm, WRITE_POS_OFFSET, self.write_pos)
+    
+    def mark(self, start: int, end: int, tag: str = "utterance") -> None:
+        """
+        Record a boundary (e.g. one utterance) by absolute sample positions.
+        
+        Args:
+            start: First sample of the span
+            end: Sample after the span
+            tag: Short label (at most 8 ASCII characters)
+        """
+        if self._mm.closed:
+            return
+        with self._lock:
+            slot = self.marker_count % self.max_markers
+            MARKER.pack_into(
+                self._mm, self._marker_offset + slot * MARKER.size,
+                start, end, time.time(), tag.encode("ascii", "replace")[:8]
+            )
+            self.marker_count += 1
+            self._write_header()
+    
+    def flush(self) -> None:
+        """Flush the mapping to disk."""
+        if not self._mm.closed:
+            self._mm.flush()
+    
+    def close(self) -> None:
+        """Flush and close the ring file."""
+        if self._mm.closed:
+            return
+        self.flush()
+        self.pcm = None  # Release the buffer export before closing the map
+        self._mm.close()
+        self._file.close()
+
+
+class SessionRecording:
+    """Read-only view of a ring file written by SessionRecorder."""
+    
+    def __init__(self, path: str):
+        """
+        Open a recording.
+        
+        Args:
+            path: Ring file written by SessionRecorder
+        """
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, self.sample_rate, self.capacity, self.write_pos, self.max_markers, self.marker_count = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        
+        self.pcm = np.frombuffer(self._mm, dtype=np.int16, count=self.capacity, offset=HEADER_SIZE)
+        self._marker_offset = HEADER_SIZE + self.capacity * 2
+    
+    @property
+    def oldest_position(self) -> int:
+        """Absolute position of the oldest sample still in the file."""
+        return max(0, self.write_pos - self.capacity)
+    
+    def audio(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """
+        Copy out int16 audio between absolute positions.
+        
+        Args:
+            start: First sample (defaults to the oldest retained sample)
+            end: Sample after the last (defaults to the newest)
+        
+        Returns:
+            1-D int16 array
+        """
+        start = self.oldest_position if start is None else max(start, self.oldest_position)
+        end = self.write_pos if end is None else min(end, self.write_pos)
+        n = max(0, end - start)
+        
+        offset = start % self.capacity
+        first = min(n, self.capacity - offset)
+        out = np.empty(n, dtype=np.int16)
+        out[:first] = self.pcm[offset:offset + first]
+        out[first:] = self.pcm[:n - first]
+        return out
+    
+    def markers(self, tag: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List boundary markers whose audio is still in the file, oldest first.
+        
+        Args:
+            tag: Only return markers with this tag
+        
+        Returns:
+            List of dicts with start, end, time and tag
+        """
+        result = []
+        first = max(0, self.marker_count - self.max_markers)
+        for i in range(first, self.marker_count):
+            slot = i % self.max_markers
+            start, end, wall_time, raw_tag = MARKER.unpack_from(
+                self._mm, self._marker_offset + slot * MARKER.size
+            )
+            marker_tag = raw_tag.rstrip(b"\0").decode("ascii", "replace")
+            if start < self.oldest_position or (tag and marker_tag != tag):
+                continue
+            result.append({"start": start, "end": end, "time": wall_time, "tag": marker_tag})
+        return result
+    
+    def export_wav(self, wav_path: str, start: Optional[int] = None, end: Optional[int] = None) -> None:
+        """Write (part of) the recording to a 16-bit mono WAV file."""
+        with wave.open(wav_path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(self.audio(start, end).tobytes())
+
+
+class _ReplayStatus:
+    """Stand-in for sounddevice.CallbackFlags."""
+    input_overflow = False
+
+
+class ReplayStream:
+    """Stand-in for sounddevice.InputStream that plays back recorded audio."""
+    
+    def __init__(
+        self,
+        source: "ReplaySource",
+        samplerate: int,
+        channels: int = 1,
+        dtype: str = 'float32',
+        blocksize: int = 0,
+        callback: Optional[Callable] = None,
+        **kwargs
+    ):
+        self.audio = source.audio_at(samplerate)
+        self.samplerate = samplerate
+        self.channels = channels
+        self.dtype = dtype
+        self.blocksize = blocksize or int(0.02 * samplerate)
+        self.callback = callback
+        self.speed = source.speed
+        self.loop = source.loop
+        self.pos = 0
+        self.active = False
+        self.finished = source.finished
+        self._thread: Optional[threading.Thread] = None
+        self._clock = None
+    
+    def _next_block(self, frames: int) -> np.ndarray:
+        """Return the next block as (frames, channels), padding with silence at the end."""
+        block = np.zeros(frames, dtype=np.int16)
+        available = self.audio[self.pos:self.pos + frames]
+        block[:len(available)] = available
+        self.pos += frames
+        if self.pos >= len(self.audio):
+            if self.loop:
+                self.pos = 0
+            else:
+                self.finished.set()
+        
+        # Pace delivery to real time / speed
+        if self._clock is None:
+            self._clock = time.perf_counter()
+        self._clock += frames / self.samplerate / self.speed
+        delay = self._clock - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        
+        if self.dtype != 'int16':
+            block = block.astype(self.dtype) / 32768.0
+        return np.repeat(block[:, None], self.channels, axis=1)
+    
+    def _run(self) -> None:
+        while self.active:
+            self.callback(self._next_block(self.blocksize), self.blocksize, None, _ReplayStatus())
+    
+    def start(self) -> None:
+        self.active = True
+        if self.callback:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        self.active = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+    
+    def close(self) -> None:
+        self.stop()
+    
+    def read(self, frames: int) -> tuple:
+        """Blocking read, like sounddevice.InputStream.read()."""
+        return self._next_block(frames), False
+    
+    def __enter__(self) -> "ReplayStream":
+        self.start()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ReplaySource:
+    """
+    Drop-in replacement for the sounddevice module.
+    
+    Pass it as `audio_backend` to SpeechToText or WakeWordDetector to run
+    recorded audio through listen() / _listen_loop() on a machine without a
+    microphone. Each stream opened on it plays the audio from the start, at
+    real time or `speed` times faster, then continues with silence.
+    """
+    
+    def __init__(self, audio: np.ndarray, sample_rate: int = 16000, speed: float = 1.0, loop: bool = False):
+        """
+        Initialize replay source.
+        
+        Args:
+            audio: 1-D int16 audio
+            sample_rate: Sample rate of `audio`
+            speed: Playback speed (1.0 = real time, 0 or less = as fast as possible)
+            loop: Restart from the beginning instead of padding with silence
+        """
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.speed = speed if speed > 0 else float("inf")
+        self.loop = loop
+        self.finished = threading.Event()
+        self._resampled: Dict[int, np.ndarray] = {sample_rate: audio}
+        self._rec_stream: Optional[ReplayStream] = None
+        self._rec_thread: Optional[threading.Thread] = None
+    
+    @classmethod
+    def from_recording(
+        cls,
+        path: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        **kwargs
+    ) -> "ReplaySource":
+        """Replay (part of) a SessionRecorder ring file."""
+        recording = SessionRecording(path)
+        return cls(recording.audio(start, end), sample_rate=recording.sample_rate, **kwargs)
+    
+    def audio_at(self, sample_rate: int) -> np.ndarray:
+        """The source audio resampled (linear interpolation) to `sample_rate`."""
+        if sample_rate not in self._resampled:
+            n = int(len(self.audio) * sample_rate / self.sample_rate)
+            positions = np.arange(n) * (self.sample_rate / sample_rate)
+            resampled = np.interp(positions, np.arange(len(self.audio)), self.audio)
+            self._resampled[sample_rate] = resampled.astype(np.int16)
+        return self._resampled[sample_rate]
+    
+    def InputStream(self, samplerate: int, **kwargs) -> ReplayStream:
+        """Open a replay stream (same arguments as sounddevice.InputStream)."""
+        return ReplayStream(self, samplerate, **kwargs)
+    
+    def rec(
+        self,
+        frames: Optional[int] = None,
+        samplerate: int = 16000,
+        channels: int = 1,
+        dtype: str = 'float32',
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Fill an array in the background, like sounddevice.rec()."""
+        if out is None:
+            out = np.zeros((frames, channels), dtype=dtype)
+        stream = ReplayStream(self, samplerate, channels=channels, dtype=dtype)
+        self._rec_stream = stream
+        
+        def fill():
+            stream.active = True
+            pos = 0
+            while stream.active and pos < len(out):
+                n = min(stream.blocksize, len(out) - pos)
+                out[pos:pos + n] = stream.read(n)[0]
+                pos += n
+            stream.active = False
+        
+        self._rec_thread = threading.Thread(target=fill, daemon=True)
+        self._rec_thread.start()
+        return out
+    
+    def wait(self, ignore_errors: bool = True) -> None:
+        """Wait for rec() to finish."""
+        if self._rec_thread:
+            self._rec_thread.join()
+    
+    def stop(self, ignore_errors: bool = True) -> None:
+        """Stop rec()."""
+        if self._rec_stream:
+            self._rec_stream.active = False
+        self.wait()
+
+
+if __name__ == "__main__":
+    import sys
+    
+    # Inspect a recording: python -m modules.session_recorder recordings/stt.rec [out.wav]
+    if len(sys.argv) < 2:
+        print("Usage: python -m modules.session_recorder <recording> [export.wav]")
+        sys.exit(1)
+    
+    recording = SessionRecording(sys.argv[1])
+    seconds = (recording.write_pos - recording.oldest_position) / recording.sample_rate
+    print(f"{sys.argv[1]}: {seconds:.1f}s of audio at {recording.sample_rate} Hz")
+    for marker in recording.markers():
+        start = (marker["start"] - recording.oldest_position) / recording.sample_rate
+        length = (marker["end"] - marker["start"]) / recording.sample_rate
+        print(f"  [{marker['tag']:9s}] at {start:8.2f}s, {length:5.2f}s long")
+    
+    if len(sys.argv) > 2:
+        recording.export_wav(sys.argv[2])
+        print(f"Exported to {sys.argv[2]}")
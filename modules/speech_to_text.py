@@ -5,10 +5,72 @@ Uses faster-whisper for local speech recognition.
 import numpy as np
 import sounddevice as sd
 from faster_whisper import WhisperModel
-from typing import Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+import re
 import tempfile
+import threading
+import time
 import wave
 
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:  # faster-whisper < 1.1 has no batched pipeline
+    BatchedInferencePipeline = None
+
+from .audio_buffer import AudioRingBuffer, to_float32
+from .audio_bus import AudioBus, Subscription
+from .echo_gate import EchoGate
+from .session_recorder import ReplaySource, SessionRecorder
+from .vad import FrameVAD, RMSEndpointer, VADEndpointer
+
+Endpointer = Union[RMSEndpointer, VADEndpointer]
+
+# What Whisper typically "hears" in silence or background noise
+KNOWN_HALLUCINATIONS = (
+    "you",
+    "thank you",
+    "thanks",
+    "thank you for watching",
+    "thanks for watching",
+    "thank you so much for watching",
+    "please subscribe",
+    "subtitles by the amaraorg community",
+)
+
+
+class _OnsetTimer:
+    """
+    Onset timeout for one capture: did speech start before the user paused?
+    
+    Speech counts as started if the pre-roll already holds some (after the
+    wake word), or once the endpointer has heard `min_speech` seconds of it
+    in the live audio. From then on the endpointer alone decides where the
+    utterance ends.
+    """
+    
+    def __init__(self, timeout: float, sample_rate: int, min_speech: float = 0.1, preroll_speech: bool = False):
+        self.timeout = timeout
+        self.min_frames = int(min_speech * sample_rate)
+        self.speech_frames = self.min_frames if preroll_speech else 0
+    
+    def update(self, endpointer: Endpointer, frames: int, ended: bool) -> bool:
+        """
+        Feed the endpointer state after a block.
+        
+        Returns:
+            True if the capture should stop: no speech has started and the
+            silence since the start (or the wake word) reached the timeout,
+            or the endpointer ended the utterance first
+        """
+        if self.speech_frames >= self.min_frames:
+            return False
+        if endpointer.speech_started and endpointer.trailing_silence == 0:
+            self.speech_frames += frames
+            return False
+        return ended or endpointer.trailing_silence >= self.timeout
+
 
 class SpeechToText:
     """Speech recognition using faster-whisper."""
@@ -17,7 +79,20 @@ class SpeechToText:
         self,
         model_size: str = "base",
         device: str = "cpu",
-        compute_type: str = "int8"
+        compute_type: str = "int8",
+        endpointer: Optional[Endpointer] = None,
+        speech_gate: bool = True,
+        gate_min_speech: float = 0.2,
+        gate_min_ratio: float = 0.02,
+        hallucinations: Iterable[str] = KNOWN_HALLUCINATIONS,
+        cascade_model_size: Optional[str] = None,
+        cascade_min_logprob: float = -0.5,
+        cascade_max_no_speech: float = 0.4,
+        speculative_silence: Optional[float] = None,
+        audio_backend: Optional[Union[ModuleType, ReplaySource]] = None,
+        recorder: Optional[SessionRecorder] = None,
+        bus: Optional[AudioBus] = None,
+        echo_gate: Optional[EchoGate] = None
     ):
         """
         Initialize speech-to-text.
@@ -26,120 +101,601 @@ class SpeechToText:
             model_size: Model size (tiny, base, small, medium, large)
             device: Device to use (cpu, cuda)
             compute_type: Computation type (int8, float16, float32)
+            endpointer: End-of-utterance detector used by listen(); when None,
+                a fixed-threshold RMSEndpointer is built from the listen() arguments
+            speech_gate: Skip Whisper on recordings the VAD finds no speech in
+            gate_min_speech: Seconds of voiced frames a recording needs to be decoded
+            gate_min_ratio: Fraction of voiced frames a recording needs to be decoded
+            hallucinations: Transcripts dropped as Whisper artefacts on silence
+            cascade_model_size: Small model tried first (e.g. tiny, base); the main
+                model only re-decodes when its confidence is too low. None disables.
+            cascade_min_logprob: Escalate if any segment's avg_logprob is below this
+            cascade_max_no_speech: Escalate if any segment's no_speech_prob is above this
+            speculative_silence: With a persistent stream, start decoding in the
+                background after this many seconds of trailing silence, before the
+                endpoint fires. None disables.
+            audio_backend: Provider of InputStream/rec/wait/stop; defaults to
+                sounddevice (pass a ReplaySource to run from a recording)
+            recorder: Optional SessionRecorder that receives all captured audio
+                (with a bus, the bus records and this is only used for markers)
+            bus: Shared AudioBus; when given, start_stream() subscribes to it
+                instead of opening the device
+            echo_gate: Silences captured audio that overlaps our own speech
+                output before the endpointer or Whisper sees it
         """
         print(f"Loading Whisper model '{model_size}'...")
         self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
         self.sample_rate = 16000
+        self._batched = None  # BatchedInferencePipeline, created on first transcribe_many()
+        self.batch_stats: Dict[str, float] = {}
         print("Whisper model loaded.")
+        
+        # Cascade: both models stay resident
+        self.fast_model: Optional[WhisperModel] = None
+        if cascade_model_size and cascade_model_size != model_size:
+            print(f"Loading cascade Whisper model '{cascade_model_size}'...")
+            self.fast_model = WhisperModel(cascade_model_size, device=device, compute_type=compute_type)
+        self.cascade_min_logprob = cascade_min_logprob
+        self.cascade_max_no_speech = cascade_max_no_speech
+        self.endpointer = endpointer
+        
+        # Pre-gate: cheap VAD check before handing audio to the model
+        self.speech_gate = speech_gate
+        self.gate_vad = FrameVAD(sample_rate=self.sample_rate)
+        self.gate_min_speech = gate_min_speech
+        self.gate_min_ratio = gate_min_ratio
+        self.hallucinations = {self._normalize(text) for text in hallucinations}
+        self.stats: Dict[str, int] = {
+            "skipped_no_speech": 0,
+            "decoded": 0,
+            "hallucinations_dropped": 0,
+            "cascade_decoded": 0,
+            "cascade_escalated": 0,
+            "speculative_hits": 0,
+            "speculative_discarded": 0,
+        }
+        self.speculative_silence = speculative_silence
+        # At most one speculative decode runs at a time, on its own VAD and
+        # buffers, so one that is discarded can overlap the final decode
+        self._speculative_thread: Optional[threading.Thread] = None
+        self._speculative_vad = FrameVAD(sample_rate=self.sample_rate)
+        self._partial_vad = FrameVAD(sample_rate=self.sample_rate)  # listen_streaming()'s decoder thread
+        
+        # Audio I/O (sounddevice, or a replay source) and optional session recorder
+        self.audio = audio_backend or sd
+        self.recorder = recorder
+        self._recorder_offset = 0
+        self.bus = bus
+        self.echo_gate = echo_gate
+        
+        # Persistent capture stream (see start_stream)
+        self.stream: Optional[Union[sd.InputStream, Subscription]] = None
+        self.ring: Optional[AudioRingBuffer] = None
+        self.stream_overflows = 0
+        
+        # Reusable buffers: audio stays int16 until _model_input() converts it
+        # into the float32 buffers right before Whisper
+        self._utterance = np.zeros(0, dtype='int16')
+        self._partial_audio = np.zeros(0, dtype='int16')
+        self._model_input = np.zeros(0, dtype='float32')
+        self._partial_input = np.zeros(0, dtype='float32')
+        self._speculative_audio = np.zeros(0, dtype='int16')
+        self._speculative_input = np.zeros(0, dtype='float32')
+        self._record_buffer = np.zeros((0, 1), dtype='int16')
+        self._block = np.zeros(int(0.02 * self.sample_rate), dtype='int16')
+        self._no_preroll = np.zeros(0, dtype='int16')
+    
+    def warmup(self) -> None:
+        """Run one throwaway decode so the first real transcription is not slowed by one-time setup."""
+        try:
+            silence = np.zeros(self.sample_rate, dtype='float32')
+            for model in (self.model, self.fast_model):
+                if model is not None:
+                    segments, _ = model.transcribe(silence, beam_size=1, language="en", vad_filter=False)
+                    list(segments)  # Segments are lazy - consume to actually run the model
+        except Exception as e:
+            print(f"Whisper warm-up failed: {e}")
+    
+    def _ensure_buffers(self, frames: int) -> None:
+        """Grow the reusable utterance buffers to hold `frames` samples."""
+        if len(self._utterance) < frames:
+            self._utterance = np.zeros(frames, dtype='int16')
+            self._partial_audio = np.zeros(frames, dtype='int16')
+            self._model_input = np.zeros(frames, dtype='float32')
+            self._partial_input = np.zeros(frames, dtype='float32')
+            self._speculative_audio = np.zeros(frames, dtype='int16')
+            self._speculative_input = np.zeros(frames, dtype='float32')
+    
+    def _as_model_input(self, audio_data: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Convert int16 audio to the float32 the model expects, reusing a buffer when it fits."""
+        out = self._model_input if out is None else out
+        if len(audio_data) <= len(out):
+            return to_float32(audio_data, out=out)
+        if audio_data.dtype == np.float32:
+            return audio_data
+        return to_float32(audio_data, out=np.empty(len(audio_data), dtype='float32'))
+    
+    def start_stream(self, max_duration: float = 15.0, buffer_seconds: float = 30.0) -> None:
+        """
+        Open one input stream for the whole session.
+        
+        The audio callback writes into a preallocated ring buffer and
+        record_audio() pulls utterances out of it, so no device is reopened
+        and no buffers are allocated per turn. With a shared AudioBus the
+        ring is fed from a bus subscription instead of a stream of our own.
+        
+        Args:
+            max_duration: Longest utterance record_audio() can return (seconds)
+            buffer_seconds: Audio history kept in the ring buffer (seconds)
+        """
+        if self.stream is not None:
+            return
+        
+        capacity = int(max(buffer_seconds, max_duration) * self.sample_rate)
+        self.ring = AudioRingBuffer(capacity, dtype='int16')
+        self._ensure_buffers(int(max_duration * self.sample_rate))
+        if self.recorder:
+            self._recorder_offset = self.recorder.position - self.ring.write_pos
+        
+        if self.bus is not None:
+            self.stream = self.bus.subscribe(
+                "stt",
+                sample_rate=self.sample_rate,
+                frame_length=len(self._block),
+                callback=self._capture_block,
+                max_queue=int(buffer_seconds / 0.02)
+            )
+            print("Audio bus subscription opened.")
+            return
+        
+        self.stream = self.audio.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype='int16',
+            blocksize=int(0.02 * self.sample_rate),  # 20ms blocks
+            callback=self._stream_callback
+        )
+        self.stream.start()
+        print("Audio stream opened.")
+    
+    def stop_stream(self) -> None:
+        """Close the persistent input stream."""
+        if self.stream is None:
+            return
+        try:
+            self.stream.stop()
+            self.stream.close()
+        except Exception as e:
+            print(f"Error closing audio stream: {e}")
+        finally:
+            self.stream = None
+        print("Audio stream closed.")
+    
+    def _stream_callback(self, indata, frames, time_info, status) -> None:
+        """Audio callback: copy the block into the ring buffer."""
+        if status.input_overflow:
+            self.stream_overflows += 1
+        self._capture_block(indata[:, 0])
+        if self.recorder:
+            self.recorder.write(indata[:, 0])  # Recordings keep the echo for debugging
+    
+    def _capture_block(self, block: np.ndarray) -> None:
+        """Gate our own speech out of a captured block and store it."""
+        if self.echo_gate:
+            block = self.echo_gate.process(block)
+        self.ring.write(block)
+    
+    def _get_endpointer(
+        self,
+        silence_threshold: float,
+        silence_duration: float,
+        min_duration: float
+    ) -> Endpointer:
+        """Return a freshly reset endpointer for the next utterance."""
+        if self.endpointer is not None:
+            self.endpointer.reset()
+            return self.endpointer
+        return RMSEndpointer(
+            sample_rate=self.sample_rate,
+            silence_threshold=silence_threshold,
+            silence_duration=silence_duration,
+            min_duration=min_duration
+        )
+    
+    def _capture_utterance(
+        self,
+        start: int,
+        duration: float,
+        silence_threshold: float,
+        silence_duration: float,
+        min_duration: float,
+        on_block: Optional[Callable[[int, Endpointer], None]] = None,
+        preroll: Optional[np.ndarray] = None,
+        onset_timeout: Optional[float] = None,
+        keyword_seconds: float = 0.0
+    ) -> Optional[int]:
+        """
+        Follow the persistent stream from `start` until the endpointer fires.
+        
+        Blocks are fed to the endpointer as the callback delivers them (20ms),
+        instead of polling a fresh sd.rec() recording.
+        
+        Args:
+            on_block: Called with (position, endpointer) after each block that
+                did not end the utterance
+            preroll: Audio preceding `start` that belongs to this utterance;
+                fed to the endpointer before the live audio
+            onset_timeout: Give up if no speech starts, in the pre-roll or the
+                live audio, before this many seconds of silence have passed
+            keyword_seconds: Length of the wake word at the start of the
+                pre-roll; speech there does not count as the command starting
+        
+        Returns:
+            Absolute ring position where the utterance ends, or None if the
+            onset timeout expired
+        """
+        endpointer = self._get_endpointer(silence_threshold, silence_duration, min_duration)
+        preroll_frames = 0 if preroll is None else len(preroll)
+        max_frames = min(int(duration * self.sample_rate), len(self._utterance) - preroll_frames)
+        block_frames = len(self._block)
+        
+        end = start + max_frames
+        pos = start
+        
+        ended, preroll_speech = self._feed_preroll(endpointer, preroll, keyword_seconds)
+        if ended:
+            end = start  # The whole utterance is already in the pre-roll
+        
+        onset = None if onset_timeout is None else _OnsetTimer(
+            onset_timeout, self.sample_rate, preroll_speech=preroll_speech
+        )
+        timed_out = False
+        while pos < end:
+            next_pos = min(pos + block_frames, end)
+            if not self.ring.wait_for(next_pos, timeout=1.0):
+                print("Audio stream stalled.")
+                break
+            block = self.ring.read(pos, next_pos, out=self._block)
+            pos = next_pos
+            ended = endpointer.process(block)
+            if onset and onset.update(endpointer, len(block), ended):
+                timed_out = True
+                break
+            if ended:
+                break
+            if on_block:
+                on_block(pos, endpointer)
+        
+        if self.recorder:
+            self.recorder.mark(start + self._recorder_offset, pos + self._recorder_offset, "utterance")
+        return None if timed_out else pos
+    
+    def _feed_preroll(
+        self,
+        endpointer: Endpointer,
+        preroll: Optional[np.ndarray],
+        keyword_seconds: float = 0.0
+    ) -> Tuple[bool, bool]:
+        """
+        Feed the pre-roll to the endpointer ahead of the live audio.
+        
+        Args:
+            endpointer: Freshly reset endpointer for this utterance
+            preroll: Audio the utterance starts with (None or empty = none)
+            keyword_seconds: Length of the wake word at the start of the pre-roll
+        
+        Returns:
+            (ended, speech): whether the utterance already ended inside the
+            pre-roll, and whether the pre-roll holds speech after the wake word
+        """
+        if preroll is None or len(preroll) == 0:
+            return False, False
+        keyword_frames = min(int(keyword_seconds * self.sample_rate), len(preroll))
+        ended = False
+        for part in (preroll[:keyword_frames], preroll[keyword_frames:]):
+            if len(part):
+                ended = endpointer.process(part)
+        # Voiced audio after the keyword: the last of it falls inside the rest
+        rest_seconds = (len(preroll) - keyword_frames) / self.sample_rate
+        speech = endpointer.speech_started and endpointer.trailing_silence < rest_seconds
+        return ended, speech
+    
+    def _begin_utterance(self, duration: float, preroll: np.ndarray) -> Tuple[int, int]:
+        """
+        Reserve buffer room for an utterance that opens with `preroll`.
+        
+        Returns:
+            (start, live_start): utterance start position, where the pre-roll
+            occupies [start, live_start) just ahead of the live ring audio
+        """
+        self._ensure_buffers(int(duration * self.sample_rate) + len(preroll))
+        live_start = self.ring.write_pos
+        return live_start - len(preroll), live_start
+    
+    def _read_utterance(
+        self,
+        start: int,
+        end: int,
+        out: np.ndarray,
+        preroll: np.ndarray,
+        live_start: int
+    ) -> np.ndarray:
+        """
+        Copy utterance audio [start, end) into `out`.
+        
+        Positions before `live_start` are served from the pre-roll, the rest
+        from the ring buffer.
+        
+        Returns:
+            View of `out` holding the audio
+        """
+        if start >= live_start:
+            return self.ring.read(start, end, out=out)
+        head = preroll[len(preroll) - (live_start - start):]
+        out[:len(head)] = head
+        tail = self.ring.read(live_start, end, out=out[len(head):])
+        return out[:len(head) + len(tail)]
+    
+    def _record_from_stream(
+        self,
+        duration: float,
+        silence_threshold: float,
+        silence_duration: float,
+        min_duration: float,
+        preroll: np.ndarray,
+        onset_timeout: Optional[float] = None,
+        keyword_seconds: float = 0.0
+    ) -> Optional[np.ndarray]:
+        """
+        Pull one utterance out of the persistent stream.
+        
+        Returns:
+            View into the reusable utterance buffer (valid until the next
+            call), or None if the onset timeout expired
+        """
+        start, live_start = self._begin_utterance(duration, preroll)
+        end = self._capture_utterance(
+            live_start, duration, silence_threshold, silence_duration, min_duration,
+            preroll=preroll, onset_timeout=onset_timeout, keyword_seconds=keyword_seconds
+        )
+        if end is None:
+            return None
+        return self._read_utterance(start, end, self._utterance, preroll, live_start)
     
     def record_audio(
         self,
         duration: int = 5,
         silence_threshold: float = 0.01,
         silence_duration: float = 1.5,
-        min_duration: float = 1.0
+        min_duration: float = 1.0,
+        preroll: Optional[np.ndarray] = None,
+        onset_timeout: Optional[float] = None,
+        keyword_seconds: float = 0.0
     ) -> Optional[np.ndarray]:
         """
-        Record audio from microphone with improved silence detection.
+        Record audio from microphone until the endpointer detects the end.
+        
+        The silence arguments configure the default RMSEndpointer and are
+        ignored when a custom endpointer was given to the constructor.
         
         Args:
             duration: Maximum recording duration in seconds
             silence_threshold: Threshold for silence detection (lower = more sensitive)
             silence_duration: Seconds of silence before stopping
             min_duration: Minimum recording duration (ensures we capture at least this much)
-            
+            preroll: Already-captured int16 audio the utterance starts with
+                (e.g. WakeWordDetector.take_post_wake_audio()); recording
+                continues from it
+            onset_timeout: Stop and return None if no speech starts within this
+                many seconds of silence (speech in the pre-roll after the wake
+                word counts; the endpointer then decides where it ends)
+            keyword_seconds: Length of the wake word at the start of the pre-roll
+        
         Returns:
-            Audio data as numpy array or None if error
+            int16 audio (a view into a reusable buffer, valid until the next
+            recording) or None if error or no speech started in time
         """
+        preroll = self._no_preroll if preroll is None else preroll.ravel()
+        
+        if self.stream is None and self.bus is not None:
+            self.start_stream(max_duration=duration)  # Never open the device beside the bus
+        
+        if self.stream is not None:
+            try:
+                return self._record_from_stream(
+                    duration, silence_threshold, silence_duration, min_duration, preroll,
+                    onset_timeout, keyword_seconds
+                )
+            except Exception as e:
+                print(f"Recording error: {e}")
+                return None
+        
         try:
-            # Calculate frames
-            silence_frames = int(silence_duration * self.sample_rate)
-            min_frames = int(min_duration * self.sample_rate)
+            endpointer = self._get_endpointer(silence_threshold, silence_duration, min_duration)
             max_frames = int(duration * self.sample_rate)
+            self._ensure_buffers(max_frames + len(preroll))
+            if len(self._record_buffer) != max_frames:
+                self._record_buffer = np.zeros((max_frames, 1), dtype='int16')
+            
+            ended, preroll_speech = self._feed_preroll(endpointer, preroll, keyword_seconds)
+            if ended:
+                return preroll  # The whole utterance is already in the pre-roll
             
-            # Record audio
-            recording = sd.rec(
-                max_frames,
+            # Record audio straight into the reusable int16 buffer
+            recording = self.audio.rec(
+                out=self._record_buffer,
                 samplerate=self.sample_rate,
                 channels=1,
-                dtype='float32'
+                dtype='int16'
             )
             
-            # Wait for recording to complete or detect silence
+            started = time.perf_counter()
+            
+            # Feed the endpointer as the recording fills
+            onset = None if onset_timeout is None else _OnsetTimer(
+                onset_timeout, self.sample_rate, preroll_speech=preroll_speech
+            )
             frames_recorded = 0
-            silence_count = 0
-            check_interval_ms = 200  # Check every 200ms (less frequent, more stable)
+            check_interval_ms = 200
             check_interval_frames = int(check_interval_ms / 1000.0 * self.sample_rate)
             
             while frames_recorded < max_frames:
-                sd.wait(check_interval_ms)
-                frames_recorded += check_interval_frames
-                
-                # Don't stop before minimum duration
-                if frames_recorded < min_frames:
-                    silence_count = 0  # Reset silence counter during min duration
-                    continue
+                time.sleep(check_interval_ms / 1000.0)
+                new_frames = min(frames_recorded + check_interval_frames, max_frames)
+                chunk = recording[frames_recorded:new_frames, 0]
+                frames_recorded = new_frames
+                if self.echo_gate:
+                    chunk[:] = self.echo_gate.process(chunk, started + frames_recorded / self.sample_rate)
                 
-                if frames_recorded >= max_frames:
+                ended = endpointer.process(chunk)
+                if onset and onset.update(endpointer, len(chunk), ended):
+                    self.audio.stop()
+                    self.audio.wait()
+                    return None
+                if ended:
+                    self.audio.stop()
                     break
-                
-                # Check for silence in a larger window (more stable)
-                window_size = min(check_interval_frames * 2, frames_recorded)
-                chunk = recording[max(0, frames_recorded - window_size):frames_recorded]
-                
-                # Use RMS (root mean square) for better silence detection
-                rms = np.sqrt(np.mean(chunk**2))
-                
-                if rms < silence_threshold:
-                    silence_count += check_interval_frames
-                    if silence_count >= silence_frames:
-                        # Stop recording on silence (but only after min duration)
-                        sd.stop()
-                        recording = recording[:frames_recorded]
-                        break
-                else:
-                    silence_count = 0  # Reset if we detect sound
             
-            sd.wait()  # Ensure recording is complete
+            self.audio.wait()  # Ensure recording is complete
             
             # Trim to actual recorded length
             if frames_recorded < max_frames:
                 recording = recording[:frames_recorded]
             
-            return recording
+            if self.recorder:
+                start = self.recorder.position
+                self.recorder.write(recording[:, 0])
+                self.recorder.mark(start, self.recorder.position, "utterance")
             
+            if len(preroll):
+                self._utterance[:len(preroll)] = preroll
+                self._utterance[len(preroll):len(preroll) + len(recording)] = recording[:, 0]
+                return self._utterance[:len(preroll) + len(recording)]
+            return recording
+        
         except Exception as e:
             print(f"Recording error: {e}")
             return None
     
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Lowercase and strip punctuation for hallucination matching."""
+        return re.sub(r"[^a-z0-9 ]", "", text.lower()).strip()
+    
+    def has_speech(self, audio_data: np.ndarray, vad: Optional[FrameVAD] = None) -> bool:
+        """
+        Cheap speech check run before the model (on the captured int16 audio,
+        before any float conversion).
+        
+        Args:
+            audio_data: 1-D int16 audio (float audio in [-1, 1] also works)
+            vad: VAD to run (defaults to gate_vad; a FrameVAD must not be
+                used from two threads at once)
+        
+        Returns:
+            True if enough frames are voiced to be worth decoding
+        """
+        vad = vad or self.gate_vad
+        vad.reset()
+        voiced = vad.process(audio_data)
+        if len(voiced) == 0:
+            return False
+        
+        voiced_frames = int(np.count_nonzero(voiced))
+        speech_seconds = voiced_frames * vad.frame_duration
+        return (
+            speech_seconds >= self.gate_min_speech
+            and voiced_frames / len(voiced) >= self.gate_min_ratio
+        )
+    
+    def get_stats(self) -> Dict[str, float]:
+        """Get counts of decoded vs skipped captures, the cascade escalation rate and echo dropped."""
+        stats: Dict[str, float] = dict(self.stats)
+        if self.stats["cascade_decoded"]:
+            stats["escalation_rate"] = self.stats["cascade_escalated"] / self.stats["cascade_decoded"]
+        if self.echo_gate:
+            stats["echo_gated_seconds"] = self.echo_gate.stats["gated_seconds"]
+        return stats
+    
+    def _decode(self, model: WhisperModel, audio_data: np.ndarray) -> tuple:
+        """
+        Run one model over the audio.
+        
+        Returns:
+            Tuple of (text, segments)
+        """
+        segments, info = model.transcribe(
+            audio_data,
+            beam_size=5,
+            language="en",
+            vad_filter=True,  # Voice activity detection
+            word_timestamps=False,
+            condition_on_previous_text=True,  # Better context
+        )
+        segments = list(segments)
+        text = " ".join([segment.text for segment in segments]).strip()
+        return text, segments
+    
+    def _is_confident(self, segments: list) -> bool:
+        """Check whether a cascade decode is good enough to skip the main model."""
+        if not segments:
+            return False
+        return (
+            min(segment.avg_logprob for segment in segments) >= self.cascade_min_logprob
+            and max(segment.no_speech_prob for segment in segments) <= self.cascade_max_no_speech
+        )
+    
     def transcribe_audio(self, audio_data: np.ndarray) -> str:
         """
         Transcribe audio data to text.
         
+        Recordings without speech are skipped before the model runs, and
+        known silence hallucinations are dropped from the result. With a
+        cascade model configured, the small model decodes first and the main
+        model only runs when the small model is unsure.
+        
         Args:
             audio_data: Audio as numpy array
-            
+        
         Returns:
             Transcribed text
         """
+        return self._transcribe(audio_data, self._model_input)
+    
+    def _transcribe(
+        self,
+        audio_data: np.ndarray,
+        input_buffer: np.ndarray,
+        vad: Optional[FrameVAD] = None
+    ) -> str:
+        """transcribe_audio() using the given float32 buffer for the model input (and VAD for the gate)."""
         try:
-            # Flatten audio if needed
+            # Flatten audio if needed (a view for captured buffers)
             if audio_data.ndim > 1:
-                audio_data = audio_data.flatten()
+                audio_data = audio_data.ravel()
             
-            # Transcribe with better settings
-            segments, info = self.model.transcribe(
-                audio_data,
-                beam_size=5,
-                language="en",
-                vad_filter=True,  # Voice activity detection
-                word_timestamps=False,
-                condition_on_previous_text=True,  # Better context
-            )
+            if self.speech_gate and not self.has_speech(audio_data, vad):
+                self.stats["skipped_no_speech"] += 1
+                return ""
             
-            # Combine segments
-            text = " ".join([segment.text for segment in segments])
-            text = text.strip()
+            self.stats["decoded"] += 1
+            audio_data = self._as_model_input(audio_data, out=input_buffer)
+            if self.fast_model is not None:
+                self.stats["cascade_decoded"] += 1
+                text, segments = self._decode(self.fast_model, audio_data)
+                if not self._is_confident(segments):
+                    self.stats["cascade_escalated"] += 1
+                    text, segments = self._decode(self.model, audio_data)
+            else:
+                text, segments = self._decode(self.model, audio_data)
+            
+            if text and self._normalize(text) in self.hallucinations:
+                self.stats["hallucinations_dropped"] += 1
+                print(f"⚠️  Dropped likely hallucination: '{text}'")
+                return ""
             
             if text:
                 print(f"✓ Transcribed: '{text}'")
@@ -147,7 +703,7 @@ class SpeechToText:
                 print("⚠️  No speech detected in audio")
             
             return text
-            
+        
         except Exception as e:
             print(f"Transcription error: {e}")
             return ""
@@ -157,7 +713,10 @@ class SpeechToText:
         duration: int = 5,
         silence_threshold: float = 0.01,
         silence_duration: float = 1.5,
-        min_duration: float = 1.0
+        min_duration: float = 1.0,
+        preroll: Optional[np.ndarray] = None,
+        onset_timeout: Optional[float] = None,
+        keyword_seconds: float = 0.0
     ) -> str:
         """
         Record and transcribe in one step.
@@ -167,22 +726,236 @@ class SpeechToText:
             silence_threshold: Silence detection threshold
             silence_duration: Seconds of silence before stopping
             min_duration: Minimum recording duration
-            
+            preroll: Already-captured int16 audio the utterance starts with
+            onset_timeout: Return "" without decoding if no speech starts within
+                this many seconds of silence (speech in the pre-roll after the
+                wake word counts)
+            keyword_seconds: Length of the wake word at the start of the pre-roll
+        
         Returns:
             Transcribed text
         """
-        audio = self.record_audio(duration, silence_threshold, silence_duration, min_duration)
+        if self.stream is not None and self.speculative_silence is not None:
+            try:
+                return self._listen_speculative(
+                    duration, silence_threshold, silence_duration, min_duration,
+                    self._no_preroll if preroll is None else preroll.ravel(),
+                    onset_timeout, keyword_seconds
+                )
+            except Exception as e:
+                print(f"Recording error: {e}")
+                return ""
+        
+        audio = self.record_audio(
+            duration, silence_threshold, silence_duration, min_duration, preroll, onset_timeout,
+            keyword_seconds
+        )
         if audio is not None:
             return self.transcribe_audio(audio)
         return ""
     
+    def _listen_speculative(
+        self,
+        duration: float,
+        silence_threshold: float,
+        silence_duration: float,
+        min_duration: float,
+        preroll: np.ndarray,
+        onset_timeout: Optional[float] = None,
+        keyword_seconds: float = 0.0
+    ) -> str:
+        """
+        listen() that starts decoding before the endpoint is confirmed.
+        
+        Once the trailing silence reaches `speculative_silence`, the audio so
+        far is decoded on a background thread. If speech resumes the result is
+        discarded; if the endpoint fires, only silence was added since the
+        snapshot, so the speculative transcript is returned as-is.
+        
+        At most one speculative decode runs at a time, across calls: a new
+        snapshot waits until a discarded decode has finished. It uses its own
+        VAD and buffers, so a discarded decode may overlap the final one.
+        """
+        start, live_start = self._begin_utterance(duration, preroll)
+        speculation = {"end": None, "thread": None, "text": ""}
+        
+        def run(audio: np.ndarray) -> None:
+            speculation["text"] = self._transcribe(audio, self._speculative_input, self._speculative_vad)
+        
+        def on_block(pos: int, endpointer: Endpointer) -> None:
+            thread = self._speculative_thread
+            if speculation["end"] is not None:
+                if endpointer.trailing_silence == 0:
+                    # Speech resumed - the snapshot is incomplete
+                    speculation["end"] = None
+                    self.stats["speculative_discarded"] += 1
+            elif (
+                endpointer.speech_started
+                and endpointer.trailing_silence >= self.speculative_silence
+                and not (thread and thread.is_alive())
+            ):
+                speculation["end"] = pos
+                audio = self._read_utterance(start, pos, self._speculative_audio, preroll, live_start)
+                speculation["thread"] = threading.Thread(target=run, args=(audio,), daemon=True)
+                self._speculative_thread = speculation["thread"]
+                speculation["thread"].start()
+        
+        end = self._capture_utterance(
+            live_start, duration, silence_threshold, silence_duration, min_duration,
+            on_block=on_block, preroll=preroll, onset_timeout=onset_timeout,
+            keyword_seconds=keyword_seconds
+        )
+        
+        if end is None:
+            return ""
+        if speculation["end"] is not None:
+            speculation["thread"].join()
+            self.stats["speculative_hits"] += 1
+            return speculation["text"]
+        
+        audio = self._read_utterance(start, end, self._utterance, preroll, live_start)
+        return self.transcribe_audio(audio)
+    
+    def listen_streaming(
+        self,
+        duration: int = 5,
+        silence_threshold: float = 0.01,
+        silence_duration: float = 1.5,
+        min_duration: float = 1.0,
+        on_partial: Optional[Callable[[str], None]] = None,
+        partial_interval: float = 0.5,
+        commit_margin: float = 1.0,
+        preroll: Optional[np.ndarray] = None
+    ) -> str:
+        """
+        Record and transcribe incrementally while the user is speaking.
+        
+        A background thread re-decodes the not-yet-committed tail of the live
+        buffer every `partial_interval` seconds and reports the hypothesis via
+        `on_partial`. Segments that end well before the live edge and read the
+        same in two consecutive passes are committed, so at the endpoint only
+        the short uncommitted tail still has to be decoded.
+        
+        Requires start_stream(); falls back to listen() otherwise.
+        
+        Args:
+            duration: Maximum recording duration
+            silence_threshold: Silence detection threshold
+            silence_duration: Seconds of silence before stopping
+            min_duration: Minimum recording duration
+            on_partial: Called (from the decoder thread) with each partial transcript
+            partial_interval: Seconds between partial decodes
+            commit_margin: Segments must end this many seconds before the live edge to commit
+            preroll: Already-captured int16 audio the utterance starts with
+        
+        Returns:
+            Final transcribed text
+        """
+        if self.stream is None:
+            return self.listen(duration, silence_threshold, silence_duration, min_duration, preroll)
+        
+        preroll = self._no_preroll if preroll is None else preroll.ravel()
+        start, live_start = self._begin_utterance(duration, preroll)
+        state = {
+            "committed_pos": start,
+            "committed": [],
+            "previous": [],
+            "preroll": preroll,
+            "live_start": live_start,
+        }
+        stop_event = threading.Event()
+        worker = threading.Thread(
+            target=self._partial_worker,
+            args=(state, stop_event, on_partial, partial_interval, commit_margin),
+            daemon=True
+        )
+        worker.start()
+        
+        try:
+            end = self._capture_utterance(
+                live_start, duration, silence_threshold, silence_duration, min_duration,
+                preroll=preroll
+            )
+        finally:
+            stop_event.set()
+            worker.join()
+        
+        # Only the uncommitted tail is left to decode
+        tail = self._read_utterance(state["committed_pos"], end, self._utterance, preroll, live_start)
+        tail_text = self.transcribe_audio(tail) if len(tail) >= int(0.3 * self.sample_rate) else ""
+        
+        return " ".join(state["committed"] + [tail_text]).strip()
+    
+    def _partial_worker(
+        self,
+        state: dict,
+        stop_event: threading.Event,
+        on_partial: Optional[Callable[[str], None]],
+        interval: float,
+        commit_margin: float
+    ) -> None:
+        """Decode the live tail periodically and commit stable segments."""
+        min_frames = int(0.3 * self.sample_rate)
+        
+        while not stop_event.wait(interval):
+            try:
+                now = self.ring.write_pos
+                audio = self._read_utterance(
+                    state["committed_pos"], now, self._partial_audio,
+                    state["preroll"], state["live_start"]
+                )
+                if len(audio) < min_frames:
+                    continue
+                if self.speech_gate and not self.has_speech(audio, self._partial_vad):
+                    continue  # Silence or room noise: nothing to decode yet
+                audio = self._as_model_input(audio, out=self._partial_input)
+                
+                segments, _ = (self.fast_model or self.model).transcribe(
+                    audio,
+                    beam_size=1,  # Greedy: partials only need to be fast
+                    language="en",
+                    vad_filter=False,
+                    condition_on_previous_text=False,
+                    initial_prompt=" ".join(state["committed"]) or None,
+                )
+                segments = list(segments)
+                hypothesis = [segment.text.strip() for segment in segments]
+                
+                # Commit the agreed prefix that is safely behind the live edge
+                live_edge = len(audio) / self.sample_rate
+                stable = 0
+                for i, segment in enumerate(segments):
+                    if segment.end > live_edge - commit_margin:
+                        break
+                    if i >= len(state["previous"]) or state["previous"][i] != hypothesis[i]:
+                        break
+                    stable = i + 1
+                
+                if stable:
+                    for text in hypothesis[:stable]:
+                        # Committed text skips transcribe_audio(), so filter it here
+                        if self._normalize(text) in self.hallucinations:
+                            self.stats["hallucinations_dropped"] += 1
+                            print(f"⚠️  Dropped likely hallucination: '{text}'")
+                        else:
+                            state["committed"].append(text)
+                    state["committed_pos"] += int(segments[stable - 1].end * self.sample_rate)
+                state["previous"] = hypothesis[stable:]
+                
+                if on_partial:
+                    partial = " ".join(state["committed"] + state["previous"]).strip()
+                    if partial:
+                        on_partial(partial)
+            except Exception as e:
+                print(f"Partial transcription error: {e}")
+    
     def transcribe_file(self, audio_path: str) -> str:
         """
         Transcribe audio from file.
         
         Args:
             audio_path: Path to audio file
-            
+        
         Returns:
             Transcribed text
         """
@@ -193,6 +966,119 @@ class SpeechToText:
         except Exception as e:
             print(f"File transcription error: {e}")
             return ""
+    
+    def transcribe_many(
+        self,
+        paths: Iterable[str],
+        batch_size: int = 8,
+        workers: int = 1,
+        use_processes: bool = False,
+        language: Optional[str] = "en"
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Transcribe many audio files, yielding results as each one finishes.
+        
+        Each file is split at VAD boundaries and the chunks are decoded in
+        batches with faster-whisper's BatchedInferencePipeline (plain
+        VAD-filtered decoding on faster-whisper < 1.1). Files run concurrently
+        on `workers` threads sharing this model, or on `workers` processes that
+        each load their own copy when use_processes is set.
+        
+        After the generator is exhausted, `batch_stats` holds the aggregate
+        real-time factor (processing time / audio time; below 1 is faster
+        than real time).
+        
+        Args:
+            paths: Audio file paths
+            batch_size: Chunks decoded per batch
+            workers: Files transcribed in parallel
+            use_processes: Use a process pool instead of threads
+            language: Language code, or None to auto-detect
+        
+        Yields:
+            Dict with path, text, duration, elapsed and error (None on success)
+        """
+        paths = list(paths)
+        started = time.perf_counter()
+        total_audio = 0.0
+        total_compute = 0.0
+        
+        if use_processes:
+            executor: Executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_batch_worker,
+                initargs=(self.model_size, self.device, self.compute_type)
+            )
+            submit = lambda path: executor.submit(_batch_worker_transcribe, path, batch_size, language)
+        else:
+            if self._batched is None and BatchedInferencePipeline is not None:
+                self._batched = BatchedInferencePipeline(model=self.model)
+            pipeline = self._batched or self.model
+            executor = ThreadPoolExecutor(max_workers=workers)
+            submit = lambda path: executor.submit(_transcribe_path, pipeline, path, batch_size, language)
+        
+        try:
+            futures = {submit(path): path for path in paths}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"path": futures[future], "text": "", "duration": 0.0, "elapsed": 0.0, "error": str(e)}
+                total_audio += result["duration"]
+                total_compute += result["elapsed"]
+                yield result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            wall = time.perf_counter() - started
+            self.batch_stats = {
+                "files": len(paths),
+                "audio_seconds": total_audio,
+                "wall_seconds": wall,
+                "rtf": wall / total_audio if total_audio else 0.0,
+                "compute_rtf": total_compute / total_audio if total_audio else 0.0,
+            }
+            print(
+                f"Transcribed {len(paths)} files ({total_audio:.1f}s audio) in {wall:.1f}s "
+                f"- RTF {self.batch_stats['rtf']:.3f}"
+            )
+
+
+def _transcribe_path(
+    model: Any,
+    path: str,
+    batch_size: int,
+    language: Optional[str]
+) -> Dict[str, Any]:
+    """Transcribe one file with a WhisperModel or BatchedInferencePipeline."""
+    started = time.perf_counter()
+    if BatchedInferencePipeline is not None and isinstance(model, BatchedInferencePipeline):
+        segments, info = model.transcribe(path, batch_size=batch_size, language=language)
+    else:
+        segments, info = model.transcribe(path, beam_size=5, language=language, vad_filter=True)
+    text = " ".join([segment.text for segment in segments]).strip()
+    return {
+        "path": path,
+        "text": text,
+        "duration": info.duration,
+        "elapsed": time.perf_counter() - started,
+        "error": None,
+    }
+
+
+# Per-process model for transcribe_many(use_processes=True)
+_worker_model: Any = None
+
+
+def _init_batch_worker(model_size: str, device: str, compute_type: str) -> None:
+    """Load the model once in each pool process."""
+    global _worker_model
+    model = WhisperModel(model_size, device=device, compute_type=compute_type)
+    _worker_model = BatchedInferencePipeline(model=model) if BatchedInferencePipeline else model
+
+
+def _batch_worker_transcribe(path: str, batch_size: int, language: Optional[str]) -> Dict[str, Any]:
+    """Process pool entry point for transcribe_many()."""
+    return _transcribe_path(_worker_model, path, batch_size, language)
 
 
 if __name__ == "__main__":
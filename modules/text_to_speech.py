@@ -2,9 +2,11 @@
 Text-to-Speech Module
 Uses Mac's built-in 'say' command for voice synthesis.
 """
+import collections
 import subprocess
 import threading
-from typing import Optional
+import time
+from typing import Callable, Deque, List, Optional
 import os
 
 
@@ -22,43 +24,90 @@ class TextToSpeech:
         self.voice = voice
         self.rate = rate
         self.current_process: Optional[subprocess.Popen] = None
+        self.on_speech_start: Optional[Callable[[str], None]] = None  # Called as each utterance starts
         
+        # perf_counter() [start, end] of recent playback (end is None while
+        # playing), so capture can tell which audio is our own voice
+        self.playback_spans: Deque[List[Optional[float]]] = collections.deque(maxlen=32)
+        self._spans_lock = threading.Lock()
+    
     def speak(self, text: str, blocking: bool = False) -> None:
         """
         Speak the given text.
         
         Args:
             text: Text to speak
-            blocking: If True, wait for speech to complete
+            blocking: If True, wait for speech to complete (or stop())
         """
         if not text or not text.strip():
             return
-            
+        
         # Stop any ongoing speech
         self.stop()
         
         try:
             cmd = ["say", "-v", self.voice, "-r", str(self.rate), text]
             
+            if self.on_speech_start:
+                self.on_speech_start(text)
+            
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            self.current_process = process
+            span = self._begin_playback()
             if blocking:
-                subprocess.run(cmd, check=True)
+                # Kept in current_process so stop() from another thread
+                # (barge-in) ends the wait early
+                process.wait()
+                self._end_playback(span)
             else:
-                # Run in background
-                self.current_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
+                threading.Thread(target=self._watch_playback, args=(process, span), daemon=True).start()
         except Exception as e:
             print(f"TTS Error: {e}")
     
+    def _begin_playback(self) -> List[Optional[float]]:
+        span: List[Optional[float]] = [time.perf_counter(), None]
+        with self._spans_lock:
+            self.playback_spans.append(span)
+        return span
+    
+    def _end_playback(self, span: List[Optional[float]]) -> None:
+        span[1] = time.perf_counter()
+    
+    def _watch_playback(self, process: subprocess.Popen, span: List[Optional[float]]) -> None:
+        """Stamp the end of a background utterance."""
+        process.wait()
+        self._end_playback(span)
+    
+    def playing_during(self, start: float, end: float, tail: float = 0.0) -> bool:
+        """
+        Check whether anything was playing during a time range.
+        
+        Args:
+            start: Range start (perf_counter() seconds)
+            end: Range end (perf_counter() seconds)
+            tail: Seconds each playback is extended by (output latency, room echo)
+        
+        Returns:
+            True if the range overlaps a playback span
+        """
+        with self._spans_lock:
+            spans = list(self.playback_spans)
+        for span_start, span_end in reversed(spans):
+            if span_start <= end and (span_end is None or span_end + tail >= start):
+                return True
+        return False
+    
     def speak_async(self, text: str) -> threading.Thread:
         """
         Speak text in a separate thread.
         
         Args:
             text: Text to speak
-            
+        
         Returns:
             Thread object
         """
@@ -100,6 +149,7 @@ class TextToSpeech:
         
         sound = sounds.get(sound_type, "Tink")
         
+        span = self._begin_playback()
         try:
             # Play system sound
             subprocess.run(
@@ -110,6 +160,8 @@ class TextToSpeech:
             )
         except:
             pass
+        finally:
+            self._end_playback(span)
     
     @staticmethod
     def list_voices() -> list:
@@ -2,10 +2,102 @@
 Tool Executor Module
 Executes system commands based on LLM responses.
 """
+import re
 import subprocess
-import json
+import numpy as np
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from .intent_router import normalize_utterance, trigram_vector
+from .llm_response import LLMResponse
+
+# Descriptions of the tool handlers, for native tool calling and the JSON-mode schema.
+# "keywords" and "examples" are only used to preselect tools locally.
+TOOL_SPECS: Dict[str, Dict[str, Any]] = {
+    "open_app": {
+        "description": "Open a Mac application by its exact name (e.g. \"Google Chrome\" for Chrome)",
+        "parameters": {
+            "app_name": {"type": "string", "description": "Exact application name"},
+        },
+        "keywords": ["open", "launch", "start", "app", "application", "calendar", "chrome", "spotify"],
+        "examples": ["open spotify", "launch chrome", "show me my calendar"],
+    },
+    "search_files": {
+        "description": "Search the user's files with Spotlight",
+        "parameters": {
+            "query": {"type": "string", "description": "What to search for"},
+        },
+        "keywords": ["file", "files", "document", "documents", "find", "folder", "spotlight"],
+        "examples": ["search for python files", "find my presentation"],
+    },
+    "get_info": {
+        "description": "Get the current time, date, battery level or free disk space",
+        "parameters": {
+            "info_type": {"type": "string", "enum": ["time", "date", "battery", "disk_space"]},
+        },
+        "keywords": ["time", "date", "day", "battery", "charge", "disk", "storage", "space"],
+        "examples": ["what time is it", "check my battery", "how much disk space is left"],
+    },
+    "control_app": {
+        "description": "Control music playback in the Music app",
+        "parameters": {
+            "action": {
+                "type": "string",
+                "enum": ["play", "pause", "playpause", "next", "previous", "volume_up", "volume_down"],
+            },
+            "app_name": {"type": "string", "description": "Application to control (default Music)"},
+        },
+        "required": ["action"],
+        "keywords": ["pause", "resume", "skip", "next", "previous", "track", "song", "volume", "louder", "quieter"],
+        "examples": ["pause the music", "skip this song", "turn it up"],
+    },
+    "web_search": {
+        "description": "Search the web in the browser",
+        "parameters": {
+            "query": {"type": "string", "description": "Search query"},
+        },
+        "keywords": ["search", "google", "look", "web", "weather", "news"],
+        "examples": ["search the web for weather in new york", "google python decorators"],
+    },
+    "open_url": {
+        "description": "Open a specific web address in the browser",
+        "parameters": {
+            "url": {"type": "string", "description": "Full URL including https://"},
+        },
+        "keywords": ["website", "site", "url", "go", "com", "org", "github", "youtube"],
+        "examples": ["go to github", "open youtube.com"],
+    },
+    "play_youtube": {
+        "description": "Play music or a video on YouTube (any request to play music or a song)",
+        "parameters": {
+            "query": {"type": "string", "description": "Song, artist, genre or video to search for"},
+        },
+        "keywords": ["play", "music", "song", "songs", "youtube", "video", "listen"],
+        "examples": ["play some music", "play lofi hip hop on youtube", "play relaxing music"],
+    },
+    "browser_control": {
+        "description": "Control the browser: open or close a tab, reload, go back or forward",
+        "parameters": {
+            "action": {"type": "string", "enum": ["new_tab", "close_tab", "refresh", "back", "forward"]},
+            "browser": {"type": "string", "enum": ["Safari", "Google Chrome"]},
+        },
+        "required": ["action"],
+        "keywords": ["tab", "refresh", "reload", "back", "forward", "browser", "page", "safari"],
+        "examples": ["open a new tab", "refresh the page", "go back"],
+    },
+    "list_apps": {
+        "description": "List the applications installed on this Mac",
+        "parameters": {},
+        "keywords": ["apps", "applications", "installed", "list"],
+        "examples": ["list my applications", "what apps do i have"],
+    },
+}
+
+# Every tool call also carries what Jarvis says while it runs
+_RESPONSE_PARAMETER = {
+    "type": "string",
+    "description": "What you say to the user about this action, in your usual voice",
+}
 
 
 class ToolExecutor:
@@ -25,80 +117,147 @@ class ToolExecutor:
             "list_apps": self._list_apps,
             "none": self._no_action,
         }
+        
+        # Example utterances of every tool as one matrix, for select_tools()
+        self._example_tools: List[str] = []
+        vectors = []
+        for name, spec in TOOL_SPECS.items():
+            for example in spec.get("examples", []):
+                self._example_tools.append(name)
+                vectors.append(trigram_vector(example))
+        self._example_matrix = np.stack(vectors)
     
-    def execute(self, llm_response: str) -> tuple[bool, str]:
+    def tool_schemas(self, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
-        Execute command from LLM response.
+        Function-calling schemas (Ollama `tools=` format) for the tool handlers.
         
         Args:
-            llm_response: JSON string from LLM
-            
+            names: Tools to describe (default: every handler except "none")
+        
+        Returns:
+            One {"type": "function", "function": {...}} entry per tool
+        """
+        names = [n for n in self.tool_handlers if n != "none"] if names is None else names
+        schemas = []
+        for name in names:
+            spec = TOOL_SPECS.get(name)
+            if spec is None or name not in self.tool_handlers:
+                continue
+            properties = dict(spec["parameters"])
+            properties["response"] = _RESPONSE_PARAMETER
+            schemas.append({
+                "type": "function",
+                "function": {
+                    "name": name,
+                    "description": spec["description"],
+                    "parameters": {
+                        "type": "object",
+                        "properties": properties,
+                        "required": spec.get("required", list(spec["parameters"])) + ["response"],
+                    },
+                },
+            })
+        return schemas
+    
+    def select_tools(self, utterance: str, max_tools: int = 3, min_similarity: float = 0.35) -> List[str]:
+        """
+        Pick the tools an utterance might need, without asking the model.
+        
+        Tools are ranked by how many of their keywords the utterance contains,
+        then by its similarity to their example utterances. Purely
+        conversational input selects nothing.
+        
+        Args:
+            utterance: User's text input
+            max_tools: Most tools returned
+            min_similarity: Trigram similarity to an example that selects a
+                tool without a keyword
+        
+        Returns:
+            Tool names, most relevant first
+        """
+        text = normalize_utterance(utterance)
+        if not text:
+            return []
+        words = set(re.findall(r"[a-z0-9']+", text))
+        similarity: Dict[str, float] = {}
+        for name, score in zip(self._example_tools, self._example_matrix @ trigram_vector(text)):
+            similarity[name] = max(similarity.get(name, 0.0), float(score))
+        
+        ranked = []
+        for name, spec in TOOL_SPECS.items():
+            hits = len(words.intersection(spec["keywords"]))
+            if hits or similarity.get(name, 0.0) >= min_similarity:
+                ranked.append((hits, similarity.get(name, 0.0), name))
+        ranked.sort(reverse=True)
+        return [name for _, _, name in ranked[:max_tools]]
+    
+    def tools_for(self, utterance: str, max_tools: int = 3) -> List[Dict[str, Any]]:
+        """Schemas of the tools select_tools() picks for an utterance."""
+        return self.tool_schemas(self.select_tools(utterance, max_tools))
+    
+    def response_schema(self) -> Dict[str, Any]:
+        """
+        JSON schema for JSON-mode replies (Ollama `format=`), one branch per tool.
+        
+        Each branch fixes "tool" to the tool's name, allows exactly that
+        tool's parameters and requires "response", so the model can only
+        write one well-formed object. "tool" comes first and "response"
+        last, so a streamed reply names its tool call before it starts
+        talking.
+        
         Returns:
-            Tuple of (success, result_message)
+            Schema accepted by LLMResponse.from_json()
+        """
+        branches = []
+        for name in self.tool_handlers:
+            spec = TOOL_SPECS.get(name, {"parameters": {}})
+            properties: Dict[str, Any] = {"tool": {"type": "string", "enum": [name]}}
+            properties.update(spec["parameters"])
+            properties["response"] = {"type": "string"}
+            branches.append({
+                "type": "object",
+                "properties": properties,
+                "required": ["tool"] + spec.get("required", list(spec["parameters"])) + ["response"],
+                "additionalProperties": False,
+            })
+        return {"anyOf": branches}
+    
+    def execute(self, response: LLMResponse) -> tuple[bool, str]:
+        """
+        Run the tool a reply asks for.
+        
+        Also used while a reply is still streaming, so the tool can run
+        before generation finishes ("response" may be empty or partial then).
+        
+        Args:
+            response: Parsed reply (from the LLM or the intent router)
+        
+        Returns:
+            Tuple of (success, result_message): the reply's text followed by
+            any details from the tool
         """
         try:
-            # Parse JSON response
-            data = json.loads(llm_response)
-            tool = data.get("tool", "none")
-            response_text = data.get("response", "")
+            tool = response.tool
+            response_text = response.response
             
             print(f"🔧 Tool: {tool}")
             print(f"📝 Response text: {response_text}")
-            print(f"📦 Data: {data}")
+            print(f"📦 Parameters: {response.parameters}")
             
             # Execute tool
             if tool in self.tool_handlers:
                 print(f"✓ Executing tool handler: {tool}")
-                success, details = self.tool_handlers[tool](data)
+                success, details = self.tool_handlers[tool](response.parameters)
                 print(f"✓ Tool result - Success: {success}, Details: {details}")
                 
                 # Combine response with details if any
-                if details:
-                    full_response = f"{response_text}\n{details}"
-                else:
-                    full_response = response_text
-                
+                full_response = "\n".join(part for part in (response_text, details) if part)
                 return success, full_response
             else:
                 print(f"⚠️  Unknown tool: {tool}, attempting fallback...")
                 # Try to guess what the user wanted based on the parameters
-                return self._handle_unknown_action(data, response_text)
-                
-        except json.JSONDecodeError as e:
-            print(f"JSON parse error: {e}")
-            print(f"Response was: {llm_response}")
-            
-            # Try to extract just the first JSON object if multiple were sent
-            try:
-                # Find the first complete JSON object
-                lines = llm_response.strip().split('\n')
-                json_str = ""
-                brace_count = 0
-                
-                for line in lines:
-                    json_str += line
-                    brace_count += line.count('{') - line.count('}')
-                    if brace_count == 0 and json_str.strip():
-                        # Found complete JSON
-                        break
-                
-                # Try parsing just the first JSON
-                data = json.loads(json_str)
-                tool = data.get("tool", "none")
-                response_text = data.get("response", "")
-                
-                print(f"✓ Recovered first JSON object: {tool}")
-                
-                if tool in self.tool_handlers:
-                    success, details = self.tool_handlers[tool](data)
-                    return success, response_text if not details else f"{response_text}\n{details}"
-                else:
-                    return self._handle_unknown_action(data, response_text)
-                    
-            except Exception as recovery_error:
-                print(f"Could not recover JSON: {recovery_error}")
-                # If not JSON, treat as plain response
-                return True, llm_response
+                return self._handle_unknown_action(response.to_dict(), response_text)
         except Exception as e:
             return False, f"Error executing tool: {e}"
     
@@ -140,7 +299,7 @@ class ToolExecutor:
             else:
                 app_list = '\n'.join(app_names)
                 return True, f"Found {len(app_names)} installed applications:\n\n{app_list}"
-                
+        
         except subprocess.TimeoutExpired:
             return False, "Search for applications timed out."
         except Exception as e:
@@ -193,7 +352,7 @@ class ToolExecutor:
                 return True, f"Found {count} files. Here are the first 5:\n{file_list}"
             else:
                 return True, f"Found {count} file(s):\n{file_list}"
-                
+        
         except subprocess.TimeoutExpired:
             return False, "Search timed out."
         except Exception as e:
@@ -251,7 +410,7 @@ class ToolExecutor:
             
             else:
                 return False, f"Unknown info type: {info_type}"
-                
+        
         except Exception as e:
             return False, f"Error getting info: {e}"
     
@@ -387,7 +546,7 @@ if __name__ == "__main__":
     executor = ToolExecutor()
     
     # Test get_info
-    test_response = '{"tool": "get_info", "info_type": "time", "response": "Getting current time."}'
+    test_response = LLMResponse(tool="get_info", parameters={"info_type": "time"}, response="Getting current time.")
     success, result = executor.execute(test_response)
     print(f"Success: {success}")
     print(f"Result: {result}")
@@ -0,0 +1,295 @@
+"""
+Voice Activity Detection Module
+Frame-level speech detection and end-of-utterance endpointers.
+"""
+import numpy as np
+from typing import List
+
+from .audio_buffer import AudioRingBuffer, to_float32
+
+
+class FrameVAD:
+    """
+    Energy + zero-crossing-rate voice activity detector.
+    
+    Audio is cut into fixed frames (10-30 ms) and every frame of a block is
+    scored at once. A frame is voiced when its RMS clears the running noise
+    floor by `energy_ratio`; moderately loud frames with a very high
+    zero-crossing rate (hiss, fans, keyboard clicks) are rejected unless they
+    are loud enough to be fricatives in real speech.
+    """
+    
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        energy_ratio: float = 3.0,
+        min_rms: float = 0.003,
+        max_zcr: float = 0.25,
+        noise_window: float = 1.5
+    ):
+        """
+        Initialize VAD.
+        
+        Args:
+            sample_rate: Audio sample rate
+            frame_ms: Frame length in milliseconds (10-30)
+            energy_ratio: Frame RMS must exceed noise floor * ratio to be voiced
+            min_rms: Absolute RMS below which a frame is never voiced
+            max_zcr: Zero-crossing rate (crossings per sample) above which
+                moderately loud frames are treated as noise
+            noise_window: Seconds of frame history the noise floor is tracked over
+        """
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.frame_duration = self.frame_length / sample_rate
+        self.energy_ratio = energy_ratio
+        self.min_rms = min_rms
+        self.max_zcr = max_zcr
+        
+        # Noise floor = minimum frame RMS over the recent history. Speech has
+        # short gaps, so the minimum follows the background, not the talker.
+        # The history starts at the min_rms prior so the first second behaves
+        # like a fixed threshold even if the user is already speaking.
+        self._history = np.full(
+            max(1, round(noise_window / self.frame_duration)),
+            min_rms / energy_ratio,
+            dtype='float32'
+        )
+        self._history_pos = 0
+        self.noise_floor = float(self._history[0])
+        
+        # Samples left over from the previous block (less than one frame)
+        self._carry = np.zeros(self.frame_length, dtype='float32')
+        self._carry_len = 0
+        
+        # Scratch space reused across calls (grown on demand)
+        self._work = np.zeros(0, dtype='float32')
+        self._signs = np.zeros(0, dtype=bool)
+        self._changed = np.zeros(0, dtype=bool)
+        self._crossings = np.zeros(0, dtype='float32')
+        self._no_frames = np.zeros(0, dtype=bool)
+    
+    def reset(self) -> None:
+        """Forget buffered samples (the noise floor estimate is kept)."""
+        self._carry_len = 0
+    
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Classify every complete frame in a block.
+        
+        Args:
+            samples: 1-D int16 audio (or float audio in [-1, 1])
+        
+        Returns:
+            Boolean array, one voiced/unvoiced decision per frame
+        """
+        carry = self._carry_len
+        n = carry + len(samples)
+        if n > len(self._work):
+            self._work = np.zeros(n, dtype='float32')
+            self._signs = np.zeros(n, dtype=bool)
+            self._changed = np.zeros(n, dtype=bool)
+            self._crossings = np.zeros(n, dtype='float32')
+        
+        work = self._work
+        work[:carry] = self._carry[:carry]
+        to_float32(samples, out=work[carry:n])
+        
+        fl = self.frame_length
+        n_frames = n // fl
+        used = n_frames * fl
+        self._carry_len = n - used
+        self._carry[:self._carry_len] = work[used:n]
+        
+        if n_frames == 0:
+            return self._no_frames
+        
+        frames = work[:used].reshape(n_frames, fl)
+        rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / fl)
+        # Zero crossings on the flat signal (contiguous ops need no temporaries)
+        signs = np.signbit(work[:used], out=self._signs[:used])
+        np.not_equal(signs[1:], signs[:-1], out=self._changed[:used - 1])
+        crossings = self._crossings[:used]
+        crossings[:used - 1] = self._changed[:used - 1]
+        crossings[used - 1] = 0
+        zcr = crossings.reshape(n_frames, fl).sum(axis=1) / fl
+        
+        # Update the running noise floor with this block's frames
+        size = len(self._history)
+        idx = (self._history_pos + np.arange(min(n_frames, size))) % size
+        self._history[idx] = rms[-len(idx):]
+        self._history_pos = (self._history_pos + len(idx)) % size
+        self.noise_floor = max(float(self._history.min()), 1e-5)
+        
+        threshold = max(self.noise_floor * self.energy_ratio, self.min_rms)
+        return (rms > threshold) & ((zcr < self.max_zcr) | (rms > threshold * 3))
+
+
+class RMSEndpointer:
+    """
+    Fixed-threshold endpointer (the original record_audio behaviour).
+    
+    Stops after `silence_duration` seconds in which the RMS of the most
+    recent 400 ms stays under `silence_threshold`.
+    """
+    
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        silence_threshold: float = 0.01,
+        silence_duration: float = 1.5,
+        min_duration: float = 1.0,
+        window: float = 0.4
+    ):
+        """
+        Initialize endpointer.
+        
+        Args:
+            sample_rate: Audio sample rate
+            silence_threshold: RMS below this counts as silence
+            silence_duration: Seconds of silence before stopping
+            min_duration: Never stop before this many seconds
+            window: RMS window length in seconds
+        """
+        self.sample_rate = sample_rate
+        self.silence_threshold = silence_threshold
+        self.silence_frames = int(silence_duration * sample_rate)
+        self.min_frames = int(min_duration * sample_rate)
+        self._ring = AudioRingBuffer(int(window * sample_rate), dtype='float32')
+        self._window = np.zeros(self._ring.capacity, dtype='float32')
+        self._scaled = np.zeros(0, dtype='float32')
+        self.reset()
+    
+    def reset(self) -> None:
+        """Start a new utterance."""
+        self._ring.write_pos = 0
+        self.frames_seen = 0
+        self.silence_count = 0
+        self.speech_started = False
+        self.endpoint = False
+        self.decisions: List[bool] = []
+    
+    @property
+    def trailing_silence(self) -> float:
+        """Seconds of silence since the last loud window."""
+        return self.silence_count / self.sample_rate
+    
+    def process(self, samples: np.ndarray) -> bool:
+        """
+        Feed a block of audio.
+        
+        Args:
+            samples: 1-D int16 audio (or float audio in [-1, 1])
+        
+        Returns:
+            True once the utterance has ended
+        """
+        if len(samples) > len(self._scaled):
+            self._scaled = np.zeros(len(samples), dtype='float32')
+        self._ring.write(to_float32(samples, out=self._scaled))
+        self.frames_seen += len(samples)
+        self.silence_count += len(samples)
+        
+        # Don't stop before minimum duration
+        if self.frames_seen < self.min_frames:
+            self.silence_count = 0
+            return False
+        
+        chunk = self._ring.read(0, self._ring.write_pos, out=self._window)
+        rms = np.sqrt(np.dot(chunk, chunk) / max(len(chunk), 1))
+        loud = bool(rms >= self.silence_threshold)
+        self.decisions.append(loud)
+        
+        if loud:
+            self.speech_started = True
+            self.silence_count = 0
+        elif self.silence_count >= self.silence_frames:
+            self.endpoint = True
+        return self.endpoint
+
+
+class VADEndpointer:
+    """
+    Frame-VAD endpointer with onset confirmation and hangover.
+    
+    Speech starts after `min_speech` seconds of consecutive voiced frames
+    (so clicks don't count), and the utterance ends once `silence_duration`
+    seconds of unvoiced frames follow it. Because the noise floor adapts,
+    the hangover can be a few hundred milliseconds instead of seconds.
+    Per-frame decisions are kept in `decisions` for inspection.
+    """
+    
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        silence_duration: float = 0.5,
+        min_speech: float = 0.15,
+        min_duration: float = 0.0,
+        **vad_options
+    ):
+        """
+        Initialize endpointer.
+        
+        Args:
+            sample_rate: Audio sample rate
+            frame_ms: VAD frame length in milliseconds
+            silence_duration: Hangover - seconds of non-speech that end an utterance
+            min_speech: Seconds of consecutive voiced frames that confirm speech onset
+            min_duration: Never stop before this many seconds
+            **vad_options: Extra FrameVAD settings (energy_ratio, max_zcr, ...)
+        """
+        self.vad = FrameVAD(sample_rate=sample_rate, frame_ms=frame_ms, **vad_options)
+        self.sample_rate = sample_rate
+        self.hangover_frames = max(1, round(silence_duration / self.vad.frame_duration))
+        self.onset_frames = max(1, round(min_speech / self.vad.frame_duration))
+        self.min_frames = round(min_duration / self.vad.frame_duration)
+        self.reset()
+    
+    def reset(self) -> None:
+        """Start a new utterance (the noise floor is kept)."""
+        self.vad.reset()
+        self.decisions: List[bool] = []
+        self.speech_started = False
+        self.endpoint = False
+        self.voiced_run = 0
+        self.silence_run = 0
+        self.speech_frames = 0
+    
+    @property
+    def trailing_silence(self) -> float:
+        """Seconds of non-speech since the last voiced frame."""
+        return self.silence_run * self.vad.frame_duration
+    
+    def process(self, samples: np.ndarray) -> bool:
+        """
+        Feed a block of audio.
+        
+        Args:
+            samples: 1-D int16 audio (or float audio in [-1, 1])
+        
+        Returns:
+            True once the utterance has ended
+        """
+        voiced = self.vad.process(samples)
+        self.decisions.extend(voiced.tolist())
+        self.speech_frames += int(np.count_nonzero(voiced))
+        
+        for is_voiced in voiced:
+            if is_voiced:
+                self.voiced_run += 1
+                self.silence_run = 0
+                if self.voiced_run >= self.onset_frames:
+                    self.speech_started = True
+            else:
+                self.voiced_run = 0
+                self.silence_run += 1
+        
+        if (
+            self.speech_started
+            and self.silence_run >= self.hangover_frames
+            and len(self.decisions) >= self.min_frames
+        ):
+            self.endpoint = True
+        return self.endpoint
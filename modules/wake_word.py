@@ -1,58 +1,146 @@
 """
 Wake Word Detection Module
-Uses Porcupine for "Hey Jarvis" detection.
+Uses Porcupine (or the offline LocalKeywordSpotter) for "Hey Jarvis" detection.
 """
 import struct
-import pvporcupine
 import sounddevice as sd
 import numpy as np
-from typing import Callable, Optional
+from types import ModuleType
+from typing import Callable, Iterator, Optional, Union
 import threading
 
+from .audio_buffer import AudioRingBuffer
+from .audio_bus import AudioBus
+from .session_recorder import ReplaySource, SessionRecorder
+
+try:
+    import pvporcupine
+except ImportError:  # Only needed for the Porcupine engine
+    pvporcupine = None
+
+
+class WakeWordEngine:
+    """
+    Interface for wake word engines.
+    
+    An engine consumes fixed-size int16 frames at its own sample rate and
+    reports which keyword (if any) ended in each frame.
+    """
+    
+    sample_rate: int = 16000
+    frame_length: int = 512
+    
+    def process(self, pcm: np.ndarray) -> int:
+        """
+        Feed one frame.
+        
+        Args:
+            pcm: 1-D int16 audio of `frame_length` samples
+        
+        Returns:
+            Index of the detected keyword, or -1
+        """
+        raise NotImplementedError
+    
+    def delete(self) -> None:
+        """Release engine resources."""
+
+
+class PorcupineEngine(WakeWordEngine):
+    """Picovoice Porcupine (needs pvporcupine and an access key)."""
+    
+    def __init__(self, access_key: str, keyword: str = "jarvis", sensitivity: float = 0.5):
+        """
+        Initialize Porcupine.
+        
+        Args:
+            access_key: Picovoice access key
+            keyword: Built-in keyword (jarvis, alexa, etc.)
+            sensitivity: Detection sensitivity (0.0 to 1.0)
+        """
+        if pvporcupine is None:
+            raise ImportError("pvporcupine is not installed (pip install pvporcupine)")
+        self.engine = pvporcupine.create(
+            access_key=access_key,
+            keywords=[keyword],
+            sensitivities=[sensitivity]
+        )
+        self.sample_rate = self.engine.sample_rate
+        self.frame_length = self.engine.frame_length
+    
+    def process(self, pcm: np.ndarray) -> int:
+        return self.engine.process(pcm)
+    
+    def delete(self) -> None:
+        self.engine.delete()
+
 
 class WakeWordDetector:
-    """Wake word detector using Porcupine."""
+    """Wake word detector running a WakeWordEngine (Porcupine by default)."""
     
     def __init__(
         self,
-        access_key: str,
+        access_key: str = "",
         keyword: str = "jarvis",
-        sensitivity: float = 0.5
+        sensitivity: float = 0.5,
+        audio_backend: Optional[Union[ModuleType, ReplaySource]] = None,
+        recorder: Optional[SessionRecorder] = None,
+        bus: Optional[AudioBus] = None,
+        lookback_seconds: float = 8.0,
+        keyword_seconds: float = 1.0,
+        engine: Optional[WakeWordEngine] = None
     ):
         """
         Initialize wake word detector.
         
         Args:
-            access_key: Picovoice access key
+            access_key: Picovoice access key (Porcupine engine only)
             keyword: Wake word keyword (jarvis, alexa, etc.)
-            sensitivity: Detection sensitivity (0.0 to 1.0)
+            sensitivity: Detection sensitivity (0.0 to 1.0, Porcupine engine only)
+            audio_backend: Provider of InputStream; defaults to sounddevice
+                (pass a ReplaySource to run from a recording)
+            recorder: Optional SessionRecorder that receives all captured audio
+                (with a bus, the bus records and this is only used for markers)
+            bus: Shared AudioBus to take frames from instead of opening the device
+            lookback_seconds: Seconds of recent audio kept for take_post_wake_audio()
+            keyword_seconds: How far before the detection the keyword is assumed to start
+            engine: Wake word engine; defaults to Porcupine built from the
+                access key, keyword and sensitivity
         """
+        self.audio = audio_backend or sd
+        self.recorder = recorder
+        self.bus = bus
         self.access_key = access_key
         self.keyword = keyword
         self.sensitivity = sensitivity
-        self.porcupine: Optional[pvporcupine.Porcupine] = None
+        self.engine: Optional[WakeWordEngine] = engine
         self.is_listening = False
         self.callback: Optional[Callable] = None
         self.listen_thread: Optional[threading.Thread] = None
+        self.keyword_seconds = keyword_seconds
+        self.lookback: Optional[AudioRingBuffer] = None
+        self._wake_position: Optional[int] = None
         
-        try:
-            # Initialize Porcupine
-            self.porcupine = pvporcupine.create(
-                access_key=access_key,
-                keywords=[keyword],
-                sensitivities=[sensitivity]
-            )
-            print(f"Wake word detector initialized for '{keyword}'")
-            print(f"Sample rate: {self.porcupine.sample_rate} Hz")
-            print(f"Frame length: {self.porcupine.frame_length}")
-        except Exception as e:
-            print(f"Error initializing Porcupine: {e}")
-            print("\nTo get a free API key:")
-            print("1. Go to https://console.picovoice.ai/")
-            print("2. Sign up for a free account")
-            print("3. Create an access key")
-            print("4. Add it to config.yaml or set PICOVOICE_API_KEY environment variable")
-            raise
+        if self.engine is None:
+            try:
+                # Initialize Porcupine
+                self.engine = PorcupineEngine(access_key, keyword, sensitivity)
+            except Exception as e:
+                print(f"Error initializing Porcupine: {e}")
+                print("\nTo get a free API key:")
+                print("1. Go to https://console.picovoice.ai/")
+                print("2. Sign up for a free account")
+                print("3. Create an access key")
+                print("4. Add it to config.yaml or set PICOVOICE_API_KEY environment variable")
+                print("\nOr use the offline engine: set wake_word_engine: \"local\" in config.yaml")
+                raise
+        
+        print(f"Wake word detector initialized for '{keyword}' ({type(self.engine).__name__})")
+        print(f"Sample rate: {self.engine.sample_rate} Hz")
+        print(f"Frame length: {self.engine.frame_length}")
+        
+        # Continuous lookback so the words after the keyword are never lost
+        self.lookback = AudioRingBuffer(int(lookback_seconds * self.engine.sample_rate))
     
     def start(self, callback: Callable) -> None:
         """
@@ -81,60 +169,101 @@ class WakeWordDetector:
             self.listen_thread.join(timeout=2)
         print("Wake word detection stopped.")
     
+    def take_post_wake_audio(self) -> Optional[np.ndarray]:
+        """
+        Hand over the audio since the last wake word.
+        
+        Returns everything from about `keyword_seconds` before the detection
+        up to now (so the keyword and anything said right after it), for use
+        as the start of the first utterance. Each detection can be taken once.
+        
+        Returns:
+            int16 audio at the engine's sample rate, or None if no wake word is pending
+        """
+        if self._wake_position is None or self.lookback is None:
+            return None
+        end = self.lookback.write_pos
+        start = max(self._wake_position, self.lookback.oldest_position())
+        self._wake_position = None
+        return self.lookback.read(start, end, out=np.empty(end - start, dtype=np.int16))
+    
+    def _frames(self) -> Iterator[np.ndarray]:
+        """
+        Yield int16 frames of the engine's frame length while listening.
+        
+        Frames come from a bus subscription when a shared bus was given,
+        otherwise from a private input stream.
+        """
+        if self.bus is not None:
+            subscription = self.bus.subscribe(
+                "wake_word",
+                sample_rate=self.engine.sample_rate,
+                frame_length=self.engine.frame_length
+            )
+            try:
+                dropped = 0
+                while self.is_listening:
+                    frame = subscription.read(timeout=0.5)
+                    if subscription.dropped != dropped:
+                        dropped = subscription.dropped
+                        print("Audio buffer overflow!")
+                    if frame is not None:
+                        yield frame
+            finally:
+                subscription.stop()
+            return
+        
+        with self.audio.InputStream(
+            samplerate=self.engine.sample_rate,
+            channels=1,
+            dtype='int16',
+            blocksize=self.engine.frame_length
+        ) as stream:
+            while self.is_listening:
+                # Read audio frame
+                audio_frame, overflowed = stream.read(self.engine.frame_length)
+                
+                if overflowed:
+                    print("Audio buffer overflow!")
+                
+                # Stream is already int16 - take the channel as a view
+                pcm = audio_frame[:, 0]
+                if self.recorder:
+                    self.recorder.write(pcm)
+                yield pcm
+    
     def _listen_loop(self) -> None:
         """Main listening loop (runs in background thread)."""
-        if not self.porcupine:
+        if not self.engine:
             return
         
         try:
-            # Open audio stream
-            with sd.InputStream(
-                samplerate=self.porcupine.sample_rate,
-                channels=1,
-                dtype='int16',
-                blocksize=self.porcupine.frame_length
-            ) as stream:
+            for pcm in self._frames():
+                self.lookback.write(pcm)
                 
-                # Buffer to capture audio after wake word
-                post_wake_buffer = []
-                capturing_post_wake = False
-                frames_to_capture = int(3.0 * self.porcupine.sample_rate / self.porcupine.frame_length)  # 3 seconds
+                # Process frame for wake word
+                keyword_index = self.engine.process(pcm)
                 
-                while self.is_listening:
-                    # Read audio frame
-                    audio_frame, overflowed = stream.read(self.porcupine.frame_length)
-                    
-                    if overflowed:
-                        print("Audio buffer overflow!")
-                    
-                    # Convert to int16 array
-                    pcm = audio_frame.flatten().astype(np.int16)
-                    
-                    # If capturing post-wake audio, add to buffer
-                    if capturing_post_wake:
-                        post_wake_buffer.append(pcm)
-                        if len(post_wake_buffer) >= frames_to_capture:
-                            capturing_post_wake = False
-                            # Process captured audio
-                            if self.callback and hasattr(self, 'post_wake_audio'):
-                                self.post_wake_audio = np.concatenate(post_wake_buffer)
+                # Wake word detected!
+                if keyword_index >= 0:
+                    print(f"Wake word '{self.keyword}' detected!")
+                    if self.recorder:
+                        end = self.recorder.position
+                        start = end - int(self.keyword_seconds * self.engine.sample_rate)
+                        self.recorder.mark(max(0, start), end, "wake")
                     
-                    # Process frame for wake word
-                    keyword_index = self.porcupine.process(pcm)
+                    # Pre-roll for STT starts at the keyword
+                    self._wake_position = max(
+                        self.lookback.oldest_position(),
+                        self.lookback.write_pos - int(self.keyword_seconds * self.engine.sample_rate)
+                    )
                     
-                    # Wake word detected!
-                    if keyword_index >= 0:
-                        print(f"Wake word '{self.keyword}' detected!")
-                        # Start capturing audio after wake word
-                        post_wake_buffer = []
-                        capturing_post_wake = True
-                        
-                        if self.callback:
-                            # Call callback in separate thread
-                            threading.Thread(
-                                target=self.callback,
-                                daemon=True
-                            ).start()
+                    if self.callback:
+                        # Call callback in separate thread
+                        threading.Thread(
+                            target=self.callback,
+                            daemon=True
+                        ).start()
         
         except Exception as e:
             print(f"Error in wake word detection: {e}")
@@ -143,8 +272,8 @@ class WakeWordDetector:
     
     def __del__(self):
         """Cleanup resources."""
-        if self.porcupine:
-            self.porcupine.delete()
+        if getattr(self, "engine", None):
+            self.engine.delete()
 
 
 if __name__ == "__main__":
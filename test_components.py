@@ -34,27 +34,28 @@ def test_tools():
     print("Testing Tool Executor")
     print("=" * 60)
     
+    from modules.llm_response import LLMResponse
     from modules.tools import ToolExecutor
     
     executor = ToolExecutor()
     
     # Test get_info (time)
     print("\nTest 1: Get current time")
-    response = '{"tool": "get_info", "info_type": "time", "response": "Getting current time."}'
+    response = LLMResponse(tool="get_info", parameters={"info_type": "time"}, response="Getting current time.")
     success, result = executor.execute(response)
     print(f"Success: {success}")
     print(f"Result: {result}")
     
     # Test get_info (date)
     print("\nTest 2: Get current date")
-    response = '{"tool": "get_info", "info_type": "date", "response": "Getting current date."}'
+    response = LLMResponse(tool="get_info", parameters={"info_type": "date"}, response="Getting current date.")
     success, result = executor.execute(response)
     print(f"Success: {success}")
     print(f"Result: {result}")
     
     # Test get_info (battery)
     print("\nTest 3: Get battery status")
-    response = '{"tool": "get_info", "info_type": "battery", "response": "Checking battery."}'
+    response = LLMResponse(tool="get_info", parameters={"info_type": "battery"}, response="Checking battery.")
     success, result = executor.execute(response)
     print(f"Success: {success}")
     print(f"Result: {result}")
@@ -103,19 +104,26 @@ def test_llm():
             # Test a simple query
             print("\nTesting simple query...")
             from modules.llm_brain import LLMBrain
+            from modules.tools import ToolExecutor
             
             system_prompt = """You are JARVIS. Respond in JSON format:
             {"tool": "none", "response": "Your response here"}"""
             
-            brain = LLMBrain(model=model_name, system_prompt=system_prompt)
+            # The schema only admits one well-formed reply object
+            brain = LLMBrain(
+                model=model_name,
+                system_prompt=system_prompt,
+                response_schema=ToolExecutor().response_schema()
+            )
             response = brain.process("Hello, introduce yourself briefly")
             
-            print(f"Response: {response[:200]}...")
+            print(f"Tool: {response.tool}")
+            print(f"Response: {response.response[:200]}...")
             print("\n✓ LLM Brain working!")
         else:
             print(f"✗ Model '{model_name}' not found")
             print(f"Run: ollama pull {model_name}")
-            
+    
     except Exception as e:
         print(f"✗ Error connecting to Ollama: {e}")
         print("\nTo install Ollama:")
@@ -0,0 +1,32 @@
+"""
+Shared test setup.
+
+The audio and model packages need hardware or large downloads. When one
+is not installed, a placeholder module is registered so the logic in the
+modules that import it can still be tested; anything taken from the
+placeholder raises ImportError when used. Tests that need a model patch
+in their own fake.
+"""
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _placeholder_module(name: str) -> types.ModuleType:
+    module = types.ModuleType(name)
+    
+    def missing(attribute: str):
+        def unavailable(*args, **kwargs):
+            raise ImportError(f"{name} is not installed ({name}.{attribute} was used)")
+        return unavailable
+    
+    module.__getattr__ = missing
+    return module
+
+
+for _name in ("sounddevice", "faster_whisper"):
+    if importlib.util.find_spec(_name) is None:
+        sys.modules[_name] = _placeholder_module(_name)
@@ -0,0 +1,57 @@
+"""Tests for the intent router."""
+import pytest
+
+from modules.intent_router import IntentRouter
+
+
+@pytest.fixture
+def router():
+    return IntentRouter(app_exists=lambda name: "Spotify" if name == "spotify" else None)
+
+
+@pytest.mark.parametrize("text, tool, parameters", [
+    ("What time is it?", "get_info", {"info_type": "time"}),
+    ("Jarvis, what's the time please", "get_info", {"info_type": "time"}),
+    ("tell me the time", "get_info", {"info_type": "time"}),
+    ("got the time?", "get_info", {"info_type": "time"}),
+    ("what is the current time", "get_info", {"info_type": "time"}),
+    ("What's today's date?", "get_info", {"info_type": "date"}),
+    ("battery level", "get_info", {"info_type": "battery"}),
+    ("pause the music", "control_app", {"app_name": "Music", "action": "pause"}),
+    ("skip this song", "control_app", {"app_name": "Music", "action": "next"}),
+    ("open a new tab", "browser_control", {"action": "new_tab", "browser": "Safari"}),
+    ("open Spotify", "open_app", {"app_name": "Spotify"}),
+    ("search the web for python tutorials", "web_search", {"query": "python tutorials"}),
+])
+def test_routes_common_commands(router, text, tool, parameters):
+    reply = router.route(text)
+    
+    assert reply is not None
+    assert reply.tool == tool
+    assert reply.parameters == parameters
+
+
+@pytest.mark.parametrize("text", [
+    "tell me about black holes",
+    "how are you",
+    "what time should I leave",
+    "what time does the store open",
+    "open the pod bay doors",
+    # Extra content words change the request
+    "what time is it in Tokyo",
+    "tell me the time in Paris",
+    "what's the time in New York",
+    "time",
+])
+def test_leaves_other_requests_to_the_llm(router, text):
+    assert router.route(text) is None
+
+
+def test_stats_count_routed_and_llm(router):
+    router.route("what time is it")
+    router.route("what time is it in tokyo")
+    
+    stats = router.get_stats()
+    assert stats["routed"] == 1
+    assert stats["to_llm"] == 1
+    assert stats["hit_rate"] == 0.5
@@ -0,0 +1,41 @@
+"""Tests for the offline keyword spotter."""
+import numpy as np
+
+from modules.keyword_spotter import LocalKeywordSpotter, enroll, resample
+
+
+def _word(sample_rate: int, seed: int = 0) -> np.ndarray:
+    """Three two-formant syllables between short silences, as int16."""
+    rng = np.random.default_rng(seed)
+    parts = [np.zeros(int(0.3 * sample_rate))]
+    for f1, f2, duration in ((300, 2200, 0.18), (700, 1200, 0.22), (400, 1900, 0.25)):
+        t = np.arange(int(duration * sample_rate)) / sample_rate
+        parts.append(np.hanning(len(t)) * (0.2 * np.sin(2 * np.pi * f1 * t) + 0.1 * np.sin(2 * np.pi * f2 * t)))
+    parts.append(np.zeros(int(0.3 * sample_rate)))
+    audio = np.concatenate(parts) + 0.003 * rng.standard_normal(sum(len(p) for p in parts))
+    return (audio * 32767).astype(np.int16)
+
+
+def _detects(spotter: LocalKeywordSpotter, audio: np.ndarray) -> bool:
+    frame = spotter.frame_length
+    return any(spotter.process(audio[i:i + frame]) >= 0 for i in range(0, len(audio) - frame + 1, frame))
+
+
+def test_resample_keeps_duration_and_pitch():
+    t = np.arange(48000) / 48000
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+    
+    resampled = resample(tone, 48000, 16000)
+    
+    assert len(resampled) == 16000
+    assert np.argmax(np.abs(np.fft.rfft(resampled))) == 440  # 1 Hz bins over one second
+
+
+def test_from_file_resamples_templates_to_the_listening_rate(tmp_path):
+    path = str(tmp_path / "templates.npz")
+    enroll([_word(44100, seed=i) for i in range(2)], path, "jarvis", sample_rate=44100)
+    
+    spotter = LocalKeywordSpotter.from_file(path)
+    
+    assert spotter.sample_rate == 16000
+    assert _detects(spotter, _word(16000, seed=5))
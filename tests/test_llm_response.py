@@ -0,0 +1,56 @@
+"""Tests for parsing and checking LLM replies."""
+import json
+
+import pytest
+
+from modules.intent_router import DEFAULT_EXAMPLES
+from modules.llm_response import LLMResponse
+from modules.tools import ToolExecutor
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return ToolExecutor().response_schema()
+
+
+@pytest.mark.parametrize("text, tool, parameters", [
+    ('{"tool": "get_info", "info_type": "time", "response": "Checking."}', "get_info", {"info_type": "time"}),
+    ('{"tool": "open_app", "app_name": "Safari", "response": "Opening."}', "open_app", {"app_name": "Safari"}),
+    ('{"tool": "control_app", "action": "pause", "response": "Pausing."}', "control_app", {"action": "pause"}),
+    ('{"tool": "list_apps", "response": "Listing."}', "list_apps", {}),
+    ('{"tool": "none", "response": "Hello, sir."}', "none", {}),
+])
+def test_valid_replies_parse(schema, text, tool, parameters):
+    reply = LLMResponse.from_json(text, schema)
+    
+    assert reply.tool == tool
+    assert reply.parameters == parameters
+    assert reply.to_dict() == json.loads(text)
+
+
+@pytest.mark.parametrize("text, message", [
+    ('{"tool": "open_app", "response": "Opening."}', "missing 'app_name'"),
+    ('{"tool": "launch_rockets", "response": "Launching."}', "unknown tool 'launch_rockets'"),
+    ('{"tool": "get_info", "info_type": "weather", "response": "Checking."}', "info_type"),
+    ('{"tool": "open_app", "app_name": 3, "response": "Opening."}', "should be string"),
+    ('{"tool": "none", "response": "Hi.", "app_name": "Safari"}', "unexpected 'app_name'"),
+    ('{"tool": "none"}', "missing 'response'"),
+    ('["not", "an", "object"]', "not a JSON object"),
+    ('{"tool": "none", "response": "cut off', "Unterminated string"),
+])
+def test_invalid_replies_raise(schema, text, message):
+    with pytest.raises(ValueError, match=message):
+        LLMResponse.from_json(text, schema)
+
+
+def test_without_schema_any_object_is_accepted():
+    reply = LLMResponse.from_json('{"tool": "open_app", "response": 5}')
+    
+    assert reply.tool == "open_app"
+    assert reply.response == "5"
+
+
+def test_router_intents_match_the_schema(schema):
+    for text, intent in DEFAULT_EXAMPLES:
+        if intent is not None:
+            LLMResponse.from_fields(intent, schema)
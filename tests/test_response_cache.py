@@ -0,0 +1,57 @@
+"""Tests for the LLM response cache."""
+import json
+
+import pytest
+
+from modules.response_cache import ResponseCache
+
+
+def _call(tool, response="Done, sir.", **parameters):
+    return json.dumps({"tool": tool, **parameters, "response": response})
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(path=str(tmp_path / "responses.json"))
+
+
+def test_exact_and_normalised_hits(cache):
+    reply = _call("open_app", app_name="Spotify")
+    assert cache.put("Open Spotify, please", reply)
+    
+    assert cache.get("open spotify") == reply
+    assert cache.get("Jarvis, open Spotify!") == reply
+    assert cache.get_stats()["hits"] == 2
+
+
+def test_similar_hit_needs_the_same_content_words(cache):
+    reply = _call("search_files", query="quarterly budget report")
+    cache.put("search my files for the quarterly budget report from the finance team", reply)
+    
+    # Only a function word differs
+    assert cache.get("search my files for the quarterly budget report from finance team") == reply
+    assert cache.get_stats()["similar_hits"] == 1
+
+
+def test_similar_utterance_with_other_number_misses(cache):
+    cache.put(
+        "search my files for the budget report for 2023",
+        _call("search_files", query="budget report 2023"),
+    )
+    
+    assert cache.get("search my files for the budget report for 2024") is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_volatile_and_contextual_replies_are_not_stored(cache):
+    assert not cache.put("what time is it", _call("get_info", info_type="time"))
+    assert not cache.put("open it again", _call("open_app", app_name="Spotify"))
+    assert len(cache) == 0
+
+
+def test_entries_survive_a_restart(cache):
+    reply = _call("play_youtube", query="lofi")
+    cache.put("play lofi on youtube", reply)
+    
+    reloaded = ResponseCache(path=str(cache.path))
+    assert reloaded.get("play lofi on youtube") == reply
@@ -0,0 +1,121 @@
+"""Tests for SpeechToText capture logic (no microphone or Whisper model needed)."""
+import time
+import types
+
+import numpy as np
+import pytest
+
+from modules import speech_to_text
+from modules.speech_to_text import SpeechToText
+from modules.audio_buffer import AudioRingBuffer
+from modules.vad import VADEndpointer
+
+SAMPLE_RATE = 16000
+
+
+def _speech(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * 32767 * np.sin(2 * np.pi * 200 * t)).astype(np.int16)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16)
+
+
+class _FakeWhisper:
+    def __init__(self, *args, **kwargs):
+        self.calls = 0
+    
+    def transcribe(self, audio, **kwargs):
+        self.calls += 1
+        segment = types.SimpleNamespace(text="Jarvis pause the music", avg_logprob=-0.1, no_speech_prob=0.0)
+        return [segment], None
+
+
+class _SilentMicrophone:
+    """sounddevice stand-in whose recordings are silent."""
+    
+    def rec(self, out, **kwargs):
+        out[:] = 0
+        return out
+    
+    def stop(self):
+        pass
+    
+    def wait(self):
+        pass
+
+
+@pytest.fixture
+def stt(monkeypatch):
+    monkeypatch.setattr(speech_to_text, "WhisperModel", _FakeWhisper)
+    # record_audio() polls the recording every 200 ms; the fake one is filled at once
+    monkeypatch.setattr(speech_to_text, "time", types.SimpleNamespace(sleep=lambda s: None, perf_counter=time.perf_counter))
+    return SpeechToText(endpointer=VADEndpointer(), audio_backend=_SilentMicrophone())
+
+
+def test_command_inside_preroll_is_transcribed(stt):
+    # "Jarvis pause the music" spoken entirely before listening began, then a short pause
+    preroll = np.concatenate([_speech(1.5), _silence(0.2)])
+    
+    text = stt.listen(duration=5, min_duration=0.0, preroll=preroll, onset_timeout=0.8)
+    
+    assert text == "Jarvis pause the music"
+    assert stt.model.calls == 1
+
+
+def test_command_after_wake_word_in_preroll_is_transcribed(stt):
+    preroll = np.concatenate([_speech(1.5), _silence(0.2)])
+    
+    text = stt.listen(duration=5, min_duration=0.0, preroll=preroll, onset_timeout=0.8, keyword_seconds=1.0)
+    
+    assert text == "Jarvis pause the music"
+
+
+def test_pause_after_bare_wake_word_times_out_without_decoding(stt):
+    preroll = np.concatenate([_speech(1.0), _silence(0.2)])
+    
+    text = stt.listen(duration=5, min_duration=0.0, preroll=preroll, onset_timeout=0.8, keyword_seconds=1.0)
+    
+    assert text == ""
+    assert stt.model.calls == 0
+
+
+class _StopAfter:
+    """threading.Event stand-in that lets the worker loop run `passes` times."""
+    
+    def __init__(self, passes):
+        self.passes = passes
+    
+    def wait(self, timeout=None):
+        self.passes -= 1
+        return self.passes < 0
+
+
+def _run_partial_worker(stt, audio, passes):
+    stt._ensure_buffers(len(audio))
+    stt.ring = AudioRingBuffer(len(audio))
+    stt.ring.write(audio)
+    state = {"committed_pos": 0, "committed": [], "previous": [], "preroll": stt._no_preroll, "live_start": 0}
+    stt._partial_worker(state, _StopAfter(passes), None, 0.0, commit_margin=0.5)
+    return state
+
+
+def test_partial_worker_skips_silence(stt):
+    _run_partial_worker(stt, _silence(2.0), passes=3)
+    
+    assert stt.model.calls == 0
+
+
+def test_partial_worker_drops_committed_hallucinations(stt, monkeypatch):
+    segments = [
+        types.SimpleNamespace(text=" Pause the music.", end=0.8),
+        types.SimpleNamespace(text=" Thanks for watching.", end=1.2),
+    ]
+    monkeypatch.setattr(stt.model, "transcribe", lambda audio, **kwargs: (segments, None))
+    
+    state = _run_partial_worker(stt, np.concatenate([_speech(1.5), _silence(0.5)]), passes=2)
+    
+    assert state["committed"] == ["Pause the music."]
+    assert state["committed_pos"] == int(1.2 * SAMPLE_RATE)
+    assert stt.stats["hallucinations_dropped"] == 1
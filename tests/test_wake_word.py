@@ -0,0 +1,61 @@
+"""Tests for the wake word engines."""
+import types
+
+import numpy as np
+
+from modules import wake_word
+
+
+class _FakePorcupine:
+    sample_rate = 16000
+    frame_length = 512
+    
+    def __init__(self):
+        self.deleted = False
+    
+    def process(self, pcm):
+        return 0 if pcm.any() else -1
+    
+    def delete(self):
+        self.deleted = True
+
+
+def _stub_pvporcupine(monkeypatch):
+    handle = _FakePorcupine()
+    created = {}
+    
+    def create(**kwargs):
+        created.update(kwargs)
+        return handle
+    
+    monkeypatch.setattr(wake_word, "pvporcupine", types.SimpleNamespace(create=create))
+    return handle, created
+
+
+def test_porcupine_engine_reads_frame_format(monkeypatch):
+    handle, created = _stub_pvporcupine(monkeypatch)
+    
+    engine = wake_word.PorcupineEngine("key", keyword="jarvis", sensitivity=0.7)
+    
+    assert engine.sample_rate == 16000
+    assert engine.frame_length == 512
+    assert created == {"access_key": "key", "keywords": ["jarvis"], "sensitivities": [0.7]}
+
+
+def test_porcupine_engine_process_and_delete(monkeypatch):
+    handle, _ = _stub_pvporcupine(monkeypatch)
+    engine = wake_word.PorcupineEngine("key")
+    
+    assert engine.process(np.zeros(512, dtype=np.int16)) == -1
+    assert engine.process(np.ones(512, dtype=np.int16)) == 0
+    engine.delete()
+    assert handle.deleted
+
+
+def test_detector_builds_porcupine_by_default(monkeypatch):
+    _stub_pvporcupine(monkeypatch)
+    
+    detector = wake_word.WakeWordDetector(access_key="key")
+    
+    assert isinstance(detector.engine, wake_word.PorcupineEngine)
+    assert detector.lookback.capacity == 8 * 16000